@@ -0,0 +1,84 @@
+"""
+This script benchmarks loading tasks.txt with and without the fast, cached
+date parsing in task_manager.py.
+It writes a synthetic task file to a temporary folder, then times a full
+start-up of the task manager (login, viewing the first page of all tasks,
+which loads them, and exit) with
+TASK_MANAGER_FAST_DATES set to 0 (plain strptime) and to 1 (cached decoder).
+
+Usage: python benchmarks/bench_date_parsing.py [number of lines] [runs]
+"""
+
+# =====Importing Libraries=====
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+TASK_MANAGER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            os.pardir, "task_manager.py")
+
+
+def write_task_file(file_name, num_lines):
+    """
+    This function writes a task file with `num_lines` tasks, whose due and
+    assigned dates are drawn from a few thousand distinct days.
+    """
+    rng = random.Random(42)
+    first_day = date(2020, 1, 1)
+    days = [(first_day + timedelta(days=offset)).strftime("%Y-%m-%d")
+            for offset in range(3000)]
+
+    with open(file_name, "w", encoding="utf-8") as task_file:
+        for task_number in range(num_lines):
+            task_file.write(f"admin;Task {task_number};Benchmark task;"
+                            f"{rng.choice(days)};{rng.choice(days)};"
+                            f"{rng.choice(('Yes', 'No'))}\n")
+
+
+def time_startup(folder, fast_dates):
+    """
+    This function runs the task manager in `folder`, logs in, views the
+    first page of all tasks and exits, and returns the elapsed wall time in
+    seconds. The tasks are only loaded when something uses them, so viewing
+    them is what makes the run read tasks.txt.
+    """
+    env = dict(os.environ, TASK_MANAGER_FAST_DATES="1" if fast_dates else "0")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, TASK_MANAGER], cwd=folder, env=env,
+                   input="admin\npassword\nva\n-1\ne\n", text=True,
+                   stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    This function generates the task file and prints the best start-up time
+    of each date parsing mode.
+    """
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    with tempfile.TemporaryDirectory() as folder:
+        with open(os.path.join(folder, "user.txt"), "w",
+                  encoding="utf-8") as user_file:
+            user_file.write("admin;password")
+        write_task_file(os.path.join(folder, "tasks.txt"), num_lines)
+
+        print(f"Start-up time loading {num_lines} tasks (best of {runs} runs)")
+        results = {}
+        for fast_dates in (False, True):
+            label = "cached decoder" if fast_dates else "strptime"
+            results[label] = min(time_startup(folder, fast_dates)
+                                 for _ in range(runs))
+            print(f"{label:>15}: {results[label]:.2f} s")
+
+        print(f"{'speed-up':>15}: "
+              f"{results['strptime'] / results['cached decoder']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
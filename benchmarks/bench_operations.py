@@ -0,0 +1,219 @@
+"""
+This script benchmarks the main task manager operations on synthetic
+datasets of increasing size.
+For every scale it writes a dataset with generate_dataset.py, then runs
+each operation in a fresh process, recording its wall time. The peak
+memory Python allocates during the operation is measured with tracemalloc
+in one more run, as tracing slows the operation down. Results are printed
+as a table and written as JSON, and can be compared against the JSON from
+an earlier run.
+
+Settings such as TASK_MANAGER_STORE, TASK_MANAGER_SNAPSHOT or
+TASK_MANAGER_REPORT_WORKERS are passed on to the task manager, so they can
+be benchmarked too.
+
+Usage: python benchmarks/bench_operations.py [--scales 10K,100K,1M,10M]
+           [--runs N] [--output results.json] [--compare old_results.json]
+           [dataset options, see generate_dataset.py]
+"""
+
+# =====Importing Libraries=====
+import argparse
+import builtins
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from generate_dataset import add_dataset_arguments, generate_dataset, parse_scale
+
+REPO_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+# Operations that are timed. Start-up is the loading of users and tasks;
+# every other operation except those in COLD_OPERATIONS is timed after the
+# tasks have been loaded. view_mine is run for user0, who has the most tasks.
+# generate_reports is timed from a fresh start, as a session generating
+# reports straight after logging in would be.
+OPERATIONS = {
+    "startup": lambda task_manager: (task_manager.users.username_password,
+                                     task_manager.tasks.task_list),
+    "view_mine": lambda task_manager: task_manager.view_mine("user0"),
+    "gen_task_overview": lambda task_manager: task_manager.gen_task_overview(),
+    "gen_user_overview": lambda task_manager: task_manager.gen_user_overview(),
+    "generate_reports": lambda task_manager: task_manager.generate_reports(force=True),
+    "update_task_file": lambda task_manager: task_manager.update_task_file(),
+    "display_stats": lambda task_manager: task_manager.display_stats()
+}
+COLD_OPERATIONS = ("startup", "generate_reports")
+
+# A result this much slower than the baseline is marked as a regression
+REGRESSION_THRESHOLD = 1.1
+
+
+def run_worker(operation, folder, measure_memory):
+    """
+    This function is run in a separate process for each measurement. It
+    imports the task manager in the dataset folder, runs one operation with
+    its output discarded, and prints either its wall time or, if
+    `measure_memory` is True, the peak memory allocated while it ran, as
+    JSON. Memory is traced from after the tasks are loaded, so that it
+    covers only the operation.
+    """
+    os.chdir(folder)
+    sys.path.insert(0, REPO_FOLDER)
+    import task_manager
+
+    # view_mine asks which task to open; go straight back to the menu
+    builtins.input = lambda prompt="": "-1"
+
+    if operation not in COLD_OPERATIONS:
+        OPERATIONS["startup"](task_manager)
+
+    if measure_memory:
+        tracemalloc.start()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        OPERATIONS[operation](task_manager)
+        seconds = time.perf_counter() - start
+
+    if measure_memory:
+        result = {"peak_memory_kb": tracemalloc.get_traced_memory()[1] // 1024}
+    else:
+        result = {"seconds": seconds}
+    print(json.dumps(result))
+
+
+def measure(operation, folder, measure_memory=False):
+    """
+    This function runs one operation in a fresh process and returns its
+    wall time, or its peak memory if `measure_memory` is True.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--worker", operation, folder]
+    if measure_memory:
+        command.append("--memory")
+    completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    """
+    This function returns the commit the task manager is at, or "unknown".
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              cwd=REPO_FOLDER, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare_results(report, baseline_file):
+    """
+    This function prints how each result compares with the same scale and
+    operation in an earlier results file.
+    """
+    with open(baseline_file, "r", encoding="utf-8") as baseline:
+        baseline = json.load(baseline)
+    previous = {(result["tasks"], result["operation"]): result
+                for result in baseline["results"]}
+
+    print(f"\nCompared with {baseline_file} (commit {baseline.get('commit')})",
+          file=sys.stderr)
+    for key in ("dataset", "settings"):
+        if baseline.get(key) != report[key]:
+            print(f"Warning: the {key} differs from the baseline "
+                  f"({baseline.get(key)})", file=sys.stderr)
+
+    for result in report["results"]:
+        old = previous.get((result["tasks"], result["operation"]))
+        if old is None:
+            continue
+        ratio = result["best_seconds"] / old["best_seconds"]
+        flag = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"{result['scale']:>6} {result['operation']:<18} "
+              f"{old['best_seconds']:9.4f} s -> {result['best_seconds']:9.4f} s "
+              f"({ratio:.2f}x){flag}", file=sys.stderr)
+
+
+def main():
+    """
+    This function reads the command line options, runs the benchmarks and
+    writes the results.
+    """
+    if sys.argv[1:2] == ["--worker"]:
+        run_worker(sys.argv[2], sys.argv[3], sys.argv[4:] == ["--memory"])
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark task manager operations.")
+    parser.add_argument("--scales", default="10K,100K,1M",
+                        help="comma separated numbers of tasks (default 10K,100K,1M)")
+    parser.add_argument("--operations", default=",".join(OPERATIONS),
+                        help="comma separated operations to time (default all)")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="runs of each operation; the best time is kept (default 3)")
+    parser.add_argument("--output",
+                        help="file to write the JSON results to (default: standard output)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    operations = args.operations.split(",")
+    for operation in operations:
+        if operation not in OPERATIONS:
+            parser.error(f"unknown operation {operation}")
+
+    results = []
+    for scale in args.scales.split(","):
+        num_tasks = parse_scale(scale)
+        with tempfile.TemporaryDirectory() as folder:
+            generate_dataset(folder, num_tasks, args.users, args.skew,
+                             args.overdue, args.completed, args.seed)
+
+            for operation in operations:
+                times = [measure(operation, folder)["seconds"] for _ in range(args.runs)]
+                result = {
+                    "scale": scale,
+                    "tasks": num_tasks,
+                    "operation": operation,
+                    "best_seconds": min(times),
+                    "median_seconds": statistics.median(times),
+                    "peak_memory_kb": measure(operation, folder,
+                                              measure_memory=True)["peak_memory_kb"]
+                }
+                results.append(result)
+                print(f"{scale:>6} {operation:<18} {result['best_seconds']:9.4f} s "
+                      f"{result['peak_memory_kb']:>10} KB", file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {name: value for name, value in os.environ.items()
+                     if name.startswith("TASK_MANAGER_")},
+        "dataset": {"users": args.users, "skew": args.skew,
+                    "overdue": args.overdue, "completed": args.completed,
+                    "seed": args.seed},
+        "runs": args.runs,
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        compare_results(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
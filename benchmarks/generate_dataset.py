@@ -0,0 +1,134 @@
+"""
+This script writes a synthetic user.txt and tasks.txt for benchmarking the
+task manager.
+Tasks are shared out between users with a Zipf-like skew, so that a few
+users hold most of the tasks when the skew is high, and a set fraction of
+tasks is completed or overdue.
+
+Usage: python benchmarks/generate_dataset.py FOLDER [number of tasks]
+           [--users N] [--skew S] [--overdue R] [--completed R] [--seed N]
+"""
+
+# =====Importing Libraries=====
+import argparse
+import os
+import random
+from datetime import date, timedelta
+from itertools import accumulate
+
+# Number of tasks generated and written at a time
+CHUNK_SIZE = 100_000
+
+
+def parse_scale(scale):
+    """
+    This function converts a number of tasks such as "10K" or "1M" into
+    an integer.
+    """
+    multipliers = {"K": 1_000, "M": 1_000_000}
+    scale = scale.strip().upper()
+    if scale[-1:] in multipliers:
+        return int(float(scale[:-1]) * multipliers[scale[-1]])
+    return int(scale)
+
+
+def write_user_file(file_name, num_users):
+    """
+    This function writes a user file with the default admin account and
+    `num_users` further users named user0, user1, and so on.
+    """
+    with open(file_name, "w", encoding="utf-8") as user_file:
+        user_file.write("admin;password")
+        for user_number in range(num_users):
+            user_file.write(f"\nuser{user_number};password")
+
+
+def write_task_file(file_name, num_tasks, num_users, skew=1.0,
+                    overdue_ratio=0.2, completed_ratio=0.3, seed=42):
+    """
+    This function writes a task file with `num_tasks` tasks.
+    User number i receives tasks in proportion to 1 / (i + 1) ** skew, so a
+    skew of 0 shares them out evenly. A fraction `completed_ratio` of the
+    tasks is completed, a fraction `overdue_ratio` is uncompleted and due
+    before today, and the rest are uncompleted and due after today.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    past_days = [(today - timedelta(days=offset)).strftime("%Y-%m-%d")
+                 for offset in range(1, 366)]
+    future_days = [(today + timedelta(days=offset)).strftime("%Y-%m-%d")
+                   for offset in range(1, 366)]
+    all_days = past_days + future_days
+
+    usernames = [f"user{user_number}" for user_number in range(num_users)]
+    user_weights = list(accumulate(1 / (user_number + 1) ** skew
+                                   for user_number in range(num_users)))
+
+    with open(file_name, "w", encoding="utf-8") as task_file:
+        for chunk_start in range(0, num_tasks, CHUNK_SIZE):
+            chunk_size = min(CHUNK_SIZE, num_tasks - chunk_start)
+            owners = rng.choices(usernames, cum_weights=user_weights, k=chunk_size)
+            lines = []
+            for task_number, owner in enumerate(owners, chunk_start):
+                kind = rng.random()
+                if kind < completed_ratio:
+                    due_date, completed = rng.choice(all_days), "Yes"
+                elif kind < completed_ratio + overdue_ratio:
+                    due_date, completed = rng.choice(past_days), "No"
+                else:
+                    due_date, completed = rng.choice(future_days), "No"
+                lines.append(f"{owner};Task {task_number};Benchmark task;"
+                             f"{due_date};{rng.choice(past_days)};{completed}\n")
+            task_file.write("".join(lines))
+
+
+def generate_dataset(folder, num_tasks, num_users=100, skew=1.0,
+                     overdue_ratio=0.2, completed_ratio=0.3, seed=42):
+    """
+    This function writes user.txt and tasks.txt into `folder`.
+    """
+    if overdue_ratio + completed_ratio > 1:
+        raise ValueError("the overdue and completed ratios add up to more than 1")
+
+    os.makedirs(folder, exist_ok=True)
+    write_user_file(os.path.join(folder, "user.txt"), num_users)
+    write_task_file(os.path.join(folder, "tasks.txt"), num_tasks, num_users,
+                    skew, overdue_ratio, completed_ratio, seed)
+
+
+def add_dataset_arguments(parser):
+    """
+    This function adds the options describing a dataset to an argument
+    parser, so the benchmark script accepts the same options.
+    """
+    parser.add_argument("--users", type=int, default=100,
+                        help="number of users besides admin (default 100)")
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="Zipf exponent of tasks per user; 0 is even (default 1.0)")
+    parser.add_argument("--overdue", type=float, default=0.2,
+                        help="fraction of tasks that are overdue (default 0.2)")
+    parser.add_argument("--completed", type=float, default=0.3,
+                        help="fraction of tasks that are completed (default 0.3)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="random seed (default 42)")
+
+
+def main():
+    """
+    This function reads the command line options and writes the dataset.
+    """
+    parser = argparse.ArgumentParser(description="Write a synthetic task manager dataset.")
+    parser.add_argument("folder", help="folder to write user.txt and tasks.txt into")
+    parser.add_argument("tasks", nargs="?", default="100K",
+                        help="number of tasks, e.g. 10K, 1M (default 100K)")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    num_tasks = parse_scale(args.tasks)
+    generate_dataset(args.folder, num_tasks, args.users, args.skew,
+                     args.overdue, args.completed, args.seed)
+    print(f"Wrote {num_tasks} tasks for {args.users + 1} users to {args.folder}")
+
+
+if __name__ == "__main__":
+    main()
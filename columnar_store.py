@@ -0,0 +1,219 @@
+"""
+This module provides a columnar task store for the task manager, backed by
+NumPy arrays. It is an optional alternative to the list of task dictionaries
+and uses far less memory per task.
+"""
+
+# =====Importing Libraries=====
+from datetime import datetime
+
+import numpy as np
+
+
+class ColumnarTaskList:
+    """
+    This class stores tasks column by column.
+    Usernames are stored as integer codes, due and assigned dates as day
+    ordinals, completion as a boolean array, and titles and descriptions
+    in one text buffer indexed by offsets.
+    It behaves like a list of task dictionaries: indexing returns a
+    `TaskRow` which exposes the usual task fields.
+    """
+
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._user_names = []
+        self._user_codes = {}
+        self._users = np.zeros(capacity, dtype=np.int32)
+        self._due = np.zeros(capacity, dtype=np.int64)
+        self._assigned = np.zeros(capacity, dtype=np.int64)
+        self._completed = np.zeros(capacity, dtype=np.bool_)
+
+        # Text field j (2i for the title of task i, 2i + 1 for its
+        # description) is stored at _text[_text_start[j]:_text_end[j]]
+        self._text = bytearray()
+        self._text_start = np.zeros(2 * capacity, dtype=np.int64)
+        self._text_end = np.zeros(2 * capacity, dtype=np.int64)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, task_id):
+        task_id = int(task_id)
+        if task_id < 0:
+            task_id += self._size
+        if not 0 <= task_id < self._size:
+            raise IndexError("task ID out of range")
+        return TaskRow(self, task_id)
+
+    def __iter__(self):
+        for task_id in range(self._size):
+            yield TaskRow(self, task_id)
+
+    def append(self, task):
+        """
+        This method adds a task, given as a task dictionary, to the store.
+        """
+        if self._size == len(self._users):
+            self._grow()
+
+        task_id = self._size
+        self._users[task_id] = self.user_code(task["Username"])
+        self._due[task_id] = task["Due date"].toordinal()
+        self._assigned[task_id] = task["Assigned date"].toordinal()
+        self._completed[task_id] = task["completed"]
+
+        self._set_text(2 * task_id, task["Task title"])
+        self._set_text(2 * task_id + 1, task["Task description"])
+        self._size += 1
+
+    def user_code(self, username):
+        """
+        This method returns the integer code of a username, assigning a new
+        code the first time a username is seen.
+        """
+        code = self._user_codes.get(username)
+        if code is None:
+            code = len(self._user_names)
+            self._user_codes[username] = code
+            self._user_names.append(username)
+        return code
+
+    def user_counts(self, today_ordinal):
+        """
+        This method returns a dictionary mapping each username to a tuple of
+        its completed, uncompleted and overdue task counts.
+        Uncompleted tasks due on or before `today_ordinal` are overdue.
+        """
+        users = self._users[:self._size]
+        completed = self._completed[:self._size]
+        overdue = ~completed & (self._due[:self._size] <= today_ordinal)
+
+        num_users = len(self._user_names)
+        totals = np.bincount(users, minlength=num_users)
+        completed_counts = np.bincount(users[completed], minlength=num_users)
+        overdue_counts = np.bincount(users[overdue], minlength=num_users)
+
+        return {
+            username: (int(completed_counts[code]),
+                       int(totals[code] - completed_counts[code]),
+                       int(overdue_counts[code]))
+            for code, username in enumerate(self._user_names)
+            if totals[code]
+        }
+
+    def open_task_dates(self):
+        """
+        This method returns a dictionary mapping the day ordinal of each
+        date that uncompleted tasks were assigned on to the number of them.
+        """
+        assigned = self._assigned[:self._size][~self._completed[:self._size]]
+        ordinals, counts = np.unique(assigned, return_counts=True)
+        return dict(zip(ordinals.tolist(), counts.tolist()))
+
+    def due_task_ids(self, first_ordinal, last_ordinal, username=None):
+        """
+        This method returns the IDs of the uncompleted tasks due between two
+        day ordinals, inclusive, in order of due date. If `username` is
+        given, only their tasks are included.
+        """
+        due = self._due[:self._size]
+        selected = ~self._completed[:self._size] & \
+            (due >= first_ordinal) & (due <= last_ordinal)
+        if username is not None:
+            if username not in self._user_codes:
+                return []
+            selected &= self._users[:self._size] == self._user_codes[username]
+
+        task_ids = np.flatnonzero(selected)
+        return task_ids[np.argsort(due[task_ids], kind="stable")].tolist()
+
+    def _grow(self):
+        """
+        This method doubles the capacity of every column.
+        """
+        capacity = 2 * len(self._users)
+        self._users = np.resize(self._users, capacity)
+        self._due = np.resize(self._due, capacity)
+        self._assigned = np.resize(self._assigned, capacity)
+        self._completed = np.resize(self._completed, capacity)
+        self._text_start = np.resize(self._text_start, 2 * capacity)
+        self._text_end = np.resize(self._text_end, 2 * capacity)
+
+    def _get_text(self, index):
+        return self._text[self._text_start[index]:
+                          self._text_end[index]].decode("utf-8")
+
+    def _set_text(self, index, value):
+        # Text is only ever appended to the buffer; an old value that is
+        # replaced is left in place and simply no longer referenced
+        value = value.encode("utf-8")
+        self._text_start[index] = len(self._text)
+        self._text += value
+        self._text_end[index] = len(self._text)
+
+
+class TaskRow:
+    """
+    This class is a view of a single task in a `ColumnarTaskList`.
+    It can be read and updated like a task dictionary.
+    """
+
+    FIELDS = ("Username", "Task title", "Task description", "Due date",
+              "Assigned date", "completed")
+
+    def __init__(self, store, task_id):
+        self._store = store
+        self._task_id = task_id
+
+    def __getitem__(self, field):
+        store, task_id = self._store, self._task_id
+        if field == "Username":
+            return store._user_names[store._users[task_id]]
+        if field == "Task title":
+            return store._get_text(2 * task_id)
+        if field == "Task description":
+            return store._get_text(2 * task_id + 1)
+        if field == "Due date":
+            return datetime.fromordinal(int(store._due[task_id]))
+        if field == "Assigned date":
+            return datetime.fromordinal(int(store._assigned[task_id]))
+        if field == "completed":
+            return bool(store._completed[task_id])
+        raise KeyError(field)
+
+    def __setitem__(self, field, value):
+        store, task_id = self._store, self._task_id
+        if field == "Username":
+            store._users[task_id] = store.user_code(value)
+        elif field == "Task title":
+            store._set_text(2 * task_id, value)
+        elif field == "Task description":
+            store._set_text(2 * task_id + 1, value)
+        elif field == "Due date":
+            store._due[task_id] = value.toordinal()
+        elif field == "Assigned date":
+            store._assigned[task_id] = value.toordinal()
+        elif field == "completed":
+            store._completed[task_id] = value
+        else:
+            raise KeyError(field)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def keys(self):
+        """
+        This method returns the task field names, like `dict.keys`.
+        """
+        return self.FIELDS
+
+    def get(self, field, default=None):
+        """
+        This method returns a task field, or `default` if there is no
+        such field, like `dict.get`.
+        """
+        try:
+            return self[field]
+        except KeyError:
+            return default
@@ -0,0 +1,569 @@
+"""
+This module provides a sharded storage backend for the task manager, which
+splits the tasks between shard files by a hash of the username, so that a
+user's tasks can be read and saved without everyone else's. Users are kept
+in user.txt as with the default text storage.
+
+It is imported by task_manager.py when TASK_MANAGER_STORAGE=sharded, and
+takes its settings (SHARD_FOLDER, SHARD_MANIFEST, SHARD_COUNT and
+REPORT_WORKERS) from there.
+"""
+
+# =====Importing Libraries=====
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from task_manager import (REPORT_WORKERS, SHARD_COUNT, SHARD_FOLDER,
+                          SHARD_MANIFEST, TextStorage, add_record, colors,
+                          count_report_task, count_shard_file, create_taskfile,
+                          instruments, parse_task, stream_tasks)
+
+
+class ShardedStorage(TextStorage):
+    """
+    This class stores tasks in SHARD_FOLDER, split between shard files by a
+    hash of the username, and users in user.txt as TextStorage does. A
+    shard is only read when one of its tasks is needed, so viewing a user's
+    tasks reads just their shard, and saving a change rewrites only the
+    shards it touched: one, or two when a task is reassigned to a user in
+    another shard. Reports are counted shard by shard.
+
+    Each save writes the changed shards to new files and then replaces
+    SHARD_MANIFEST, which lists the current file of each shard and the
+    number of tasks, so an interrupted save leaves the previous shards in
+    use. If another session has saved since this one last read the
+    manifest, a session with no unsaved changes reloads its tasks when it
+    next reads a shard, so shards from different saves are never mixed.
+    As with TextStorage, a session saving changes reloads the tasks and
+    applies its changes again first.
+    """
+
+    # Per-user task lists and reports are worked out from the shards
+    queries_in_storage = True
+
+    def __init__(self):
+        super().__init__()
+        self.manifest = None
+
+        # Whether each thread holds the lock, as reading a shard takes it
+        # and may happen while saving
+        self.lock_state = threading.local()
+
+    @contextmanager
+    def locked(self, shared=False):
+        """
+        This method holds the lock as `TextStorage.locked` does, except
+        that a thread already holding it carries on without taking it again.
+        """
+        if getattr(self.lock_state, "held", False):
+            yield
+            return
+
+        with super().locked(shared):
+            self.lock_state.held = True
+            try:
+                yield
+            finally:
+                self.lock_state.held = False
+
+    def read_disk_state(self):
+        """
+        This method returns the size, modification time and inode of the
+        manifest, which is replaced whenever tasks are saved.
+        """
+        manifest_stat = os.stat(SHARD_MANIFEST)
+        return [manifest_stat.st_size, manifest_stat.st_mtime_ns, manifest_stat.st_ino]
+
+    def create_task_list(self):
+        """
+        This method returns the task list, which reads each shard when it
+        is first needed. If there are no shards yet, they are first made
+        from tasks.txt and its journal.
+        """
+        if not os.path.exists(SHARD_MANIFEST):
+            with self.locked():
+                if not os.path.exists(SHARD_MANIFEST):
+                    try:
+                        split_task_file(SHARD_COUNT)
+                    except ValueError as load_error:
+                        print(f"\n{colors.red}{load_error}{colors.reset}")
+                        raise SystemExit(1) from load_error
+
+        # The manifest is read after its state, so that a save made in
+        # between is taken as a change by the next save
+        self.disk_state = self.read_disk_state()
+        self.manifest = read_manifest()
+        return ShardedTaskList(self)
+
+    def load_tasks(self, task_store):
+        """
+        This method only records the task store, as shards are read when
+        they are first needed.
+        """
+        self.task_store = task_store
+
+    def refresh(self):
+        """
+        This method starts a new task list if another session has saved
+        tasks, returning True if it did. It must be called while holding
+        the lock.
+        """
+        if self.read_disk_state() == self.disk_state:
+            return False
+
+        self.task_store.reset()
+        return True
+
+    def read_new_manifest(self):
+        """
+        This method reads the manifest again if another session has saved
+        tasks since it was last read, returning True if it did. It must be
+        called while holding the lock.
+        """
+        disk_state = self.read_disk_state()
+        if disk_state == self.disk_state:
+            return False
+
+        self.disk_state = disk_state
+        self.manifest = read_manifest()
+        return True
+
+    def shard_path(self, shard_number):
+        """
+        This method returns the path of a shard's file in the manifest the
+        tasks were read from. Tasks with unsaved changes are not reloaded,
+        so if another session has since replaced the file, the file in the
+        current manifest is used instead; saving the changes then reloads
+        the tasks and applies the changes again.
+        """
+        shard_path = os.path.join(SHARD_FOLDER, self.manifest["shards"][shard_number])
+        if not os.path.exists(shard_path):
+            shard_path = os.path.join(SHARD_FOLDER, read_manifest()["shards"][shard_number])
+        return shard_path
+
+    def get_user_task_ids(self, username):
+        """
+        This method returns the IDs of the tasks assigned to a user, reading
+        only their shard.
+        """
+        return self.task_store.task_list.user_task_ids(username)
+
+    def report_counts(self, now):
+        """
+        This method returns a dictionary mapping each user with tasks to a
+        tuple of their completed, uncompleted and overdue task counts.
+        Uncompleted tasks due on or before the date of `now` are overdue.
+        """
+        return self.task_store.task_list.user_counts(now.toordinal())
+
+    def due_task_ids(self, first_ordinal, last_ordinal, username=None):
+        """
+        This method returns the IDs of the uncompleted tasks due between two
+        day ordinals, inclusive, in order of due date. If `username` is
+        given, only their tasks are included and only their shard is read.
+        """
+        return self.task_store.task_list.due_task_ids(first_ordinal, last_ordinal, username)
+
+    def open_task_dates(self):
+        """
+        This method returns a dictionary mapping the day ordinal of each
+        date that uncompleted tasks were assigned on to the number of them.
+        """
+        return self.task_store.task_list.open_task_dates()
+
+    def save_task_changes(self, records):
+        """
+        This method saves a list of task changes, writing only the shards
+        they changed. If another session has saved tasks since, the tasks
+        are reloaded and the changes are applied again first, so that task
+        IDs match what is on disk.
+        """
+        with self.locked():
+            # The tasks the batch adds are the last ones in memory
+            first_added_id = len(self.task_store.task_list) - \
+                sum(record[0] == "add" for record in records)
+            if self.refresh():
+                self.task_store.apply_changes(records, first_added_id)
+            self.write_shards()
+
+    def write_shards(self):
+        """
+        This method writes each changed shard to a new file, replaces the
+        manifest and then removes the files the changed shards were in. It
+        must be called while holding the lock.
+        """
+        start = time.perf_counter()
+        task_list = self.task_store.task_list
+        generation = self.manifest["generation"] + 1
+        shard_files = list(self.manifest["shards"])
+        for shard_number in sorted(task_list.changed_shards):
+            shard_files[shard_number] = shard_file_name(shard_number, generation)
+            write_shard_file(shard_files[shard_number], task_list.shards[shard_number])
+
+        manifest = {"generation": generation, "tasks": len(task_list), "shards": shard_files}
+        write_manifest(manifest)
+        for shard_number in task_list.changed_shards:
+            os.remove(os.path.join(SHARD_FOLDER, self.manifest["shards"][shard_number]))
+
+        task_list.changed_shards.clear()
+        self.manifest = manifest
+        self.disk_state = self.read_disk_state()
+        instruments.record_time("write shards", time.perf_counter() - start)
+
+    def compact(self):
+        """
+        This method removes any files in SHARD_FOLDER that are not in the
+        manifest, such as those left behind by an interrupted save.
+        """
+        with self.locked():
+            files_in_use = set(read_manifest()["shards"])
+            files_in_use.add(os.path.basename(SHARD_MANIFEST))
+            for file_name in os.listdir(SHARD_FOLDER):
+                if file_name not in files_in_use:
+                    os.remove(os.path.join(SHARD_FOLDER, file_name))
+
+
+class ShardedTaskList:
+    """
+    This class is a list-like view of the tasks in the shards of a
+    `ShardedStorage`. Each shard is read the first time one of its tasks is
+    needed and then kept, as a dictionary mapping task IDs to
+    `ShardedTaskRow`s. The shards changed since they were last saved are
+    recorded in `changed_shards`.
+
+    If another session has saved tasks when a shard is read, and there are
+    no unsaved changes, the list is reloaded in place from the new manifest
+    and `reloads` is counted up, so that methods reading several shards
+    can start again rather than mix shards from different saves.
+    """
+
+    def __init__(self, storage):
+        self._storage = storage
+        self._num_tasks = storage.manifest["tasks"]
+        self.shards = [None] * len(storage.manifest["shards"])
+        self.changed_shards = set()
+        self.reloads = 0
+
+    def __len__(self):
+        return self._num_tasks
+
+    def __getitem__(self, task_id):
+        if task_id < 0:
+            task_id += self._num_tasks
+        if not 0 <= task_id < self._num_tasks:
+            raise IndexError("task ID out of range")
+
+        reloads = self.reloads
+        task = self.find_task(task_id)
+        while task is None and self.reloads != reloads:
+            reloads = self.reloads
+            task = self.find_task(task_id)
+        if task is None:
+            raise IndexError(f"task {task_id} is missing from the shards")
+        return task
+
+    def __iter__(self):
+        while True:
+            reloads = self.reloads
+            all_tasks = {}
+            for shard_number in range(len(self.shards)):
+                all_tasks.update(self.shard(shard_number))
+            if self.reloads == reloads:
+                break
+
+        for task_id in range(self._num_tasks):
+            yield all_tasks[task_id]
+
+    def find_task(self, task_id):
+        """
+        This method returns a task, looking in the shards already read
+        before reading any others. It returns None if the task is not found,
+        or if the list is reloaded while looking for it.
+        """
+        unread_shards = []
+        for shard_number, shard in enumerate(self.shards):
+            if shard is None:
+                unread_shards.append(shard_number)
+            elif task_id in shard:
+                return shard[task_id]
+
+        reloads = self.reloads
+        for shard_number in unread_shards:
+            shard = self.shard(shard_number)
+            if self.reloads != reloads:
+                return None
+            if task_id in shard:
+                return shard[task_id]
+        return None
+
+    def append(self, task: dict):
+        # Reading the shard may reload the list, so the new task's ID is
+        # only taken after it
+        shard_number = self.shard_number(task["Username"])
+        shard = self.shard(shard_number)
+        task_id = self._num_tasks
+        shard[task_id] = ShardedTaskRow(self, task_id, task)
+        self._num_tasks += 1
+        self.changed_shards.add(shard_number)
+
+    def shard_number(self, username):
+        """
+        This method returns the number of the shard holding a user's tasks.
+        """
+        return get_shard_number(username, len(self.shards))
+
+    def shard(self, shard_number):
+        """
+        This method returns the tasks in a shard, reading it under a shared
+        lock if it has not been read yet.
+        """
+        if self.shards[shard_number] is None:
+            with self._storage.locked(shared=True):
+                self.reload_if_saved()
+                self.shards[shard_number] = {
+                    task_id: ShardedTaskRow(self, task_id, task)
+                    for task_id, task in read_shard_file(self._storage.shard_path(shard_number))
+                }
+        return self.shards[shard_number]
+
+    def reload_if_saved(self):
+        """
+        This method reloads the list in place if another session has saved
+        tasks since the manifest was read, unless there are unsaved changes,
+        which are reloaded when they are saved. It must be called while
+        holding the lock.
+        """
+        if self.changed_shards or not self._storage.read_new_manifest():
+            return
+
+        self._num_tasks = self._storage.manifest["tasks"]
+        self.shards = [None] * len(self._storage.manifest["shards"])
+        self.reloads += 1
+        self._storage.task_store.clear_indexes()
+
+    def task_changed(self, task, old_username):
+        """
+        This method records that a task has changed, moving it to another
+        shard if it has been reassigned to a user in another shard.
+        """
+        old_shard = self.shard_number(old_username)
+        new_shard = self.shard_number(task["Username"])
+        self.changed_shards.add(old_shard)
+        if new_shard != old_shard:
+            del self.shard(old_shard)[task.task_id]
+            self.shard(new_shard)[task.task_id] = task
+            self.changed_shards.add(new_shard)
+
+    def user_task_ids(self, username):
+        """
+        This method returns the IDs of the tasks assigned to a user.
+        """
+        shard = self.shard(self.shard_number(username))
+        return sorted(task_id for task_id, task in shard.items()
+                      if task["Username"] == username)
+
+    def due_task_ids(self, first_ordinal, last_ordinal, username=None):
+        """
+        This method returns the IDs of the uncompleted tasks due between two
+        day ordinals, inclusive, in order of due date, for one user or for
+        everyone.
+        """
+        if username is None:
+            shard_numbers = range(len(self.shards))
+        else:
+            shard_numbers = [self.shard_number(username)]
+
+        while True:
+            reloads = self.reloads
+            due_tasks = []
+            for shard_number in shard_numbers:
+                for task_id, task in self.shard(shard_number).items():
+                    due_ordinal = task["Due date"].toordinal()
+                    if not task["completed"] and \
+                            first_ordinal <= due_ordinal <= last_ordinal and \
+                            (username is None or task["Username"] == username):
+                        due_tasks.append((due_ordinal, task_id))
+            if self.reloads == reloads:
+                break
+        due_tasks.sort()
+        return [task_id for _, task_id in due_tasks]
+
+    def user_counts(self, now_ordinal):
+        """
+        This method returns the completed, uncompleted and overdue task
+        counts of each user. Shards already read are counted in memory and
+        the others straight from their files, by REPORT_WORKERS worker
+        processes if there is more than one. Each user's tasks are all in
+        one shard, so the counts of each shard need no adding up.
+        """
+        with self._storage.locked(shared=True):
+            self.reload_if_saved()
+            user_counts = {}
+            unread_shards = []
+            for shard_number, shard in enumerate(self.shards):
+                if shard is None:
+                    unread_shards.append(shard_number)
+                else:
+                    for task in shard.values():
+                        count_report_task(user_counts, task, now_ordinal)
+
+            shard_paths = [self._storage.shard_path(shard_number)
+                           for shard_number in unread_shards]
+            if REPORT_WORKERS > 1 and len(shard_paths) > 1:
+                with ProcessPoolExecutor(max_workers=REPORT_WORKERS) as executor:
+                    shard_counts = list(executor.map(count_shard_file, shard_paths,
+                                                     [now_ordinal] * len(shard_paths)))
+            else:
+                shard_counts = [count_shard_file(shard_path, now_ordinal)
+                                for shard_path in shard_paths]
+
+        for counts in shard_counts:
+            user_counts.update(counts)
+        return {user: tuple(counts) for user, counts in user_counts.items()}
+
+    def open_task_dates(self):
+        """
+        This method returns a dictionary mapping the day ordinal of each
+        date that uncompleted tasks were assigned on to the number of them.
+        Shards already read are counted in memory and the others straight
+        from their files.
+        """
+        open_task_dates = {}
+        with self._storage.locked(shared=True):
+            self.reload_if_saved()
+            for shard_number, shard in enumerate(self.shards):
+                if shard is None:
+                    shard_path = self._storage.shard_path(shard_number)
+                    shard_tasks = (task for _, task in read_shard_file(shard_path))
+                else:
+                    shard_tasks = shard.values()
+
+                for task in shard_tasks:
+                    if not task["completed"]:
+                        assigned_ordinal = task["Assigned date"].toordinal()
+                        open_task_dates[assigned_ordinal] = \
+                            open_task_dates.get(assigned_ordinal, 0) + 1
+        return open_task_dates
+
+
+class ShardedTaskRow(dict):
+    """
+    This class is a task dictionary held in a shard. Setting a field records
+    the change with the task list, which moves the task to another shard if
+    its user has changed.
+    """
+
+    def __init__(self, task_list, task_id, task: dict):
+        super().__init__(task)
+        self._task_list = task_list
+        self.task_id = task_id
+
+    def __setitem__(self, field, value):
+        old_username = self["Username"]
+        super().__setitem__(field, value)
+        self._task_list.task_changed(self, old_username)
+
+
+def get_shard_number(username, num_shards):
+    """
+    This function returns the number of the shard holding a user's tasks,
+    from a hash of the username that is the same in every session.
+    """
+    return zlib.crc32(username.encode("utf-8")) % num_shards
+
+
+def shard_file_name(shard_number, generation):
+    """
+    This function returns the name of the file a shard is written to when
+    the manifest reaches `generation`.
+    """
+    return f"shard_{shard_number:03d}.{generation}.txt"
+
+
+def read_manifest():
+    """
+    This function reads the shard manifest.
+    """
+    with open(SHARD_MANIFEST, "r", encoding="utf-8") as manifest_file:
+        return json.load(manifest_file)
+
+
+def write_manifest(manifest):
+    """
+    This function replaces the shard manifest atomically, so that sessions
+    see either the old shards or the new ones.
+    """
+    temp_file_name = f"{SHARD_MANIFEST}.{os.getpid()}.tmp"
+    with open(temp_file_name, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file)
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(temp_file_name, SHARD_MANIFEST)
+
+
+def shard_line(task_id, task: dict):
+    """
+    This function returns the line a task is stored as in a shard file: its
+    ID followed by its fields as in tasks.txt.
+    """
+    return f"{task_id};" + ";".join(add_record(task)[1:]) + "\n"
+
+
+def read_shard_file(file_name):
+    """
+    This generator reads a shard file one line at a time, yielding the ID
+    and dictionary of each task.
+    """
+    with open(file_name, "r", encoding="utf-8") as shard_file:
+        for line in shard_file:
+            task_id, _, task_line = line.rstrip("\n").partition(";")
+            if task_line:
+                yield int(task_id), parse_task(task_line.split(";"))
+        instruments.count_bytes("read", file_name, os.fstat(shard_file.fileno()).st_size)
+
+
+def write_shard_file(file_name, shard):
+    """
+    This function writes the tasks in a shard to a new file in
+    SHARD_FOLDER, in order of ID.
+    """
+    shard_path = os.path.join(SHARD_FOLDER, file_name)
+    with open(shard_path, "w", encoding="utf-8") as shard_file:
+        shard_file.write("".join(shard_line(task_id, shard[task_id])
+                                 for task_id in sorted(shard)))
+        shard_file.flush()
+        os.fsync(shard_file.fileno())
+        instruments.count_bytes("written", shard_path, shard_file.tell())
+
+
+def split_task_file(num_shards):
+    """
+    This function makes the first shards, splitting the tasks in tasks.txt,
+    with any changes recorded in its journal, between `num_shards` shard
+    files by user, and writes the manifest. It must be called while holding
+    the lock.
+    """
+    create_taskfile()
+    os.makedirs(SHARD_FOLDER, exist_ok=True)
+    shard_files = [shard_file_name(shard_number, 1) for shard_number in range(num_shards)]
+
+    num_tasks = 0
+    with ExitStack() as stack:
+        outputs = [stack.enter_context(open(os.path.join(SHARD_FOLDER, file_name), "w",
+                                            encoding="utf-8"))
+                   for file_name in shard_files]
+        for task in stream_tasks():
+            outputs[get_shard_number(task["Username"], num_shards)].write(
+                shard_line(num_tasks, task))
+            num_tasks += 1
+
+        for output in outputs:
+            output.flush()
+            os.fsync(output.fileno())
+
+    write_manifest({"generation": 1, "tasks": num_tasks, "shards": shard_files})
@@ -0,0 +1,306 @@
+"""
+This module provides an SQLite storage backend for the task manager, as an
+alternative to keeping tasks in tasks.txt and users in user.txt.
+Changes are written to the database one row at a time, and per-user task
+lists and report counts are answered with indexed queries.
+"""
+
+# =====Importing Libraries=====
+import sqlite3
+from datetime import date, datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    assigned_date TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tasks_by_username ON tasks (username, completed);
+CREATE INDEX IF NOT EXISTS tasks_by_due_date ON tasks (completed, due_date);
+CREATE TABLE IF NOT EXISTS data_version (
+    version INTEGER NOT NULL
+);
+INSERT INTO data_version SELECT 0 WHERE NOT EXISTS (SELECT * FROM data_version);
+"""
+
+BUMP_DATA_VERSION = "UPDATE data_version SET version = version + 1"
+
+# Task dictionary fields and the database columns holding them
+COLUMNS = {
+    "Username": "username",
+    "Task title": "title",
+    "Task description": "description",
+    "Due date": "due_date",
+    "Assigned date": "assigned_date",
+    "completed": "completed"
+}
+
+SELECT_TASKS = ("SELECT id, username, title, description, due_date, "
+                "assigned_date, completed FROM tasks")
+
+
+def to_column(field, value):
+    """
+    This function converts a task field into the value stored in the
+    database. Dates are stored as YYYY-MM-DD text, so they sort in order.
+    """
+    if field in ("Due date", "Assigned date"):
+        return value.strftime("%Y-%m-%d")
+    if field == "completed":
+        return 1 if value else 0
+    return value
+
+
+class SQLiteStorage:
+    """
+    This class stores tasks and users in an SQLite database.
+    The database uses write-ahead logging, and tasks are indexed by
+    username, completion and due date.
+    """
+
+    # Per-user task lists and reports are answered by database queries
+    queries_in_storage = True
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self._connection = None
+
+    @property
+    def connection(self):
+        """
+        The connection to the database, opened on first use, so that the
+        database is only created once it is needed.
+        """
+        if self._connection is None:
+            # The connection may be used by a background thread saving changes
+            connection = sqlite3.connect(self.file_name, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def data_version(self):
+        """
+        This method returns a list identifying the data in the database.
+        It holds a counter which every change adds one to as it is
+        committed.
+        """
+        version, = self.connection.execute(
+            "SELECT version FROM data_version").fetchone()
+        return ["sqlite", version]
+
+    def create_task_list(self):
+        """
+        This method returns the task list, which reads tasks from the
+        database as they are needed.
+        """
+        return SQLiteTaskList(self.connection)
+
+    def load_tasks(self, task_store):
+        """
+        This method does nothing, as tasks stay in the database until
+        they are needed.
+        """
+
+    def load_users(self):
+        """
+        This method returns a dictionary of usernames and passwords,
+        adding the default admin account if there are no users yet.
+        """
+        users = dict(self.connection.execute(
+            "SELECT username, password FROM users ORDER BY rowid"))
+        if not users:
+            users["admin"] = "password"
+            self.add_users(users)
+        return users
+
+    def add_users(self, new_users):
+        """
+        This method adds a dictionary of new usernames and passwords to the
+        database in one transaction, and returns every user now in it.
+        A username that another session has registered in the meantime
+        raises a ValueError and nothing is added.
+        """
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO users (username, password) VALUES (?, ?)",
+                    new_users.items())
+                self.connection.execute(BUMP_DATA_VERSION)
+        except sqlite3.IntegrityError:
+            for username in new_users:
+                if self.connection.execute("SELECT 1 FROM users WHERE username = ?",
+                                           (username,)).fetchone():
+                    raise ValueError(f"{username} is already in use!") from None
+            raise
+        return self.load_users()
+
+    def save_task_change(self, record):
+        """
+        This method commits a task change. The task list and its rows have
+        already written the change to the database, so only the commit is
+        left to do.
+        """
+        self.save_task_changes([record])
+
+    def save_task_changes(self, records):
+        """
+        This method commits a list of task changes in one transaction.
+        """
+        self.connection.execute(BUMP_DATA_VERSION)
+        self.connection.commit()
+
+    def compact(self):
+        """
+        This method folds the write-ahead log back into the database file.
+        """
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def get_user_task_ids(self, username):
+        """
+        This method returns the IDs of the tasks assigned to a user.
+        """
+        return [task_id for task_id, in self.connection.execute(
+            "SELECT id FROM tasks WHERE username = ? ORDER BY id",
+            (username,))]
+
+    def report_counts(self, now):
+        """
+        This method returns a dictionary mapping each user with tasks to a
+        tuple of their completed, uncompleted and overdue task counts.
+        Uncompleted tasks due on or before the date of `now` are overdue.
+        """
+        counts = {
+            username: [completed, total - completed, 0]
+            for username, completed, total in self.connection.execute(
+                "SELECT username, SUM(completed), COUNT(*) FROM tasks "
+                "GROUP BY username")
+        }
+        for username, overdue in self.connection.execute(
+                "SELECT username, COUNT(*) FROM tasks "
+                "WHERE completed = 0 AND due_date <= ? GROUP BY username",
+                (now.strftime("%Y-%m-%d"),)):
+            counts[username][2] = overdue
+        return {username: tuple(user_counts)
+                for username, user_counts in counts.items()}
+
+    def open_task_dates(self):
+        """
+        This method returns a dictionary mapping the day ordinal of each
+        date that uncompleted tasks were assigned on to the number of them.
+        """
+        return {datetime.fromisoformat(assigned_date).toordinal(): count
+                for assigned_date, count in self.connection.execute(
+                    "SELECT assigned_date, COUNT(*) FROM tasks "
+                    "WHERE completed = 0 GROUP BY assigned_date")}
+
+    def due_task_ids(self, first_ordinal, last_ordinal, username=None):
+        """
+        This method returns the IDs of the uncompleted tasks due between two
+        day ordinals, inclusive, in order of due date. If `username` is
+        given, only their tasks are included.
+        """
+        query = ("SELECT id FROM tasks WHERE completed = 0 "
+                 "AND due_date BETWEEN ? AND ?")
+        parameters = [date.fromordinal(first_ordinal).isoformat(),
+                      date.fromordinal(last_ordinal).isoformat()]
+        if username is not None:
+            query += " AND username = ?"
+            parameters.append(username)
+        return [task_id for task_id, in self.connection.execute(
+            query + " ORDER BY due_date, id", parameters)]
+
+    def import_data(self, tasks, users):
+        """
+        This method replaces everything in the database with the given
+        tasks and users, in a single transaction.
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.execute("DELETE FROM users")
+            self.connection.execute(BUMP_DATA_VERSION)
+            self.connection.executemany(
+                "INSERT INTO users (username, password) VALUES (?, ?)",
+                users.items())
+            self.connection.executemany(
+                "INSERT INTO tasks (id, username, title, description, "
+                "due_date, assigned_date, completed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((task_id,) + tuple(to_column(field, task[field])
+                                    for field in COLUMNS)
+                 for task_id, task in enumerate(tasks)))
+
+
+class SQLiteTaskList:
+    """
+    This class is a list-like view of the tasks table.
+    Task IDs are the row IDs, counted from 0 in the order tasks were added.
+    Indexing returns an `SQLiteTaskRow`, and appending inserts a new row.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __len__(self):
+        next_id, = self._connection.execute(
+            "SELECT COALESCE(MAX(id) + 1, 0) FROM tasks").fetchone()
+        return next_id
+
+    def __getitem__(self, task_id):
+        row = self._connection.execute(SELECT_TASKS + " WHERE id = ?",
+                                       (int(task_id),)).fetchone()
+        if row is None:
+            raise IndexError("task ID out of range")
+        return SQLiteTaskRow(self._connection, row)
+
+    def __iter__(self):
+        for row in self._connection.execute(SELECT_TASKS + " ORDER BY id"):
+            yield SQLiteTaskRow(self._connection, row)
+
+    def append(self, task):
+        """
+        This method inserts a task, given as a task dictionary, into the
+        tasks table with the next task ID.
+        """
+        self._connection.execute(
+            "INSERT INTO tasks (id, username, title, description, due_date, "
+            "assigned_date, completed) "
+            "VALUES ((SELECT COALESCE(MAX(id) + 1, 0) FROM tasks), "
+            "?, ?, ?, ?, ?, ?)",
+            tuple(to_column(field, task[field]) for field in COLUMNS))
+
+
+class SQLiteTaskRow(dict):
+    """
+    This class is a task dictionary read from the tasks table.
+    Setting a field also updates the task's row in the database.
+    """
+
+    def __init__(self, connection, row):
+        task_id, username, title, description, due_date, assigned_date, \
+            completed = row
+        super().__init__({
+            "Username": username,
+            "Task title": title,
+            "Task description": description,
+            "Due date": datetime.fromisoformat(due_date),
+            "Assigned date": datetime.fromisoformat(assigned_date),
+            "completed": bool(completed)
+        })
+        self._connection = connection
+        self._task_id = task_id
+
+    def __setitem__(self, field, value):
+        self._connection.execute(
+            f"UPDATE tasks SET {COLUMNS[field]} = ? WHERE id = ?",
+            (to_column(field, value), self._task_id))
+        super().__setitem__(field, value)
@@ -0,0 +1,296 @@
+"""
+This module is a thin client for task_server.py. It shows the same menu as
+task_manager.py, but the tasks and users are held by the server: every
+action is sent to it over a local TCP port or Unix socket, so the client
+never loads the task files itself.
+
+Usage: python task_client.py [--host HOST] [--port PORT] [--unix PATH]
+"""
+
+# =====Importing Libraries=====
+import argparse
+import json
+import socket
+import sys
+
+import task_manager
+from task_manager import (MAIN_MENU, TaskStore, add_record, colors, format_date,
+                          parse_task, print_stats)
+from task_server import add_address_arguments
+
+
+class ServerConnection:
+    """
+    This class is a connection to the task server, sending one request at a
+    time and returning the server's reply.
+    """
+
+    def __init__(self, host, port, unix_path=None):
+        if unix_path is not None:
+            self.socket = socket.socket(socket.AF_UNIX)
+            self.socket.connect(unix_path)
+        else:
+            self.socket = socket.create_connection((host, port))
+        self.file = self.socket.makefile("rwb")
+
+    def request(self, action, **arguments):
+        """
+        This method sends a request and returns the server's reply, raising
+        a ValueError with the server's message if the request failed.
+        """
+        self.file.write(json.dumps(dict(arguments, action=action)).encode("utf-8") + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("the server closed the connection")
+
+        reply = json.loads(line)
+        if not reply["ok"]:
+            raise ValueError(reply["error"])
+        return reply
+
+
+class RemoteTaskStore:
+    """
+    This class stands in for the task manager's TaskStore, passing each
+    query and change on to the server. Tasks are sent as their list of
+    fields in the task file.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.task_list = RemoteTaskList(self)
+
+    def get_tasks(self, task_ids):
+        """
+        This method returns the tasks with the given IDs, in order.
+        """
+        reply = self.connection.request("tasks", task_ids=list(task_ids))
+        return [parse_task(task_fields) for task_fields in reply["tasks"]]
+
+    def add(self, new_task: dict):
+        """
+        This method adds a new task.
+        """
+        self.connection.request("add", task=add_record(new_task)[1:])
+
+    def complete(self, task_id):
+        """
+        This method marks the task with the given ID as complete.
+        """
+        self.connection.request("complete", task_id=task_id)
+
+    def reassign(self, task_id, new_user):
+        """
+        This method assigns the task with the given ID to another user.
+        """
+        self.connection.request("reassign", task_id=task_id, username=new_user)
+
+    def change_due_date(self, task_id, new_due_date):
+        """
+        This method sets a new due date on the task with the given ID.
+        """
+        self.connection.request("due-date", task_id=task_id,
+                                due_date=format_date(new_due_date))
+
+    def get_user_task_ids(self, user):
+        """
+        This method returns the IDs of the tasks assigned to a user.
+        """
+        return self.connection.request("user-tasks", username=user)["task_ids"]
+
+    def get_due_task_ids(self, first_date, last_date, user=None):
+        """
+        This method returns the IDs of the uncompleted tasks due between
+        two dates, inclusive, in order of due date.
+        """
+        return self.connection.request(
+            "due-tasks", first_date=None if first_date is None else format_date(first_date),
+            last_date=format_date(last_date), username=user)["task_ids"]
+
+    # Overdue and due-soon tasks are found in the same way as by TaskStore
+    get_overdue_task_ids = TaskStore.get_overdue_task_ids
+    get_due_soon_task_ids = TaskStore.get_due_soon_task_ids
+
+    def search(self, query, user=None, completed=None):
+        """
+        This method returns the IDs of the tasks whose title or description
+        contain every word in `query`.
+        """
+        return self.connection.request("search", query=query, username=user,
+                                       completed=completed)["task_ids"]
+
+
+class RemoteTaskList:
+    """
+    This class is a list-like view of the tasks held by the server.
+    """
+
+    def __init__(self, task_store):
+        self._task_store = task_store
+
+    def __len__(self):
+        return self._task_store.connection.request("task-count")["count"]
+
+    def __getitem__(self, task_id):
+        return self._task_store.get_tasks([task_id])[0]
+
+
+class RemoteUserStore:
+    """
+    This class stands in for the task manager's UserStore. Passwords stay
+    on the server, so `username_password` can only be used to check whether
+    a user exists.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.username_password = RemoteUsernames(connection)
+
+    def add_user(self, username, password):
+        """
+        This method registers a new user.
+        """
+        self.connection.request("register", username=username, password=password)
+
+
+class RemoteUsernames:
+    """
+    This class answers whether a username is registered on the server.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __contains__(self, username):
+        return self._connection.request("user-exists", username=username)["exists"]
+
+
+def login(connection):
+    """
+    This function asks for a username and password until the server accepts
+    them, and returns the username.
+    """
+    while True:
+        print("\nLOGIN")
+        curr_user = input("Username: ")
+        curr_pass = input("Password: ")
+        try:
+            connection.request("login", username=curr_user, password=curr_pass)
+        except ValueError as login_error:
+            print(f"\n{colors.red}{login_error}{colors.reset}")
+            continue
+
+        print(f"\n{colors.green}Login Successful!{colors.reset}")
+        return curr_user
+
+
+def run_menu(connection, curr_user):
+    """
+    This function presents the task manager menu until the user exits.
+    Viewing and changing tasks use the task manager's own functions, working
+    on the server's tasks and users; reports, statistics and compaction are
+    carried out by the server.
+    """
+    while True:
+        menu = input(MAIN_MENU).lower().strip()
+
+        # A change the server refuses, such as one already made by another
+        # user, is reported and the menu shown again
+        try:
+            if menu == "r":
+                task_manager.reg_user()
+
+            elif menu == "a":
+                task_manager.add_task()
+
+            elif menu == "va":
+                task_manager.view_all()
+
+            elif menu == "vm":
+                task_manager.view_mine(curr_user)
+
+            elif menu == "vo":
+                task_manager.view_overdue()
+
+            elif menu == "vd":
+                task_manager.view_due_soon()
+
+            elif menu == "s":
+                task_manager.search_tasks()
+
+            elif menu in ("gr", "gf"):
+                if connection.request("reports", force=menu == "gf")["generated"]:
+                    print(f"\n{colors.green}Reports generated in the server's directory.")
+                else:
+                    print(f"\n{colors.green}Reports are already up to date "
+                          "(enter gf to regenerate them anyway).")
+                print(colors.reset)
+
+            elif menu == "ds":
+                if curr_user == "admin":
+                    stats = connection.request("stats")
+                    print_stats(stats["users"], stats["tasks"], stats["task_stats"])
+
+                else:
+                    print(f"\n{colors.red}You must be an administrator to access statistics.")
+                    print(colors.reset)
+
+            elif menu == "cj":
+                if curr_user == "admin":
+                    connection.request("compact")
+                    print(f"\n{colors.green}Task storage compacted.")
+                    print(colors.reset)
+
+                else:
+                    print(f"\n{colors.red}You must be an administrator to compact storage.")
+                    print(colors.reset)
+
+            elif menu == "e":
+                print(f"\n{colors.cyan}Goodbye!\n{colors.reset}")
+                break
+
+            else:
+                print(f"{colors.red}\nInvalid input - please try again.")
+                print(colors.reset)
+
+        except ValueError as request_error:
+            print(f"\n{colors.red}{request_error}{colors.reset}")
+
+
+def main():
+    """
+    This function connects to the server given on the command line, logs in
+    and runs the menu.
+    """
+    parser = argparse.ArgumentParser(description="Use a task manager server.")
+    add_address_arguments(parser)
+    args = parser.parse_args()
+
+    # Leave out color codes when the output is not shown on a terminal
+    if not sys.stdout.isatty():
+        colors.disable()
+
+    try:
+        connection = ServerConnection(args.host, args.port, args.unix)
+    except OSError as connect_error:
+        print(f"\n{colors.red}Could not connect to the task server "
+              f"({connect_error}).{colors.reset}")
+        raise SystemExit(1) from connect_error
+
+    # The task manager's menu functions use its task and user stores, which
+    # are replaced with the server's
+    task_manager.tasks = RemoteTaskStore(connection)
+    task_manager.users = RemoteUserStore(connection)
+
+    try:
+        curr_user = login(connection)
+        run_menu(connection, curr_user)
+    except ConnectionError as connection_error:
+        print(f"\n{colors.red}Lost connection to the task server "
+              f"({connection_error}).{colors.reset}")
+        raise SystemExit(1) from connection_error
+
+
+if __name__ == "__main__":
+    main()
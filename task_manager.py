@@ -2,6 +2,8 @@
 This python program provides functionality for task management.
 Functionalities include: user registration, task assignment, adding tasks,
 viewing tasks, editing tasks, generating task reports, and displaying statistics.
+It can also be imported: tasks and users are kept in the `tasks` and `users`
+stores, which only read the task and user files when they are first used.
 """
 
 # Notes:
@@ -13,8 +15,34 @@ viewing tasks, editing tasks, generating task reports, and displaying statistics
 # files.
 
 # =====Importing Libraries=====
+import atexit
+import cProfile
+import csv
+import hashlib
+import io
+import json
+import mmap
 import os
-from datetime import datetime, date
+import re
+import signal
+import struct
+import sys
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left, insort
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, date, timedelta
+from functools import lru_cache
+from itertools import accumulate, chain, islice, pairwise
+
+# File locking is only available on Unix-like systems; elsewhere sessions
+# sharing a folder are not protected from each other
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 
 class colors:
@@ -29,6 +57,28 @@ class colors:
     purple = '\033[95m'
     cyan = '\033[96m'
 
+    @classmethod
+    def disable(cls):
+        """
+        This method replaces every color code with an empty string, for
+        output that is not going to a terminal.
+        """
+        for color in ("reset", "red", "green", "yellow", "blue", "purple", "cyan"):
+            setattr(cls, color, "")
+
+
+def input_text_field(prompt, field):
+    """
+    This function asks for a text field until it is one the task and user
+    files can hold (see `check_text_field`), and returns it.
+    """
+    while True:
+        value = input(prompt)
+        error = check_text_field({field: value}, field)
+        if error is None:
+            return value
+        print(f"\n{colors.red}{error.capitalize()}. Please try again.{colors.reset}")
+
 
 def reg_user():
     """
@@ -38,8 +88,8 @@ def reg_user():
 
     # Prompt user for new username and check for duplicates
     while True:
-        new_username = input("\nNew Username: ")
-        if new_username not in username_password:
+        new_username = input_text_field("\nNew Username: ", "username")
+        if new_username not in users.username_password:
             break
         print(colors.red)
         print(f"{new_username} is already in use! Please enter a different username.")
@@ -47,18 +97,17 @@ def reg_user():
 
     # Request for new passport and validate this
     while True:
-        new_password = input("New Password: ")
+        new_password = input_text_field("New Password: ", "password")
         confirm_password = input("Confirm Password: ")
         if new_password == confirm_password:
-            print(f"{colors.green}\nSuccess! New user added! {colors.reset}")
-
-            # Add new user credentials to user dictionary and new text file
-            username_password[new_username] = new_password
-            with open("user.txt", "w", encoding="utf-8") as output_file:
-                user_data = []
-                for key, value in username_password.items():
-                    user_data.append(f"{key};{value}")
-                output_file.write("\n".join(user_data))
+            # Add new user credentials to the user store and storage, unless
+            # another session has registered the username in the meantime
+            try:
+                users.add_user(new_username, new_password)
+            except ValueError as error:
+                print(f"{colors.red}\n{error} Please register again.{colors.reset}")
+            else:
+                print(f"{colors.green}\nSuccess! New user added! {colors.reset}")
 
             break
 
@@ -74,22 +123,23 @@ def add_task():
     # Request username of task owner and check if user exists.
     while True:
         task_user = input("Enter Username this task is assigned to: ")
-        if task_user in username_password:
+        if task_user in users.username_password:
             break
         print(f"\n{colors.red}User does not exist. Please enter a valid username.")
         print(f"{colors.reset}")
 
-    # Collect task details
-    task_title = input("Enter task title: ")
-    task_description = input("Enter brief task description: ")
+    # Collect task details, which cannot contain the semicolons and line
+    # breaks that separate the fields and lines of the task files
+    task_title = input_text_field("Enter task title: ", "title")
+    task_description = input_text_field("Enter brief task description: ",
+                                        "description")
     curr_date = date.today()
 
     # Request task due date and check that it is in correct format
     while True:
         try:
             task_due_date = input("Due date of task (YYYY-MM-DD): ")
-            due_date_time = datetime.strptime(task_due_date,
-                                              DATETIME_STRING_FORMAT)
+            due_date_time = parse_date(task_due_date)
             break
 
         except ValueError:
@@ -106,46 +156,48 @@ def add_task():
         "Assigned date": curr_date,
         "completed": False
     }
-    task_list.append(new_task)
-    update_task_file()
+    tasks.add(new_task)
     print(f"\n{colors.green}Task successfully added.{colors.reset}")
 
 
 def view_all():
     """
-    This function prints all tasks with a unique identier 
+    This function prints all tasks with a unique identier, a page at a time,
     and a message if there are no tasks.
     """
-    # Print all tasks with a unique identifier, and return error message if task list is empty
-    for task_id, task in enumerate(task_list):
-        print_task(task_id, task)
-    if not task_list:
-        print(f"\n{colors.red}Sorry! There are currently no tasks logged.{colors.reset}")
+    # Page through all tasks, or return error message if task list is empty
+    page_tasks(range(len(tasks.task_list)),
+               "Sorry! There are currently no tasks logged.")
 
 
-def view_mine():
+def view_mine(curr_user):
     """
     This function allows a user to view and interact with tasks assigned to them.
     They can edit and mark tasks as complete if they are not already completed.
     """
-    # Print all user's task, or return appropriate message if they have no assigned task.
+    # Print a page of the user's tasks, or return appropriate message if they
+    # have no assigned task.
+    page = 1
     while True:
-        my_task_ids = []
-        for task_id, task in enumerate(task_list):
-            if task["Username"] == curr_user:
-                print_task(task_id, task)
-                my_task_ids.append(task_id)
-
+        task_list = tasks.task_list
+        my_task_ids = tasks.get_user_task_ids(curr_user)
         if not my_task_ids:
             print(f"\n{colors.red}No tasks have been assigned to you.{colors.reset}")
             break
 
-        # Allow user to interact with, and/or manipulate their task
-        user_task_choice = input("""\nTo select a task, enter the task ID.
-Or enter '-1' to return to the main menu.
-: """)
+        num_pages = show_page(my_task_ids, page)
 
-        if user_task_choice.isnumeric() and int(user_task_choice) in my_task_ids:
+        # Allow user to interact with, and/or manipulate their task, or to
+        # move to another page
+        user_task_choice = input("\nTo select a task, enter the task ID.\n"
+                                 + (PAGE_HELP if num_pages > 1 else "")
+                                 + "Or enter '-1' to return to the main menu.\n: ")
+
+        new_page = turn_page(user_task_choice, page, num_pages)
+        if new_page is not None:
+            page = new_page
+
+        elif user_task_choice.isnumeric() and int(user_task_choice) in my_task_ids:
             print_task(user_task_choice, task_list[int(user_task_choice)])
             while True:
                 user_choice = input("""\nSelect one of the following options:
@@ -156,17 +208,15 @@ What would you like to do? : """).lower().strip()
 
                 if user_choice == "c":
 
-                    # Mark task as complete and update task file
-                    task_list[int(user_task_choice)]["completed"] = True
-                    update_task_file()
+                    # Mark task as complete and save the change
+                    tasks.complete(int(user_task_choice))
                     print("Task marked as complete.")
                     break
 
-                # Call edit function and update task file when completed
+                # Call edit function, which saves the change when completed
                 if user_choice == "e" and not \
                         task_list[int(user_task_choice)]["completed"]:
-                    edit_task(task_list[int(user_task_choice)])
-                    update_task_file()
+                    edit_task(int(user_task_choice))
                     break
 
                 # If task is completed, return appropriate message
@@ -187,30 +237,173 @@ What would you like to do? : """).lower().strip()
             print(f"\n{colors.red}Invalid input! Please try again.\n{colors.reset}")
 
 
+def search_tasks():
+    """
+    This function asks for words to search for, along with optional
+    filters, and prints the tasks whose title or description contain all of
+    the words.
+    """
+    query = input("Search for: ")
+    if not tokenize(query):
+        print(f"\n{colors.red}Please enter at least one word to search for.{colors.reset}")
+        return
+
+    task_user = request_task_owner()
+
+    # Request the completion status of the tasks to include
+    while True:
+        status = input("Completed tasks only (y), uncompleted only (n), "
+                       "or press Enter for both: ").lower().strip()
+        if status in ("y", "n", ""):
+            break
+        print(f"\n{colors.red}Invalid input - please try again.{colors.reset}")
+    completed = {"y": True, "n": False}.get(status)
+
+    page_tasks(tasks.search(query, task_user, completed), "No matching tasks found.")
+
+
+def view_overdue():
+    """
+    This function prints the overdue tasks of one user, or of everyone,
+    in order of due date.
+    """
+    task_user = request_task_owner()
+    page_tasks(tasks.get_overdue_task_ids(datetime.today(), task_user),
+               "No tasks are overdue.")
+
+
+def view_due_soon():
+    """
+    This function prints the uncompleted tasks of one user, or of everyone,
+    that are due within a chosen number of days, in order of due date.
+    """
+    task_user = request_task_owner()
+
+    # Request the number of days to look ahead
+    while True:
+        days = input(f"Number of days ahead (default {DUE_SOON_DAYS}): ").strip()
+        if not days:
+            days = DUE_SOON_DAYS
+            break
+        if days.isnumeric() and int(days) > 0:
+            days = int(days)
+            break
+        print(f"\n{colors.red}Please enter a whole number of days.{colors.reset}")
+
+    page_tasks(tasks.get_due_soon_task_ids(datetime.today(), days, task_user),
+               f"No tasks are due in the next {days} days.")
+
+
+def request_task_owner():
+    """
+    This function asks whose tasks to show, returning a username, or None
+    for everyone.
+    """
+    while True:
+        task_user = input("Enter a username, or press Enter for everyone: ").strip()
+        if not task_user:
+            return None
+        if task_user in users.username_password:
+            return task_user
+        print(f"\n{colors.red}User does not exist. Please enter a valid username.")
+        print(f"{colors.reset}")
+
+
+def page_tasks(task_ids, empty_message):
+    """
+    This function prints the tasks with the given IDs a page at a time,
+    letting the user move between pages, or prints a message if there are
+    no tasks.
+    """
+    if not task_ids:
+        print(f"\n{colors.red}{empty_message}{colors.reset}")
+        return
+
+    page = 1
+    while True:
+        num_pages = show_page(task_ids, page)
+        if num_pages == 1:
+            break
+
+        choice = input("\n" + PAGE_HELP + "Or enter '-1' to return to the main menu.\n: ")
+        if choice.strip() == "-1":
+            break
+
+        new_page = turn_page(choice, page, num_pages)
+        if new_page is None:
+            print(f"\n{colors.red}Invalid input! Please try again.{colors.reset}")
+        else:
+            page = new_page
+
+
+def show_page(task_ids, page):
+    """
+    This function prints one page of the tasks with the given IDs, followed
+    by the page number if there is more than one page, and returns the
+    number of pages. Only the tasks on the page are formatted, and the page
+    is written to the screen all at once.
+    """
+    num_pages = max(1, -(-len(task_ids) // PAGE_SIZE))
+    page = min(page, num_pages)
+    start = (page - 1) * PAGE_SIZE
+
+    page_task_ids = task_ids[start:start + PAGE_SIZE]
+    page_text = [format_task(task_id, task)
+                 for task_id, task in zip(page_task_ids, tasks.get_tasks(page_task_ids))]
+    if num_pages > 1:
+        page_text.append(f"\nPage {page} of {num_pages} ({len(task_ids)} tasks)")
+    sys.stdout.write("\n".join(page_text) + "\n")
+    return num_pages
+
+
+def turn_page(choice, page, num_pages):
+    """
+    This function returns the page to move to for a choice of "n" (next
+    page), "p" (previous page) or "g" and a page number, or None if the
+    choice is none of these.
+    """
+    choice = choice.lower().strip()
+    if choice == "n":
+        return min(page + 1, num_pages)
+    if choice == "p":
+        return max(page - 1, 1)
+    if choice[:1] == "g" and choice[1:].strip().isnumeric():
+        return min(max(int(choice[1:]), 1), num_pages)
+    return None
+
+
 def print_task(task_id, task: dict):
     """
-    This function takes a task ID and a dictionary representing a task, 
+    This function takes a task ID and a dictionary representing a task,
     then prints formatted information about the task.
     """
+    sys.stdout.write(format_task(task_id, task) + "\n")
+
+
+def format_task(task_id, task: dict):
+    """
+    This function takes a task ID and a dictionary representing a task,
+    and returns the formatted information about the task as a string.
+    """
     # Build a string which displays all the task information
     disp_str = f"Task: \t\t {task["Task title"]}\n"
     disp_str += f"Assigned to: \t {task["Username"]}\n"
     disp_str += ("Date Assigned: \t "
-                 f"{task["Assigned date"].strftime(DATETIME_STRING_FORMAT)}\n")
+                 f"{format_date(task["Assigned date"])}\n")
     disp_str += ("Due Date: \t "
-                 f"{task["Due date"].strftime(DATETIME_STRING_FORMAT)}\n")
+                 f"{format_date(task["Due date"])}\n")
     disp_str += f"Task Description: \n{task["Task description"]}"
 
-    # Print this information along with corresponding task id
-    print("_ " * 30)
-    print(f"\n{colors.yellow}Task ID: {task_id}\n" + disp_str)
-    print(colors.reset)
-    print("_ " * 30)
+    # Add the corresponding task id, between two dividing lines
+    return ("_ " * 30 + "\n"
+            + f"\n{colors.yellow}Task ID: {task_id}\n" + disp_str + "\n"
+            + colors.reset + "\n"
+            + "_ " * 30)
 
 
-def edit_task(task: dict):
+def edit_task(task_id):
     """
-    This function allows the user to manipulate tasks stored in a dictionary.
+    This function allows the user to manipulate the task with the given ID.
     User can either reassign a task to another user or edit the due date of the task.
     """
     while True:
@@ -224,8 +417,8 @@ What would you like to do?: """).lower()
             # Reassign to new username and update dictionary.
             while True:
                 new_user = input("\nEnter username you want to reassign task to: ")
-                if new_user in username_password:
-                    task["Username"] = new_user
+                if new_user in users.username_password:
+                    tasks.reassign(task_id, new_user)
                     print(f"\n{colors.green}Task reassigned to {new_user}.")
                     print(colors.reset)
                     break
@@ -239,29 +432,82 @@ What would you like to do?: """).lower()
             while True:
                 try:
                     new_date = input("\nEnter new task due date (YYYY-MM-DD): ")
-                    new_date_time = \
-                        datetime.strptime(new_date, DATETIME_STRING_FORMAT)
+                    new_date_time = parse_date(new_date)
                     break
 
                 except ValueError:
                     print(f"\n{colors.red}Invalid datetime format."
                           f"Please use the format specified.{colors.reset}")
 
-            # Update dictionary for this task
-            task["Due date"] = new_date_time
+            # Update and save the due date for this task
+            tasks.change_due_date(task_id, new_date_time)
             print(f"{colors.green}\nDue date successfully updated.{colors.reset}")
             break
 
         print(f"\n{colors.red}Invalid input - please try again.{colors.reset}")
 
 
-def update_task_file():
+def parse_date(date_string):
+    """
+    This function converts a date string in DATETIME_STRING_FORMAT into a
+    datetime, raising a ValueError if the string is not a valid date.
+    Unless fast dates are turned off, decoded strings are cached.
+    """
+    if FAST_DATES:
+        return parse_date_cached(date_string)
+    return datetime.strptime(date_string, DATETIME_STRING_FORMAT)
+
+
+@lru_cache(maxsize=4096)
+def parse_date_cached(date_string):
+    """
+    This function is the cached form of `parse_date`.
+    Strings in the default YYYY-MM-DD form are decoded directly, which is
+    much quicker than `datetime.strptime`; anything else falls back to it.
+    """
+    if (DATETIME_STRING_FORMAT == "%Y-%m-%d" and len(date_string) == 10
+            and date_string[4] == date_string[7] == "-"
+            and date_string[:4].isdigit() and date_string[5:7].isdigit()
+            and date_string[8:].isdigit()):
+        return datetime(int(date_string[:4]), int(date_string[5:7]),
+                        int(date_string[8:]))
+    return datetime.strptime(date_string, DATETIME_STRING_FORMAT)
+
+
+def format_date(date_value):
+    """
+    This function converts a date or datetime into a string in
+    DATETIME_STRING_FORMAT. Unless fast dates are turned off, formatted
+    dates are cached.
+    """
+    if FAST_DATES:
+        return format_date_cached(date_value)
+    return date_value.strftime(DATETIME_STRING_FORMAT)
+
+
+@lru_cache(maxsize=4096)
+def format_date_cached(date_value):
+    """
+    This function is the cached form of `format_date`.
+    """
+    return date_value.strftime(DATETIME_STRING_FORMAT)
+
+
+def update_task_file(task_list=None, before_replace=None):
     """
     This function writes task information to a text file in a specific format.
     For each task, attributes lists containing information for the text file
-    are created.
+    are created. The file is written to a temporary file first and then
+    renamed, so tasks.txt is never left half-written.
+    The tasks written default to those of the main task store. If given,
+    `before_replace` is called with the name of the new file once it has
+    been written, just before it replaces tasks.txt.
     """
-    with open("tasks.txt", "w", encoding="utf-8") as file:
+    if task_list is None:
+        task_list = tasks.task_list
+
+    start = time.perf_counter()
+    with open("tasks.txt.tmp", "w", encoding="utf-8") as file:
 
         # For each task, create an attributes list containing
         # information for the .txt file
@@ -271,8 +517,8 @@ def update_task_file():
                 task["Username"],
                 task["Task title"],
                 task["Task description"],
-                task["Due date"].strftime(DATETIME_STRING_FORMAT),
-                task["Assigned date"].strftime(DATETIME_STRING_FORMAT),
+                format_date(task["Due date"]),
+                format_date(task["Assigned date"]),
                 "Yes" if task["completed"] else "No"
             ]
 
@@ -283,30 +529,1446 @@ def update_task_file():
         # Write the string for each task on a separate line in the .txt
         # file
         file.write("\n".join(task_list_to_write))
+        file.flush()
+        os.fsync(file.fileno())
+        instruments.count_bytes("written", "tasks.txt", file.tell())
+
+    if before_replace is not None:
+        before_replace("tasks.txt.tmp")
+    os.replace("tasks.txt.tmp", "tasks.txt")
+    instruments.record_time("update_task_file", time.perf_counter() - start)
+
+
+class TaskStore:
+    """
+    This class holds the task list along with an index of the task IDs
+    assigned to each user and per-user report counters.
+    Tasks are loaded from the storage backend the first time the task list
+    is used, so creating a TaskStore is cheap.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._task_list = None
+
+        # Index of task IDs assigned to each user, report counters for
+        # each user, and the due-date index of all uncompleted tasks, kept
+        # up to date as tasks change. They are not needed when the storage
+        # backend answers these queries itself.
+        self.user_task_ids = {}
+        self.user_task_stats = {}
+        self.due_index = {"due keys": [], "sorted": True}
+        self.keep_index = not storage.queries_in_storage
+
+        # Number of uncompleted tasks assigned on each date, by day ordinal,
+        # kept up to date alongside the report counters for the statistics
+        self.open_task_dates = {}
+
+        # Search index of task titles and descriptions, built or loaded
+        # the first time tasks are searched
+        self._search_index = None
+
+    @property
+    def task_list(self):
+        """
+        The list of tasks, loaded from storage on first use.
+        """
+        if self._task_list is None:
+            self.load()
+        return self._task_list
+
+    @property
+    def loaded(self):
+        """
+        Whether the tasks have been loaded from storage.
+        """
+        return self._task_list is not None
+
+    def load(self):
+        """
+        This method loads the tasks from storage.
+        """
+        with task_list_lock:
+            if self._task_list is None:
+                self._task_list = self.storage.create_task_list()
+                self.storage.load_tasks(self)
+
+    def reset(self):
+        """
+        This method discards the tasks held in memory, along with their
+        indexes and report counters, leaving an empty task list to be loaded
+        again.
+        """
+        self.clear_indexes()
+        self._task_list = self.storage.create_task_list()
+
+    def reload(self):
+        """
+        This method discards the tasks held in memory, along with any changes
+        to them that have not been saved, and loads them from storage again.
+        """
+        with task_list_lock:
+            self.clear_indexes()
+            self._task_list = None
+            self.load()
+
+    def clear_indexes(self):
+        """
+        This method discards the indexes and report counters worked out from
+        the tasks in memory, for when the tasks are reloaded.
+        """
+        self.user_task_ids.clear()
+        self.user_task_stats.clear()
+        self.due_index = {"due keys": [], "sorted": True}
+        self.open_task_dates.clear()
+        self._search_index = None
+
+    def add(self, new_task: dict, persist=True):
+        """
+        This method adds a new task dictionary to the task list and,
+        unless `persist` is False, saves the change.
+        """
+        with task_list_lock:
+            task_list = self.task_list
+            task_list.append(new_task)
+            if self.keep_index:
+                self.user_task_ids.setdefault(new_task["Username"], []) \
+                    .append(len(task_list) - 1)
+            self.count_task(len(task_list) - 1, new_task)
+            if self._search_index is not None:
+                self._search_index.add_task(len(task_list) - 1, new_task)
+            if persist:
+                self.storage.save_task_change(add_record(new_task))
+
+    def add_many(self, new_tasks):
+        """
+        This method adds a list of new task dictionaries to the task list
+        and saves them all in one write.
+        """
+        with task_list_lock:
+            for new_task in new_tasks:
+                self.add(new_task, persist=False)
+            self.storage.save_task_changes([add_record(new_task)
+                                            for new_task in new_tasks])
+
+    def complete(self, task_id, persist=True):
+        """
+        This method marks the task with the given ID as complete and,
+        unless `persist` is False, saves the change.
+        """
+        with task_list_lock:
+            task = self.task_list[task_id]
+            self.uncount_task(task_id, task)
+            task["completed"] = True
+            self.count_task(task_id, task)
+            if persist:
+                self.storage.save_task_change(["complete", str(task_id)])
+
+    def reassign(self, task_id, new_user, persist=True):
+        """
+        This method assigns the task with the given ID to another user and,
+        unless `persist` is False, saves the change.
+        """
+        with task_list_lock:
+            task = self.task_list[task_id]
+
+            # Move the task ID between the users' entries in the index,
+            # keeping each list of task IDs in order
+            if self.keep_index:
+                self.user_task_ids[task["Username"]].remove(task_id)
+                insort(self.user_task_ids.setdefault(new_user, []), task_id)
+
+            self.uncount_task(task_id, task)
+            task["Username"] = new_user
+            self.count_task(task_id, task)
+            if persist:
+                self.storage.save_task_change(["reassign", str(task_id), new_user])
+
+    def change_due_date(self, task_id, new_due_date, persist=True):
+        """
+        This method sets a new due date on the task with the given ID and,
+        unless `persist` is False, saves the change.
+        """
+        with task_list_lock:
+            task = self.task_list[task_id]
+            self.uncount_task(task_id, task)
+            task["Due date"] = new_due_date
+            self.count_task(task_id, task)
+            if persist:
+                self.storage.save_task_change(["due", str(task_id),
+                                               format_date(new_due_date)])
+
+    def apply_change(self, record):
+        """
+        This method applies a task change, given as a journal record, to the
+        task list without saving it.
+        """
+        if record[0] == "add":
+            self.add(parse_task(record[1:]), persist=False)
+        elif record[0] == "complete":
+            self.complete(int(record[1]), persist=False)
+        elif record[0] == "reassign":
+            self.reassign(int(record[1]), record[2], persist=False)
+        elif record[0] == "due":
+            self.change_due_date(int(record[1]), parse_date(record[2]),
+                                 persist=False)
+
+    def apply_changes(self, records, first_added_id):
+        """
+        This method applies a batch of task changes to the task list again
+        after the tasks have been reloaded. The tasks the batch adds were
+        given IDs from `first_added_id` on, but now follow the tasks other
+        sessions have added, so changes the batch makes to them are moved
+        to the IDs they are added at this time. The records are updated in
+        place, so that a batch that then fails to save is kept with the
+        IDs now in memory.
+        """
+        moved_by = len(self.task_list) - first_added_id
+        for index, record in enumerate(records):
+            if record[0] != "add" and int(record[1]) >= first_added_id:
+                records[index] = [record[0], str(int(record[1]) + moved_by)] + record[2:]
+            self.apply_change(records[index])
+
+    def count_task(self, task_id, task: dict):
+        """
+        This method adds a task to the report counters of its user.
+        Completed tasks are counted, while uncompleted tasks are added to
+        the due-date index of their user and to that of all tasks, and
+        counted by the date they were assigned. Each index is a list of due
+        keys (see `due_key`), sorted when needed, so the tasks due in any
+        range of dates can be found by bisection.
+        The columnar store and SQLite storage compute their reports directly,
+        so need no counters.
+        """
+        if USE_COLUMNAR_STORE or not self.keep_index:
+            return
+
+        stats = self.user_task_stats.setdefault(task["Username"], {
+            "completed": 0, "due keys": [], "sorted": True})
+        if task["completed"]:
+            stats["completed"] += 1
+            return
+
+        assigned_ordinal = task["Assigned date"].toordinal()
+        self.open_task_dates[assigned_ordinal] = \
+            self.open_task_dates.get(assigned_ordinal, 0) + 1
+
+        # Appending and sorting later keeps loading a large task file linear,
+        # where inserting each due key in order would be quadratic
+        task_due_key = due_key(task["Due date"].toordinal(), task_id)
+        for index in (stats, self.due_index):
+            due_keys = index["due keys"]
+            if due_keys and task_due_key < due_keys[-1]:
+                index["sorted"] = False
+            due_keys.append(task_due_key)
+
+    def uncount_task(self, task_id, task: dict):
+        """
+        This method removes a task from the report counters of its user.
+        """
+        if USE_COLUMNAR_STORE or not self.keep_index:
+            return
+
+        stats = self.user_task_stats[task["Username"]]
+        if task["completed"]:
+            stats["completed"] -= 1
+            return
+
+        assigned_ordinal = task["Assigned date"].toordinal()
+        self.open_task_dates[assigned_ordinal] -= 1
+        if not self.open_task_dates[assigned_ordinal]:
+            del self.open_task_dates[assigned_ordinal]
+
+        task_due_key = due_key(task["Due date"].toordinal(), task_id)
+        for index in (stats, self.due_index):
+            due_keys = get_due_keys(index)
+            del due_keys[bisect_left(due_keys, task_due_key)]
+
+    def get_user_counts(self, user, now):
+        """
+        This method returns the number of completed, uncompleted and overdue
+        tasks assigned to a user. Tasks are overdue once `now` has passed the
+        start of their due date.
+        """
+        stats = self.user_task_stats.get(user)
+        if stats is None:
+            return 0, 0, 0
+
+        due_keys = get_due_keys(stats)
+        overdue_tasks = bisect_left(due_keys, due_key(now.toordinal() + 1, 0))
+        return stats["completed"], len(due_keys), overdue_tasks
+
+    def get_report_counts(self, now):
+        """
+        This method returns a dictionary mapping each user with tasks to a
+        tuple of their completed, uncompleted and overdue task counts.
+        """
+        self.load()
+        if not self.keep_index:
+            return self.storage.report_counts(now)
+
+        if USE_COLUMNAR_STORE:
+            return self.task_list.user_counts(now.toordinal())
+
+        return {user: self.get_user_counts(user, now)
+                for user in self.user_task_stats}
+
+    def get_open_task_dates(self):
+        """
+        This method returns a dictionary mapping the day ordinal of each
+        date that uncompleted tasks were assigned on to the number of them.
+        """
+        self.load()
+        if not self.keep_index:
+            return self.storage.open_task_dates()
+
+        if USE_COLUMNAR_STORE:
+            return self.task_list.open_task_dates()
+
+        return self.open_task_dates
+
+    def get_stats(self, now):
+        """
+        This method returns statistics on the tasks, as returned by
+        `summarize_report_counts`, along with the number of uncompleted
+        tasks in each age range (see `count_task_ages`). With the default
+        task store both come from counters kept up to date as tasks change;
+        other stores count them directly.
+        """
+        task_stats = summarize_report_counts(self.get_report_counts(now))
+        task_stats["open task ages"] = count_task_ages(self.get_open_task_dates(), now)
+        return task_stats
+
+    def get_tasks(self, task_ids):
+        """
+        This method returns the tasks with the given IDs, in order.
+        """
+        task_list = self.task_list
+        return [task_list[task_id] for task_id in task_ids]
+
+    def get_user_task_ids(self, user):
+        """
+        This method returns the IDs of the tasks assigned to a user.
+        """
+        self.load()
+        if not self.keep_index:
+            return self.storage.get_user_task_ids(user)
+
+        return self.user_task_ids.get(user, [])
+
+    def get_due_task_ids(self, first_date, last_date, user=None):
+        """
+        This method returns the IDs of the uncompleted tasks due between
+        two dates, inclusive, in order of due date. A `first_date` of None
+        includes every task due up to `last_date`. If `user` is given, only
+        their tasks are included.
+        """
+        first_ordinal = 1 if first_date is None else first_date.toordinal()
+        last_ordinal = last_date.toordinal()
+
+        self.load()
+        if not self.keep_index:
+            return self.storage.due_task_ids(first_ordinal, last_ordinal, user)
+
+        if USE_COLUMNAR_STORE:
+            return self.task_list.due_task_ids(first_ordinal, last_ordinal, user)
+
+        if user is None:
+            index = self.due_index
+        else:
+            index = self.user_task_stats.get(user, {"due keys": [], "sorted": True})
+
+        due_keys = get_due_keys(index)
+        start = bisect_left(due_keys, due_key(first_ordinal, 0))
+        end = bisect_left(due_keys, due_key(last_ordinal + 1, 0))
+        return [key & DUE_KEY_TASK_MASK for key in due_keys[start:end]]
+
+    @property
+    def search_index(self):
+        """
+        The search index of the tasks, loaded from SEARCH_INDEX_FILE if it
+        is up to date or otherwise built from the task list on first use.
+        """
+        with task_list_lock:
+            if self._search_index is None:
+                task_list = self.task_list
+                stamp = self.search_index_stamp()
+                if stamp is not None:
+                    self._search_index = SearchIndex.load(SEARCH_INDEX_FILE, stamp,
+                                                          len(task_list))
+                if self._search_index is None:
+                    self._search_index = SearchIndex.build(task_list)
+            return self._search_index
+
+    def search_index_stamp(self):
+        """
+        This method returns the state of the task files that the tasks in
+        memory were loaded from or saved to, which a saved search index must
+        match. It returns None if the search index is not saved, or if the
+        files have been changed by another session since.
+        """
+        disk_state = getattr(self.storage, "disk_state", None)
+        if not SEARCH_INDEX_MODE or disk_state is None or \
+                disk_state != self.storage.read_disk_state():
+            return None
+        return disk_state + [0] * (4 - len(disk_state))
+
+    def save_search_index(self):
+        """
+        This method saves the search index to SEARCH_INDEX_FILE if it has
+        changed since it was loaded, so it need not be built again.
+        """
+        with task_list_lock:
+            if self._search_index is None or not self._search_index.changed:
+                return
+            stamp = self.search_index_stamp()
+            if stamp is not None:
+                self._search_index.save(SEARCH_INDEX_FILE, stamp)
+
+    def search(self, query, user=None, completed=None):
+        """
+        This method returns the IDs of the tasks whose title or description
+        contain every word in `query`, in order. If `user` is given only
+        their tasks are included, and if `completed` is True or False only
+        completed or uncompleted tasks are.
+        """
+        extra_postings = []
+        if user is not None and self.keep_index:
+            extra_postings.append(self.get_user_task_ids(user))
+
+        task_ids = self.search_index.search(tokenize(query), extra_postings)
+        if (user is None or self.keep_index) and completed is None:
+            return task_ids
+
+        task_list = self.task_list
+        return [task_id for task_id in task_ids
+                if (user is None or task_list[task_id]["Username"] == user)
+                and (completed is None or task_list[task_id]["completed"] == completed)]
+
+    def get_overdue_task_ids(self, now, user=None):
+        """
+        This method returns the IDs of the tasks that are overdue as of
+        `now`, in order of due date.
+        """
+        return self.get_due_task_ids(None, now, user)
+
+    def get_due_soon_task_ids(self, now, days, user=None):
+        """
+        This method returns the IDs of the uncompleted tasks due in the
+        `days` days after `now`, in order of due date.
+        """
+        return self.get_due_task_ids(now + timedelta(days=1),
+                                     now + timedelta(days=days), user)
+
+
+def due_key(due_ordinal, task_id):
+    """
+    This function combines a task's due date ordinal and its ID into a
+    single integer, so that due keys sort by due date and then by task ID.
+    """
+    return (due_ordinal << DUE_KEY_TASK_BITS) | task_id
+
+
+def get_due_keys(index):
+    """
+    This function returns the sorted due keys from a due-date index.
+    """
+    if not index["sorted"]:
+        index["due keys"].sort()
+        index["sorted"] = True
+    return index["due keys"]
+
+
+def add_record(task: dict):
+    """
+    This function returns the journal record that adds the given task.
+    """
+    return ["add",
+            task["Username"],
+            task["Task title"],
+            task["Task description"],
+            format_date(task["Due date"]),
+            format_date(task["Assigned date"]),
+            "Yes" if task["completed"] else "No"]
+
+
+def tokenize(text):
+    """
+    This function splits text into the lower case words the search index
+    is made of.
+    """
+    return SEARCH_WORD.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    This class is an inverted index of the words in task titles and
+    descriptions. Each word maps to the IDs of the tasks containing it, in
+    order, stored as an unsigned integer array. Task text never changes once
+    a task is added, so the index only grows.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.num_tasks = 0
+
+        # Whether the index has changed since it was loaded from disk
+        self.changed = True
+
+    @classmethod
+    def build(cls, task_list):
+        """
+        This method returns a new index of every task in a task list.
+        """
+        index = cls()
+        for task_id, task in enumerate(task_list):
+            index.add_task(task_id, task)
+        return index
+
+    def add_task(self, task_id, task: dict):
+        """
+        This method adds the words of a task to the index. Tasks must be
+        added in order of their IDs.
+        """
+        postings = self.postings
+        for word in set(tokenize(task["Task title"] + " " + task["Task description"])):
+            posting = postings.get(word)
+            if posting is None:
+                posting = postings[word] = array("I")
+            posting.append(task_id)
+        self.num_tasks = task_id + 1
+        self.changed = True
+
+    def search(self, words, extra_postings=()):
+        """
+        This method returns the IDs of the tasks containing every one of
+        `words`, and also found in each of `extra_postings` (sorted lists of
+        task IDs). The shortest list is checked against the others by
+        bisection, so the cost depends on the rarest word rather than on
+        the number of tasks. As the lists are sorted, each search starts
+        where the previous one ended.
+        """
+        if not words:
+            return []
+
+        postings = [self.postings.get(word) for word in set(words)]
+        if any(posting is None for posting in postings):
+            return []
+
+        postings.extend(extra_postings)
+        postings.sort(key=len)
+        matches = list(postings[0])
+        for posting in postings[1:]:
+            posting_length = len(posting)
+            position = 0
+            found = []
+            for task_id in matches:
+                position = bisect_left(posting, task_id, position)
+                if position == posting_length:
+                    break
+                if posting[position] == task_id:
+                    found.append(task_id)
+            matches = found
+            if not matches:
+                break
+        return matches
+
+    def save(self, file_name, stamp):
+        """
+        This method writes the index to a file, with a header holding
+        `stamp`, the state of the task files it was made from.
+        Each word is followed by the length and contents of its task IDs.
+        """
+        temp_file_name = f"{file_name}.{os.getpid()}.tmp"
+        with open(temp_file_name, "wb") as index_file:
+            index_file.write(SEARCH_INDEX_HEADER.pack(
+                SEARCH_INDEX_MAGIC, SEARCH_INDEX_VERSION, *stamp,
+                self.num_tasks, len(self.postings)))
+            for word, posting in self.postings.items():
+                word = word.encode("utf-8")
+                index_file.write(SEARCH_INDEX_ENTRY.pack(len(word), len(posting)))
+                index_file.write(word)
+                index_file.write(posting.tobytes())
+            instruments.count_bytes("written", file_name, index_file.tell())
+
+        os.replace(temp_file_name, file_name)
+        self.changed = False
+
+    @classmethod
+    def load(cls, file_name, stamp, num_tasks):
+        """
+        This method reads an index from a file. It returns None if there is
+        no file, if it is damaged, or if it does not match `stamp` and the
+        number of tasks.
+        """
+        try:
+            with open(file_name, "rb") as index_file:
+                data = index_file.read()
+        except FileNotFoundError:
+            return None
+        instruments.count_bytes("read", file_name, len(data))
+
+        index = cls()
+        try:
+            magic, version, *file_stamp, index.num_tasks, num_words = \
+                SEARCH_INDEX_HEADER.unpack_from(data)
+            if (magic, version, file_stamp, index.num_tasks) != \
+                    (SEARCH_INDEX_MAGIC, SEARCH_INDEX_VERSION, stamp, num_tasks):
+                return None
+
+            offset = SEARCH_INDEX_HEADER.size
+            for _ in range(num_words):
+                word_length, posting_length = SEARCH_INDEX_ENTRY.unpack_from(data, offset)
+                offset += SEARCH_INDEX_ENTRY.size
+                word = data[offset:offset + word_length].decode("utf-8")
+                offset += word_length
+                posting = array("I")
+                posting.frombytes(data[offset:offset + posting_length * posting.itemsize])
+                offset += posting_length * posting.itemsize
+                index.postings[word] = posting
+
+        # A damaged index is treated the same as a stale one
+        except (struct.error, UnicodeDecodeError, ValueError):
+            return None
+
+        index.changed = False
+        return index
+
+
+class UserStore:
+    """
+    This class holds the usernames and passwords of all users.
+    Users are loaded from the storage backend the first time they are used.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._username_password = None
+
+    @property
+    def username_password(self):
+        """
+        The dictionary of usernames and passwords, loaded on first use.
+        """
+        if self._username_password is None:
+            self._username_password = self.storage.load_users()
+        return self._username_password
+
+    def add_user(self, username, password):
+        """
+        This method adds a new user and saves them to storage.
+        """
+        self.add_users({username: password})
+
+    def add_users(self, new_users: dict):
+        """
+        This method adds a dictionary of new usernames and passwords and
+        saves them to storage in one write, also picking up any users that
+        other sessions have added. A ValueError is raised, and nothing is
+        saved, if one of the usernames has been registered in the meantime.
+        """
+        try:
+            saved_users = self.storage.add_users(new_users)
+        except ValueError:
+            # The users are read again the next time they are needed, so
+            # that they match the storage
+            self._username_password = None
+            raise
+        self.username_password.update(saved_users)
+
+
+def parse_task(task_components):
+    """
+    This function builds a task dictionary from the six semicolon separated
+    components of a task record, raising a ValueError describing the
+    problem if the record is malformed.
+    """
+    if len(task_components) != 6:
+        raise ValueError(f"expected 6 fields but found {len(task_components)}")
+
+    try:
+        due_date = parse_date(task_components[3])
+        assigned_date = parse_date(task_components[4])
+    except ValueError as error:
+        raise ValueError(f"invalid date ({error})") from error
+
+    if task_components[5] not in ("Yes", "No"):
+        raise ValueError("completed field must be 'Yes' or 'No', "
+                         f"not '{task_components[5]}'")
+
+    return {
+        "Username": task_components[0],
+        "Task title": task_components[1],
+        "Task description": task_components[2],
+        "Due date": due_date,
+        "Assigned date": assigned_date,
+        "completed": task_components[5] == "Yes"
+    }
+
+
+def read_task_file(file_name):
+    """
+    This generator reads a task file one line at a time and yields a task
+    dictionary for each non-empty line, so the whole file is never held in
+    memory. A malformed line raises a ValueError giving its line number.
+    """
+    with open(file_name, "r", encoding="utf-8") as task_file:
+        instruments.count_bytes("read", file_name, os.fstat(task_file.fileno()).st_size)
+        for line_number, line in enumerate(task_file, start=1):
+            line = line.rstrip("\n")
+            if not line:
+                continue
+
+            try:
+                yield parse_task(line.split(";"))
+            except ValueError as error:
+                raise ValueError(f"{file_name} line {line_number}: "
+                                 f"{error}") from error
+
+
+def replay_journal(task_store):
+    """
+    This function applies the changes recorded in the journal file to the
+    tasks in `task_store`, loaded from tasks.txt. It returns True if the
+    journal had already been folded into tasks.txt, leaving nothing to
+    apply, and raises a ValueError if the journal belongs to neither.
+    """
+    records = read_journal_records()
+    if records is None:
+        return True
+
+    for record in records:
+        task_store.apply_change(record)
+    return False
+
+
+def read_journal_records():
+    """
+    This function returns the records in the journal file, each split into
+    its fields, or an empty list if there is no journal. It returns None if
+    the journal has already been folded into the current tasks.txt, and
+    raises a ValueError if it belongs to some other tasks.txt. Such a
+    journal is never removed, as its changes may be all that is left of
+    them.
+    """
+    if not os.path.exists(JOURNAL_FILE):
+        return []
+
+    with open(JOURNAL_FILE, "r", encoding="utf-8") as journal:
+        journal_lines = journal.readlines()
+        instruments.count_bytes("read", JOURNAL_FILE, os.fstat(journal.fileno()).st_size)
+
+    if not journal_lines:
+        return []
+
+    records = []
+    for line in journal_lines[1:]:
+        # A record without a line ending was cut short while being
+        # written, so it never completed and is skipped
+        if not line.endswith("\n"):
+            break
+
+        records.append(line.rstrip("\n").split(";"))
+
+    # The header records the tasks.txt the journal applies to. If
+    # compaction was interrupted after tasks.txt was replaced, the journal
+    # ends with a record of the tasks.txt it was folded into instead.
+    header = journal_lines[0].rstrip("\n").split(";")
+    if header[0] == "base" and matches_task_file(header[1:]):
+        return [record for record in records if record[0] != "folded"]
+    if records and records[-1][0] == "folded" and matches_task_file(records[-1][1:]):
+        return None
+
+    raise ValueError(f"{JOURNAL_FILE} does not belong to the current tasks.txt. "
+                     "Move it aside to continue, after checking whether the "
+                     "changes in it are still needed.")
+
+
+def task_file_identity(file_name):
+    """
+    This function returns the fields a journal uses to identify a task file:
+    its size and modification time, and the hex BLAKE2b digest of its
+    contents.
+    """
+    file_stat = os.stat(file_name)
+    return [str(file_stat.st_size), str(file_stat.st_mtime_ns), hash_file(file_name).hex()]
+
+
+def matches_task_file(identity):
+    """
+    This function returns True if tasks.txt is the file identified by
+    `identity` (see `task_file_identity`). An unchanged size and
+    modification time are taken as a match without reading the file;
+    otherwise the contents decide, so a tasks.txt that has been touched or
+    copied still matches its journal.
+    """
+    if len(identity) != 3:
+        return False
+
+    task_stat = os.stat("tasks.txt")
+    if identity[:2] == [str(task_stat.st_size), str(task_stat.st_mtime_ns)]:
+        return True
+    return identity[2] == hash_file("tasks.txt").hex()
+
+
+def append_to_journal(lines):
+    """
+    This function appends lines to the journal file, first cutting off a
+    record left unfinished by an interrupted write so that the new lines
+    start on a line of their own, and returns the number of bytes written
+    and the size of the journal. A new journal starts with a header
+    identifying the tasks.txt it applies to.
+    """
+    with open(JOURNAL_FILE, "a+b") as journal:
+        journal_size = journal.seek(0, os.SEEK_END)
+        if journal_size:
+            journal.seek(journal_size - 1)
+            if journal.read(1) != b"\n":
+                journal.seek(0)
+                journal.truncate(journal.read().rfind(b"\n") + 1)
+
+        journal_start = journal.seek(0, os.SEEK_END)
+        if journal_start == 0:
+            lines = [["base"] + task_file_identity("tasks.txt")] + list(lines)
+        journal.write("".join(";".join(line) + "\n" for line in lines).encode("utf-8"))
+        journal.flush()
+        os.fsync(journal.fileno())
+        return journal.tell() - journal_start, journal.tell()
+
+
+def mark_journal_folded(new_file_name):
+    """
+    This function records at the end of the journal that it has been folded
+    into the task file `new_file_name`, which is about to replace tasks.txt.
+    """
+    append_to_journal([["folded"] + task_file_identity(new_file_name)])
+
+
+def compact_journal(task_list):
+    """
+    This function folds the journal into tasks.txt by rewriting the task
+    file atomically from `task_list` and then removing the journal. The
+    journal is marked as folded before tasks.txt is replaced, so that if it
+    cannot be removed afterwards it is known to have been applied.
+    """
+    if not os.path.exists(JOURNAL_FILE):
+        update_task_file(task_list)
+        return
+
+    update_task_file(task_list, before_replace=mark_journal_folded)
+    os.remove(JOURNAL_FILE)
+
+
+def hash_file(file_name):
+    """
+    This function returns the BLAKE2b digest of a file's contents.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    with open(file_name, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+        instruments.count_bytes("read", file_name, file.tell())
+    return digest.digest()
+
+
+def write_snapshot(task_list):
+    """
+    This function writes a task list to a binary snapshot of tasks.txt.
+    The snapshot holds a fixed-width header identifying the tasks.txt it was
+    made from, a table of usernames, a packed record of user code, date
+    ordinals and flags for each task, a table of the lengths of each task's
+    title and description, and finally the text of all titles and
+    descriptions.
+    """
+    text_stat = os.stat("tasks.txt")
+    user_codes = {}
+    task_records = []
+    text_lengths = array("I")
+    text_fields = []
+    for task in task_list:
+        user_code = user_codes.setdefault(task["Username"], len(user_codes))
+        task_records.append(SNAPSHOT_TASK.pack(
+            user_code,
+            task["Due date"].toordinal(),
+            task["Assigned date"].toordinal(),
+            1 if task["completed"] else 0))
+        for text in (task["Task title"], task["Task description"]):
+            text_lengths.append(len(text))
+            text_fields.append(text)
+
+    # The temporary file is named after this process, as several sessions
+    # may refresh the snapshot at once
+    temp_file_name = f"{SNAPSHOT_FILE}.{os.getpid()}.tmp"
+    with open(temp_file_name, "wb") as snapshot_file:
+        snapshot_file.write(SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, text_stat.st_size,
+            text_stat.st_mtime_ns, len(task_records), hash_file("tasks.txt")))
+
+        snapshot_file.write(SNAPSHOT_LENGTH.pack(len(user_codes)))
+        for username in user_codes:
+            username = username.encode("utf-8")
+            snapshot_file.write(SNAPSHOT_LENGTH.pack(len(username)) + username)
+
+        snapshot_file.write(b"".join(task_records))
+        snapshot_file.write(text_lengths.tobytes())
+        snapshot_file.write("".join(text_fields).encode("utf-8"))
+        instruments.count_bytes("written", SNAPSHOT_FILE, snapshot_file.tell())
+
+    os.replace(temp_file_name, SNAPSHOT_FILE)
+
+
+def load_snapshot(task_store):
+    """
+    This function loads tasks into `task_store` from the binary snapshot,
+    which is read through mmap. It returns False without loading anything if there
+    is no snapshot, or if it does not match the size, modification time and
+    contents of tasks.txt.
+    """
+    if not os.path.exists(SNAPSHOT_FILE) or os.path.getsize(SNAPSHOT_FILE) == 0:
+        return False
+
+    text_stat = os.stat("tasks.txt")
+    with open(SNAPSHOT_FILE, "rb") as snapshot_file, \
+            mmap.mmap(snapshot_file.fileno(), 0,
+                      access=mmap.ACCESS_READ) as data:
+        instruments.count_bytes("read", SNAPSHOT_FILE, len(data))
+        try:
+            magic, version, text_size, text_mtime_ns, num_tasks, digest = \
+                SNAPSHOT_HEADER.unpack_from(data)
+            if (magic, version, text_size, text_mtime_ns) != \
+                    (SNAPSHOT_MAGIC, SNAPSHOT_VERSION, text_stat.st_size,
+                     text_stat.st_mtime_ns) \
+                    or digest != hash_file("tasks.txt"):
+                return False
+
+            # Read the table of usernames
+            offset = SNAPSHOT_HEADER.size
+            num_users, = SNAPSHOT_LENGTH.unpack_from(data, offset)
+            offset += SNAPSHOT_LENGTH.size
+            usernames = []
+            for _ in range(num_users):
+                length, = SNAPSHOT_LENGTH.unpack_from(data, offset)
+                offset += SNAPSHOT_LENGTH.size
+                usernames.append(data[offset:offset + length].decode("utf-8"))
+                offset += length
+
+            # Unpack the task records and text lengths, and decode all the
+            # text at once
+            records_end = offset + num_tasks * SNAPSHOT_TASK.size
+            task_records = SNAPSHOT_TASK.iter_unpack(data[offset:records_end])
+            text_lengths = array("I")
+            text_lengths.frombytes(
+                data[records_end:records_end + 2 * num_tasks * text_lengths.itemsize])
+            text = data[records_end + 2 * num_tasks * text_lengths.itemsize:] \
+                .decode("utf-8")
+
+            # Slice out each title and description in turn
+            text_fields = (text[start:end] for start, end in
+                           pairwise(accumulate(text_lengths, initial=0)))
+
+            dates = {}
+            snapshot_tasks = []
+            for (user_code, due_ordinal, assigned_ordinal, flags), title, \
+                    description in zip(task_records, text_fields, text_fields):
+                for ordinal in (due_ordinal, assigned_ordinal):
+                    if ordinal not in dates:
+                        dates[ordinal] = datetime.fromordinal(ordinal)
+
+                snapshot_tasks.append({
+                    "Username": usernames[user_code],
+                    "Task title": title,
+                    "Task description": description,
+                    "Due date": dates[due_ordinal],
+                    "Assigned date": dates[assigned_ordinal],
+                    "completed": bool(flags & 1)
+                })
+
+        # A damaged snapshot is treated the same as a stale one
+        except (struct.error, IndexError, UnicodeDecodeError, ValueError):
+            return False
+
+    if len(snapshot_tasks) != num_tasks:
+        return False
+
+    for task in snapshot_tasks:
+        task_store.add(task, persist=False)
+    return True
+
+
+class TextStorage:
+    """
+    This class stores tasks in tasks.txt and users in user.txt.
+    It is the default storage backend. Every backend provides the same
+    methods: `create_task_list`, `load_tasks`, `load_users`, `add_users`,
+    `save_task_change`, `save_task_changes` and `compact`.
+
+    Several sessions can share the same files. Writes are made under an
+    exclusive lock on LOCK_FILE, and if another session has changed the
+    files since this one last read or wrote them, the tasks are reloaded
+    and this session's change is applied again before it is written.
+    """
+
+    # Per-user task lists and reports are worked out in memory
+    queries_in_storage = False
+
+    def __init__(self):
+        # Size and modification time of tasks.txt and the journal as
+        # this session last saw them, and the task store they were
+        # loaded into
+        self.disk_state = None
+        self.task_store = None
+
+        # Whether the journal had already been folded into tasks.txt when
+        # the tasks were last read, so must be removed before it is written
+        self.journal_folded = False
+
+    @contextmanager
+    def locked(self, shared=False):
+        """
+        This method holds a lock on the task files for the duration of a
+        `with` block. Any number of sessions can hold a shared lock for
+        reading, while an exclusive lock is needed for writing.
+        """
+        with open(LOCK_FILE, "a", encoding="utf-8") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read_disk_state(self):
+        """
+        This method returns the size and modification time of tasks.txt
+        and of the journal, which change whenever either file is written.
+        """
+        task_stat = os.stat("tasks.txt")
+        state = [task_stat.st_size, task_stat.st_mtime_ns]
+        if os.path.exists(JOURNAL_FILE):
+            journal_stat = os.stat(JOURNAL_FILE)
+            state += [journal_stat.st_size, journal_stat.st_mtime_ns]
+        return state
+
+    def data_version(self):
+        """
+        This method returns a list identifying the tasks and users held in
+        memory: the state of the task files they were loaded from or last
+        saved to, or of the task files on disk if the tasks have not been
+        loaded, and the size and modification time of user.txt.
+        """
+        create_userfile()
+        disk_state = self.read_disk_state() if self.disk_state is None else self.disk_state
+        user_stat = os.stat("user.txt")
+        return [STORAGE_BACKEND] + disk_state + [user_stat.st_size, user_stat.st_mtime_ns]
+
+    def create_task_list(self):
+        """
+        This method returns the empty task list that `load_tasks` fills.
+        """
+        create_taskfile()
+        return ColumnarTaskList() if USE_COLUMNAR_STORE else []
+
+    def load_tasks(self, task_store):
+        """
+        This method loads the tasks into `task_store` under a shared lock.
+        Outside journal mode any journal left behind is then folded in
+        straight away.
+        """
+        self.task_store = task_store
+        with self.locked(shared=True):
+            self.read_tasks()
+
+        if not JOURNAL_MODE and os.path.exists(JOURNAL_FILE):
+            self.compact()
+
+    def read_tasks(self):
+        """
+        This method loads tasks from the binary snapshot if it is up to date.
+        Otherwise it retrieves task information from the .txt file one line
+        at a time, adding each task to the task list as it is read, and
+        refreshes the snapshot. Changes recorded in the journal are then
+        applied.
+        """
+        start = time.perf_counter()
+        if not (SNAPSHOT_MODE and load_snapshot(self.task_store)):
+            try:
+                for curr_t in read_task_file("tasks.txt"):
+                    self.task_store.add(curr_t, persist=False)
+            except ValueError as load_error:
+                print(f"\n{colors.red}{load_error}{colors.reset}")
+                raise SystemExit(1) from load_error
+
+            if SNAPSHOT_MODE:
+                write_snapshot(self.task_store.task_list)
+
+        try:
+            self.journal_folded = replay_journal(self.task_store)
+        except ValueError as journal_error:
+            print(f"\n{colors.red}{journal_error}{colors.reset}")
+            raise SystemExit(1) from journal_error
+
+        self.disk_state = self.read_disk_state()
+        instruments.record_time("load tasks", time.perf_counter() - start)
+
+    def refresh(self):
+        """
+        This method reloads the tasks if another session has changed the
+        task files, returning True if it did. It must be called while
+        holding the lock.
+        """
+        if self.read_disk_state() == self.disk_state:
+            return False
+
+        self.task_store.reset()
+        self.read_tasks()
+        return True
+
+    def load_users(self):
+        """
+        This method reads usernames and passwords from user.txt, writing one
+        with a default account if there is no user.txt, and returns them as
+        a dictionary.
+        """
+        create_userfile()
+
+        users = {}
+        with open("user.txt", "r", encoding="utf-8") as user_file:
+            for line in user_file:
+                line = line.rstrip("\n")
+                if line:
+                    username, password = line.split(";")
+                    users[username] = password
+            instruments.count_bytes("read", "user.txt", os.fstat(user_file.fileno()).st_size)
+        return users
+
+    def add_users(self, new_users):
+        """
+        This method adds a dictionary of new usernames and passwords to the
+        end of user.txt, and returns every user now in the file.
+        user.txt is read again under the lock first, so a username that
+        another session has registered in the meantime raises a ValueError
+        and nothing is written.
+        """
+        user_lines = "".join(f"\n{username};{password}"
+                             for username, password in new_users.items())
+        with self.locked():
+            saved_users = self.load_users()
+            for username in new_users:
+                if username in saved_users:
+                    raise ValueError(f"{username} is already in use!")
+
+            with open("user.txt", "a", encoding="utf-8") as output_file:
+                output_file.write(user_lines)
+        instruments.count_bytes("written", "user.txt", len(user_lines.encode("utf-8")))
+
+        saved_users.update(new_users)
+        return saved_users
+
+    def save_task_change(self, record):
+        """
+        This method saves a single task change.
+        """
+        self.save_task_changes([record])
+
+    def save_task_changes(self, records):
+        """
+        This method saves a list of task changes in one write.
+        If another session has changed the task files, the tasks are
+        reloaded and the changes are applied again first, so that task IDs
+        match what is on disk. In journal mode the changes are then appended
+        to the journal file as semicolon separated records, otherwise the
+        whole task file is rewritten.
+        """
+        with self.locked():
+            # The tasks the batch adds are the last ones in memory
+            first_added_id = len(self.task_store.task_list) - \
+                sum(record[0] == "add" for record in records)
+            if self.refresh():
+                self.task_store.apply_changes(records, first_added_id)
+
+            if not JOURNAL_MODE:
+                update_task_file(self.task_store.task_list)
+                self.disk_state = self.read_disk_state()
+                return
+
+            # A journal already folded into tasks.txt is finished with, and
+            # a new one is started in its place
+            if self.journal_folded:
+                os.remove(JOURNAL_FILE)
+                self.journal_folded = False
+
+            bytes_written, journal_size = append_to_journal(records)
+            instruments.count_bytes("written", JOURNAL_FILE, bytes_written)
+            self.disk_state = self.read_disk_state()
+
+        # Fold the journal back into tasks.txt once it grows too large
+        if journal_size >= JOURNAL_COMPACT_SIZE:
+            self.compact()
+
+    def compact(self):
+        """
+        This method folds the journal back into tasks.txt, first picking
+        up any changes made by other sessions.
+        """
+        with self.locked():
+            self.refresh()
+            compact_journal(self.task_store.task_list)
+            self.journal_folded = False
+            self.disk_state = self.read_disk_state()
+
+
+class WriteBehindStorage:
+    """
+    This class wraps a storage backend so that task changes are saved by a
+    background thread. Changes are queued, and once no further change has
+    arrived for WRITE_BEHIND_DELAY seconds they are saved together in one
+    write. Everything else is passed straight through to the backend.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.pending = []
+        self.last_change = 0
+        self.changed = threading.Condition(task_list_lock)
+
+        # Time taken by each flush, in seconds, and the number of
+        # changes saved
+        self.flush_times = []
+        self.changes_saved = 0
+
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def save_task_change(self, record):
+        """
+        This method queues a task change to be saved by the background
+        thread.
+        """
+        with self.changed:
+            self.pending.append(record)
+            self.last_change = time.monotonic()
+            self.changed.notify()
+
+    def save_task_changes(self, records):
+        """
+        This method queues a list of task changes to be saved by the
+        background thread.
+        """
+        with self.changed:
+            self.pending.extend(records)
+            self.last_change = time.monotonic()
+            self.changed.notify()
+
+    def data_version(self):
+        """
+        This method saves any queued changes, so that they are included,
+        and returns the backend's data version.
+        """
+        self.flush()
+        return self.backend.data_version()
+
+    def run(self):
+        """
+        This method is run by the background thread. It waits for changes,
+        then for a pause in them, and then flushes.
+        """
+        with self.changed:
+            while True:
+                while not self.pending:
+                    self.changed.wait()
+
+                remaining = self.last_change + WRITE_BEHIND_DELAY - time.monotonic()
+                while remaining > 0:
+                    self.changed.wait(remaining)
+                    remaining = self.last_change + WRITE_BEHIND_DELAY - time.monotonic()
+
+                # If the changes cannot be saved, such as when the disk is
+                # full, they stay queued and are tried again after a pause
+                try:
+                    self.flush()
+                except Exception as flush_error:
+                    print(f"\n{colors.red}Task changes could not be saved "
+                          f"({flush_error!r}) - trying again in "
+                          f"{WRITE_BEHIND_RETRY_DELAY} seconds.{colors.reset}")
+                    self.changed.wait(WRITE_BEHIND_RETRY_DELAY)
+
+    def flush(self):
+        """
+        This method saves all queued changes now.
+        """
+        with self.changed:
+            if not self.pending:
+                return
+
+            start = time.perf_counter()
+            self.backend.save_task_changes(self.pending)
+            self.flush_times.append(time.perf_counter() - start)
+            self.changes_saved += len(self.pending)
+            self.pending = []
+
+    def print_flush_report(self):
+        """
+        This method prints how many flushes were made and how long they took.
+        """
+        if not self.flush_times:
+            return
+
+        print(f"\nSaved {self.changes_saved} task changes in "
+              f"{len(self.flush_times)} flushes "
+              f"(average {1000 * sum(self.flush_times) / len(self.flush_times):.1f} ms, "
+              f"longest {1000 * max(self.flush_times):.1f} ms).")
+
+
+class Instrumentation:
+    """
+    This class records how long operations take and how many bytes each
+    file has had read from it and written to it. Nothing is recorded unless
+    it is enabled.
+    The time taken by each kind of operation is kept as a histogram of
+    counts in the STATS_BUCKETS_MS ranges, along with the count, total,
+    shortest and longest times, so memory use does not grow over a session.
+    """
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.started = datetime.now()
+        self.timings = {}
+        self.bytes_read = {}
+        self.bytes_written = {}
+
+        # Saves made by the write-behind thread are recorded too
+        self.lock = threading.Lock()
+
+    def record_time(self, name, seconds):
+        """
+        This method records that an operation took the given number of
+        seconds.
+        """
+        if not self.enabled:
+            return
+
+        with self.lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = {
+                    "count": 0, "total": 0.0, "min": seconds, "max": seconds,
+                    "buckets": [0] * (len(STATS_BUCKETS_MS) + 1)
+                }
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["min"] = min(timing["min"], seconds)
+            timing["max"] = max(timing["max"], seconds)
+            timing["buckets"][bisect_left(STATS_BUCKETS_MS, 1000 * seconds)] += 1
+
+    def count_bytes(self, direction, file_name, num_bytes):
+        """
+        This method adds to the bytes "read" from or "written" to a file.
+        """
+        if not self.enabled:
+            return
+
+        with self.lock:
+            counts = self.bytes_read if direction == "read" else self.bytes_written
+            counts[file_name] = counts.get(file_name, 0) + num_bytes
+
+    def summary(self):
+        """
+        This method returns everything recorded as a dictionary that can be
+        saved as JSON. Times are given in milliseconds.
+        """
+        bucket_names = [f"<={limit}ms" for limit in STATS_BUCKETS_MS] + \
+            [f">{STATS_BUCKETS_MS[-1]}ms"]
+        with self.lock:
+            return {
+                "started": self.started.isoformat(timespec="seconds"),
+                "duration_ms": round((datetime.now() - self.started)
+                                     .total_seconds() * 1000, 3),
+                "pid": os.getpid(),
+                "settings": {name: value for name, value in os.environ.items()
+                             if name.startswith("TASK_MANAGER_")},
+                "timings": {
+                    name: {
+                        "count": timing["count"],
+                        "total_ms": round(1000 * timing["total"], 3),
+                        "mean_ms": round(1000 * timing["total"] / timing["count"], 3),
+                        "min_ms": round(1000 * timing["min"], 3),
+                        "max_ms": round(1000 * timing["max"], 3),
+                        "histogram": {bucket_name: count for bucket_name, count
+                                      in zip(bucket_names, timing["buckets"])
+                                      if count}
+                    }
+                    for name, timing in self.timings.items()
+                },
+                "bytes_read": dict(self.bytes_read),
+                "bytes_written": dict(self.bytes_written)
+            }
+
+    def dump(self):
+        """
+        This method appends the summary of this session to STATS_FILE as a
+        single line of JSON, so the file builds up one line per session.
+        """
+        if not self.enabled:
+            return
+
+        with open(STATS_FILE, "a", encoding="utf-8") as stats_file:
+            stats_file.write(json.dumps(self.summary()) + "\n")
+
+
+def save_search_index():
+    """
+    This function saves the search index of the main task store, if it
+    has changed.
+    """
+    tasks.save_search_index()
 
 
-def gen_task_overview():
+def save_profile(profiler):
+    """
+    This function stops a session's profiler and saves its statistics to
+    PROFILE_FILE, where they can be read with `python -m pstats`.
+    """
+    profiler.disable()
+    profiler.dump_stats(PROFILE_FILE)
+
+
+def handle_exit_signal(signal_number, frame):
+    """
+    This function is called on SIGINT or SIGTERM. It exits the program
+    normally, so that queued task changes are flushed by `atexit`.
+    """
+    raise SystemExit(128 + signal_number)
+
+
+def gen_task_overview(now=None, report_counts=None, total_tasks=None):
     """
     This function generates a summary of task completion status
     This is then written to a text file.
+    Overdue tasks are counted as of `now`, which defaults to the current time.
+    The report counts of each user and the total number of tasks can be
+    passed in; otherwise they are taken from the task store.
     """
+    if now is None:
+        now = datetime.today()
+    if report_counts is None:
+        report_counts, total_tasks = tasks.get_report_counts(now), len(tasks.task_list)
+
     # Declare variables and initialize to 0
     completed_tasks = 0
     uncompleted_tasks = 0
     overdue_tasks = 0
 
-    # For each task, update variables accordingly
-    for task in task_list:
-        if task["completed"]:
-            completed_tasks += 1
-        elif datetime.today() > task["Due date"]:
-            uncompleted_tasks += 1
-            overdue_tasks += 1
-        else:
-            uncompleted_tasks += 1
+    # Add up the report counters of each user
+    for user_completed, user_uncompleted, user_overdue in \
+            report_counts.values():
+        completed_tasks += user_completed
+        uncompleted_tasks += user_uncompleted
+        overdue_tasks += user_overdue
 
     # Calculate percentages for each variable
-    total_tasks = len(task_list)
     try:
         percent_complete = (completed_tasks / total_tasks) * 100
         percent_incomplete = (uncompleted_tasks / total_tasks) * 100
@@ -317,7 +1979,7 @@ def gen_task_overview():
         percent_complete = percent_incomplete = percent_overdue = 0
 
     # Write information to a text file
-    date_time = datetime.today().strftime(DATETIME_STRING_FORMAT + " %H:%M")
+    date_time = now.strftime(DATETIME_STRING_FORMAT + " %H:%M")
 
     with open("task_overview.txt", "w", encoding="utf-8") as report_file:
         report_file.write("TASK OVERVIEW\n" + date_time + "\n" + "_" * 13 +
@@ -331,19 +1993,25 @@ def gen_task_overview():
                           f"({percent_overdue:.1f}%)")
 
 
-def gen_user_overview():
+def gen_user_overview(now=None, report_counts=None, total_tasks=None):
     """
     This function generates an overview of the tasks assigned to each user.
     Information displayed include completion status, overdue tasks, etc.
     This is then written to a text file.
+    Overdue tasks are counted as of `now`, which defaults to the current time.
+    The report counts of each user and the total number of tasks can be
+    passed in; otherwise they are taken from the task store.
     """
+    if now is None:
+        now = datetime.today()
+    if report_counts is None:
+        report_counts, total_tasks = tasks.get_report_counts(now), len(tasks.task_list)
 
-    # Retrieve the total number of users and tasks
+    # Retrieve the total number of users
     # Write the general information to a text file
-    total_users = len(username_password)
-    total_tasks = len(task_list)
+    total_users = len(users.username_password)
 
-    date_time = datetime.today().strftime(DATETIME_STRING_FORMAT + " %H:%M")
+    date_time = now.strftime(DATETIME_STRING_FORMAT + " %H:%M")
 
     with open("user_overview.txt", "w", encoding="utf-8") as report_file:
         report_file.write("USER OVERVIEW\n" + date_time + "\n" + "_" * 13 +
@@ -352,30 +2020,14 @@ def gen_user_overview():
         report_file.write(f"\nTotal number of tasks = {total_tasks}")
 
         # Perform calculations for each user
-        for current_user in sorted(username_password):
+        for current_user in sorted(users.username_password):
 
-            # Create a list of tasks assigned to the current user in the
-            # loop
-            user_task_list = [task for task in task_list if task["Username"]
-                              == current_user]
+            # Look up the report counters of the current user in the loop
+            completed_tasks, uncompleted_tasks, overdue_tasks = \
+                report_counts.get(current_user, (0, 0, 0))
 
             # Retrieve total number of tasks for that user
-            user_total_tasks = len(user_task_list)
-
-            # Set variables to 0
-            completed_tasks = 0
-            uncompleted_tasks = 0
-            overdue_tasks = 0
-
-            # For each task, update variables accordingly
-            for user_task in user_task_list:
-                if user_task["completed"]:
-                    completed_tasks += 1
-                elif datetime.today() > user_task["Due date"]:
-                    uncompleted_tasks += 1
-                    overdue_tasks += 1
-                else:
-                    uncompleted_tasks += 1
+            user_total_tasks = completed_tasks + uncompleted_tasks
 
             # Calculate percentages for each variable
             try:
@@ -401,6 +2053,318 @@ def gen_user_overview():
                               f"{overdue_tasks} ({percent_overdue:.1f}%)")
 
 
+def generate_reports(force=False):
+    """
+    This function writes the task and user overview reports, returning
+    True, unless the reports were already written today from the same
+    tasks and users and have not been changed since, in which case it
+    returns False. Set `force` to write them regardless.
+    """
+    now = datetime.today()
+
+    # If the tasks have not been loaded yet, parallel reports count them
+    # straight from tasks.txt instead, under a shared lock so that other
+    # sessions cannot change it in the meantime
+    from_disk = use_parallel_reports() and not tasks.loaded
+    if from_disk:
+        create_taskfile()
+    with tasks.storage.locked(shared=True) if from_disk else nullcontext():
+        if not from_disk:
+            tasks.load()
+
+        # The reports are up to date if the tasks and users, the date (which
+        # decides which tasks are overdue) and the report files themselves
+        # are all as they were when the reports were last written
+        cache_key = {
+            "data version": tasks.storage.data_version(),
+            "date": format_date(now)
+        }
+        if not force:
+            try:
+                with open(REPORT_CACHE_FILE, "r", encoding="utf-8") as cache_file:
+                    report_cache = json.load(cache_file)
+                if report_cache == dict(cache_key, reports=report_file_states()):
+                    return False
+            except (OSError, ValueError):
+                pass
+
+        if from_disk:
+            try:
+                report_counts, total_tasks = count_task_file("tasks.txt", now, REPORT_WORKERS)
+            except ValueError as count_error:
+                print(f"\n{colors.red}{count_error}{colors.reset}")
+                raise SystemExit(1) from count_error
+        else:
+            report_counts, total_tasks = tasks.get_report_counts(now), len(tasks.task_list)
+
+        gen_task_overview(now, report_counts, total_tasks)
+        gen_user_overview(now, report_counts, total_tasks)
+
+        with open(REPORT_CACHE_FILE, "w", encoding="utf-8") as cache_file:
+            json.dump(dict(cache_key, reports=report_file_states()), cache_file)
+    return True
+
+
+def use_parallel_reports():
+    """
+    This function returns True if reports are to be counted from tasks.txt
+    by REPORT_WORKERS worker processes. This needs text storage outside
+    journal mode with no journal left to fold in, so that tasks.txt holds
+    every task as it is.
+    """
+    return (REPORT_WORKERS > 1 and STORAGE_BACKEND == "text" and not JOURNAL_MODE
+            and not os.path.exists(JOURNAL_FILE))
+
+
+def count_task_file(file_name, now, workers):
+    """
+    This function counts the completed, uncompleted and overdue tasks of
+    each user in a task file, returning them in the form of
+    `TaskStore.get_report_counts` along with the total number of tasks.
+    The file is split into chunks of whole lines which are counted by
+    `workers` worker processes, and the counts of each chunk are added up.
+    A malformed line raises a ValueError giving its line number, as when
+    the tasks are loaded.
+    """
+    start = time.perf_counter()
+    chunks = find_task_file_chunks(file_name, workers * REPORT_CHUNKS_PER_WORKER)
+    now_ordinal = now.toordinal()
+
+    # A small file is counted here, as starting worker processes would
+    # take longer than counting it
+    if len(chunks) == 1:
+        chunk_results = [count_task_chunk(file_name, *chunks[0], now_ordinal)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_results = list(executor.map(
+                count_task_chunk, [file_name] * len(chunks),
+                *zip(*chunks), [now_ordinal] * len(chunks)))
+
+    # Add up the counts of each chunk, in order, so that the first
+    # malformed line is reported with its line number in the whole file
+    report_counts = {}
+    total_tasks = 0
+    lines_before = 0
+    for chunk_counts, chunk_tasks, chunk_lines, chunk_error in chunk_results:
+        if chunk_error is not None:
+            line_number, message = chunk_error
+            raise ValueError(f"{file_name} line {lines_before + line_number}: {message}")
+
+        for user, (completed, uncompleted, overdue) in chunk_counts.items():
+            user_completed, user_uncompleted, user_overdue = \
+                report_counts.get(user, (0, 0, 0))
+            report_counts[user] = (user_completed + completed,
+                                   user_uncompleted + uncompleted,
+                                   user_overdue + overdue)
+        total_tasks += chunk_tasks
+        lines_before += chunk_lines
+
+    if chunks:
+        instruments.count_bytes("read", file_name, chunks[-1][1])
+    instruments.record_time("count task file", time.perf_counter() - start)
+    return report_counts, total_tasks
+
+
+def find_task_file_chunks(file_name, num_chunks):
+    """
+    This function splits a task file into at most `num_chunks` chunks of
+    whole lines, no smaller than REPORT_MIN_CHUNK_SIZE bytes unless the
+    file is, and returns the start and end byte offsets of each chunk.
+    """
+    file_size = os.path.getsize(file_name)
+    if file_size == 0:
+        return []
+    num_chunks = max(1, min(num_chunks, file_size // REPORT_MIN_CHUNK_SIZE))
+
+    # Move each evenly spaced offset on to the start of the next line
+    offsets = [0]
+    with open(file_name, "rb") as task_file:
+        for chunk in range(1, num_chunks):
+            task_file.seek(max(file_size * chunk // num_chunks, offsets[-1]))
+            task_file.readline()
+            if task_file.tell() >= file_size:
+                break
+            offsets.append(task_file.tell())
+    offsets.append(file_size)
+    return list(pairwise(offsets))
+
+
+def count_task_chunk(file_name, start, end, now_ordinal):
+    """
+    This function is run by the worker processes of `count_task_file`.
+    It counts the completed, uncompleted and overdue tasks of each user in
+    the lines of a task file between two byte offsets, and returns the
+    counts, the number of tasks and the number of lines. Lines are split
+    and decoded as `read_task_file` does. If a line is malformed, counting
+    stops and its line number within the chunk and the problem are
+    returned as well.
+    """
+    user_counts = {}
+    num_tasks = 0
+    line_number = 0
+    with open(file_name, "rb") as task_file:
+        task_file.seek(start)
+        position = start
+        while position < end:
+            # Read up to REPORT_BLOCK_SIZE bytes at a time, finishing the
+            # last line, so memory use does not grow with the chunk
+            block = task_file.read(min(REPORT_BLOCK_SIZE, end - position))
+            if position + len(block) < end:
+                block += task_file.readline()
+            position += len(block)
+
+            for line in io.StringIO(block.decode("utf-8"), newline=None):
+                line_number += 1
+                line = line.rstrip("\n")
+                if not line:
+                    continue
+
+                try:
+                    task = parse_task(line.split(";"))
+                except ValueError as error:
+                    return user_counts, num_tasks, line_number, (line_number, str(error))
+
+                count_report_task(user_counts, task, now_ordinal)
+                num_tasks += 1
+
+    return user_counts, num_tasks, line_number, None
+
+
+def count_report_task(user_counts, task: dict, now_ordinal):
+    """
+    This function adds a task to a dictionary mapping each user to a list
+    of their completed, uncompleted and overdue task counts. Tasks are
+    overdue once their due date is on or before the date `now_ordinal`.
+    """
+    counts = user_counts.setdefault(task["Username"], [0, 0, 0])
+    if task["completed"]:
+        counts[0] += 1
+    else:
+        counts[1] += 1
+        if task["Due date"].toordinal() <= now_ordinal:
+            counts[2] += 1
+
+
+def count_shard_file(file_name, now_ordinal):
+    """
+    This function counts the completed, uncompleted and overdue tasks of
+    each user in a shard file. It is run in a worker process when shards
+    are counted in parallel, so is kept here, where worker processes can
+    import it without importing sharded_storage.py first.
+    """
+    from sharded_storage import read_shard_file
+
+    user_counts = {}
+    for _, task in read_shard_file(file_name):
+        count_report_task(user_counts, task, now_ordinal)
+    return user_counts
+
+
+def stream_report_counts(now):
+    """
+    This function counts the completed, uncompleted and overdue tasks of
+    each user straight from the task files, returning them in the form of
+    `TaskStore.get_report_counts` along with the total number of tasks.
+    Only the counts are kept in memory: tasks.txt is read one line at a
+    time, with any changes recorded in the journal applied to each task as
+    it is read, or is counted by worker processes if parallel reports are
+    turned on and there is no journal. It must be called while holding the
+    lock.
+    """
+    if use_parallel_reports():
+        return count_task_file("tasks.txt", now, REPORT_WORKERS)
+
+    start = time.perf_counter()
+    user_counts = {}
+    total_tasks = 0
+    now_ordinal = now.toordinal()
+    for task in stream_tasks():
+        count_report_task(user_counts, task, now_ordinal)
+        total_tasks += 1
+
+    instruments.record_time("stream report counts", time.perf_counter() - start)
+    return ({user: tuple(counts) for user, counts in user_counts.items()},
+            total_tasks)
+
+
+def stream_tasks():
+    """
+    This generator yields every task in order of ID straight from the task
+    files: those in tasks.txt one line at a time, each with any changes
+    recorded in the journal applied, followed by those the journal adds.
+    """
+    # Group the journal's changes by task, so each task can be brought up
+    # to date as it is read. Added tasks follow those in tasks.txt.
+    task_changes = {}
+    added_tasks = []
+    for record in read_journal_records() or []:
+        if record[0] == "add":
+            added_tasks.append(parse_task(record[1:]))
+        else:
+            task_changes.setdefault(int(record[1]), []).append(record)
+
+    for task_id, task in enumerate(chain(read_task_file("tasks.txt"), added_tasks)):
+        for record in task_changes.get(task_id, ()):
+            apply_task_change(task, record)
+        yield task
+
+
+def apply_task_change(task: dict, record):
+    """
+    This function applies a journal record that changes an existing task
+    to that task's dictionary.
+    """
+    if record[0] == "complete":
+        task["completed"] = True
+    elif record[0] == "reassign":
+        task["Username"] = record[2]
+    elif record[0] == "due":
+        task["Due date"] = parse_date(record[2])
+
+
+def stream_reports():
+    """
+    This function generates the task and user overview reports and
+    displays the statistics without logging in or loading the tasks, so
+    memory use depends on the number of users rather than of tasks. With
+    text storage tasks.txt is read once, by `stream_report_counts`; with
+    SQLite or sharded storage the storage does the counting.
+    """
+    now = datetime.today()
+    if storage.queries_in_storage:
+        report_counts, total_tasks = tasks.get_report_counts(now), len(tasks.task_list)
+
+    else:
+        create_taskfile()
+        with storage.locked(shared=True):
+            try:
+                report_counts, total_tasks = stream_report_counts(now)
+            except ValueError as count_error:
+                print(f"\n{colors.red}{count_error}{colors.reset}")
+                raise SystemExit(1) from count_error
+
+    gen_task_overview(now, report_counts, total_tasks)
+    gen_user_overview(now, report_counts, total_tasks)
+    print(f"\n{colors.green}Reports generated in local directory.{colors.reset}")
+    print_stats(len(users.username_password), total_tasks,
+                summarize_report_counts(report_counts))
+
+
+def report_file_states():
+    """
+    This function returns the size and modification time of each report
+    file, or None for a report that does not exist.
+    """
+    report_states = {}
+    for file_name in REPORT_FILES:
+        try:
+            file_stat = os.stat(file_name)
+            report_states[file_name] = [file_stat.st_size, file_stat.st_mtime_ns]
+        except FileNotFoundError:
+            report_states[file_name] = None
+    return report_states
+
+
 def create_taskfile():
     """
     The function `create_taskfile` creates a new file named "tasks.txt" 
@@ -421,159 +2385,748 @@ def create_userfile():
             default_file.write("admin;password")
 
 
-def count_lines(file):
+def count_lines(file_name):
     """
-    The function `count_lines` takes a file as input and returns the 
-    number of non-empty lines in the file.
-    
-    :param file: The `count_lines` function you provided takes a file 
-    object as input and counts the number of non-empty lines in the 
-    file. The function iterates over each line in the file and 
-    increments the `num_lines` counter if the line is not empty (i.e., 
-    not equal to "\n")
-    :return: The function `count_lines` returns the number of non-empty
-    lines in the file.
+    The function `count_lines` returns the number of non-empty lines in
+    a file. The file is read in blocks of LINE_COUNT_BLOCK_SIZE bytes,
+    each split at its line breaks in one go, rather than a line at a time.
     """
     num_lines = 0
-    for line in file:
-        if line != "\n":
-            num_lines += 1
-    return num_lines
+    partial_line = b""
+    with open(file_name, "rb") as line_file:
+        while block := line_file.read(LINE_COUNT_BLOCK_SIZE):
+            lines = (partial_line + block).split(b"\n")
+            partial_line = lines.pop()
+            num_lines += len(lines) - lines.count(b"")
+        instruments.count_bytes("read", file_name, line_file.tell())
+    return num_lines + (partial_line != b"")
 
 
 def display_stats():
     """
-    The `display_stats` function reads the number of users and tasks 
-    from text files and displays the statistics.
+    The `display_stats` function displays the number of users and tasks
+    along with statistics on the tasks, taken from the users and tasks held
+    in memory and the counters kept up to date as they change, rather than
+    from the text files. In verify mode the numbers of users and tasks are
+    then checked against the files.
+    SQLite and sharded storage keep no such counters: the database counts
+    the tasks with queries, while sharded storage counts every shard each
+    time, reading those not yet loaded from their files.
     """
-    # Create tasks.txt and user.txt if they don't exist
+    num_users = len(users.username_password)
+    num_tasks = len(tasks.task_list)
+    print_stats(num_users, num_tasks, tasks.get_stats(datetime.today()))
+
+    if VERIFY_STATS_MODE:
+        verify_stats(num_users, num_tasks)
+
+
+def verify_stats(num_users, num_tasks):
+    """
+    This function counts the users and tasks in the files, and reports
+    whether they match the numbers displayed. They differ if another
+    session has changed the files since this one read them.
+    """
+    if USE_SQLITE_STORAGE:
+        print(f"\n{colors.yellow}Statistics are not checked against the database.{colors.reset}")
+        return
+
+    # Save any queued changes first, so that the files are up to date
+    if isinstance(storage, WriteBehindStorage):
+        storage.flush()
+
     create_userfile()
     create_taskfile()
+    with storage.locked(shared=True):
+        file_users = count_lines("user.txt")
+        if USE_SHARDED_STORAGE:
+            from sharded_storage import read_manifest
 
-    # Count number of users and tasks listed in the .txt files
-    with open("user.txt", "r", encoding="utf-8") as users:
-        num_users = count_lines(users)
+            file_tasks = sum(count_lines(os.path.join(SHARD_FOLDER, file_name))
+                             for file_name in read_manifest()["shards"])
+        else:
+            file_tasks = count_lines("tasks.txt") + sum(
+                record[0] == "add" for record in read_journal_records() or [])
+
+    for name, shown, counted in (("users", num_users, file_users),
+                                 ("tasks", num_tasks, file_tasks)):
+        if shown == counted:
+            print(f"{colors.green}Number of {name} matches the files.{colors.reset}")
+        else:
+            print(f"{colors.red}Number of {name} does not match the files "
+                  f"({counted} in the files) - another session may have "
+                  f"changed them.{colors.reset}")
+
+
+def summarize_report_counts(report_counts):
+    """
+    This function returns a dictionary of the total completed, uncompleted
+    and overdue tasks in report counts (see `TaskStore.get_report_counts`),
+    along with the username and number of tasks of the user with the most
+    tasks and of the user with the most overdue tasks, or None if no user
+    has any.
+    """
+    task_stats = {"completed": 0, "uncompleted": 0, "overdue": 0,
+                  "most tasks": None, "most overdue": None}
+    for user, (completed, uncompleted, overdue) in report_counts.items():
+        task_stats["completed"] += completed
+        task_stats["uncompleted"] += uncompleted
+        task_stats["overdue"] += overdue
+        for stat, count in (("most tasks", completed + uncompleted),
+                            ("most overdue", overdue)):
+            # Ties go to the first username in alphabetical order
+            if count and (task_stats[stat] is None
+                          or [-count, user] < [-task_stats[stat][1], task_stats[stat][0]]):
+                task_stats[stat] = [user, count]
+    return task_stats
+
+
+def count_task_ages(open_task_dates, now):
+    """
+    This function returns the number of uncompleted tasks assigned within
+    each number of days in OPEN_TASK_AGE_DAYS of `now`, not counting those
+    in an earlier range, followed by the number assigned longer ago, given
+    the number of uncompleted tasks assigned on each date.
+    """
+    age_counts = [0] * (len(OPEN_TASK_AGE_DAYS) + 1)
+    now_ordinal = now.toordinal()
+    for assigned_ordinal, count in open_task_dates.items():
+        age_counts[bisect_left(OPEN_TASK_AGE_DAYS, now_ordinal - assigned_ordinal)] += count
+    return age_counts
 
-    with open("tasks.txt", "r", encoding="utf-8") as tasks:
-        num_tasks = count_lines(tasks)
 
-    # Display statistics
+def print_stats(num_users, num_tasks, task_stats=None):
+    """
+    This function displays the number of users and tasks, followed by the
+    statistics in `task_stats` (see `TaskStore.get_stats`) if given. The age
+    ranges of uncompleted tasks are only shown if included.
+    """
     print("\n-----------------------------------")
     print(f"Number of users: \t\t {num_users}")
     print(f"Number of tasks: \t\t {num_tasks}")
+    if task_stats is not None:
+        print(f"Completed tasks: \t\t {task_stats['completed']}")
+        print(f"Uncompleted tasks: \t\t {task_stats['uncompleted']}")
+        print(f"Overdue tasks: \t\t\t {task_stats['overdue']}")
+        for stat, label in (("most tasks", "Most tasks"), ("most overdue", "Most overdue")):
+            if task_stats[stat] is not None:
+                user, count = task_stats[stat]
+                print(f"{label}: \t\t\t {user} ({count})")
+
+        if "open task ages" in task_stats:
+            print("Uncompleted tasks by age:")
+            first_day = 0
+            for last_day, count in zip(OPEN_TASK_AGE_DAYS, task_stats["open task ages"]):
+                print(f"  {first_day}-{last_day} days: \t\t\t {count}")
+                first_day = last_day + 1
+            print(f"  Over {OPEN_TASK_AGE_DAYS[-1]} days: \t\t {task_stats['open task ages'][-1]}")
     print("-----------------------------------")
 
 
-DATETIME_STRING_FORMAT = "%Y-%m-%d"
+def login():
+    """
+    This function asks for a username and password until they match a
+    registered user, and returns the username.
+    """
+    username_password = users.username_password
+    while True:
+        print("\nLOGIN")
+        curr_user = input("Username: ")
+        curr_pass = input("Password: ")
+
+        # Check that username exists
+        if curr_user not in username_password:
+            print(f"\n{colors.red}User does not exist.{colors.reset}")
+            continue
+
+        # Check that password matches
+        if username_password[curr_user] != curr_pass:
+            print(f"\n{colors.red}Wrong password{colors.reset}")
+            continue
+
+        # If checks pass, return the logged in user
+        print(f"\n{colors.green}Login Successful!{colors.reset}")
+        return curr_user
+
+
+def migrate_to_sqlite():
+    """
+    This function copies the tasks and users in the text files into the
+    SQLite database, replacing anything already in it.
+    """
+    from sqlite_storage import SQLiteStorage
+
+    text_storage = TextStorage()
+    text_tasks = TaskStore(text_storage)
+    text_users = UserStore(text_storage)
+    SQLiteStorage(SQLITE_FILE).import_data(text_tasks.task_list,
+                                           text_users.username_password)
+    print(f"\n{colors.green}Copied {len(text_tasks.task_list)} tasks and "
+          f"{len(text_users.username_password)} users into "
+          f"{SQLITE_FILE}.{colors.reset}")
+
+
+def read_bulk_file(file_name, fields):
+    """
+    This function reads records from a CSV file (with a header row) or a
+    JSONL file (one JSON object per line), one at a time. It yields the
+    line number of each record, a dictionary of the given fields, and an
+    error message if the line could not be read (otherwise None).
+    """
+    with open(file_name, "r", newline="", encoding="utf-8") as bulk_file:
+        if file_name.endswith(".jsonl"):
+            records = ((line_number, line)
+                       for line_number, line in enumerate(bulk_file, 1)
+                       if line.strip())
+            for line_number, line in records:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as json_error:
+                    yield line_number, None, f"invalid JSON ({json_error.msg})"
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, None, "expected a JSON object"
+                    continue
+                yield line_number, {field: record.get(field) for field in fields}, None
+
+        else:
+            reader = csv.DictReader(bulk_file)
+            for record in reader:
+                yield reader.line_num, {field: record.get(field) for field in fields}, None
 
-# Create tasks.txt if it doesn't exist
-create_taskfile()
-
-# Retrieve task information from the .txt file
-with open("tasks.txt", 'r', encoding="utf-8") as task_file:
-    task_data = task_file.read().split("\n")
-    task_data = [t for t in task_data if t != ""]
-
-task_list = []
-
-# Reorganise each task string in the task data list into a dictionary
-for t_str in task_data:
-    curr_t = {}
-
-    # Split by semicolon and manually add each component
-    task_components = t_str.split(";")
-    curr_t["Username"] = task_components[0]
-    curr_t["Task title"] = task_components[1]
-    curr_t["Task description"] = task_components[2]
-    curr_t["Due date"] = datetime.strptime(task_components[3],
-                                           DATETIME_STRING_FORMAT)
-    curr_t["Assigned date"] = datetime.strptime(task_components[4],
-                                                DATETIME_STRING_FORMAT)
-    curr_t["completed"] = task_components[5] == "Yes"
-
-    # Add dictionary to a task list
-    task_list.append(curr_t)
-
-# =====Login Section=====
-# This code reads usernames and password from the user.txt file to allow
-# a user to login
-
-# If no user.txt file, write one with a default account
-create_userfile()
-
-# Read in user data
-with open("user.txt", 'r', encoding="utf-8") as user_file:
-    login_data = user_file.read().split("\n")
-
-# Convert to a dictionary
-username_password = {}
-for user in login_data:
-    username, password = user.split(';')
-    username_password[username] = password
-
-# Request login information from user
-LOGGED_IN = False
-while not LOGGED_IN:
-    print("\nLOGIN")
-    curr_user = input("Username: ")
-    curr_pass = input("Password: ")
-
-    # Check that username exists
-    if curr_user not in username_password:
-        print(f"\n{colors.red}User does not exist.{colors.reset}")
-        continue
-
-    # Check that password matches
-    if username_password[curr_user] != curr_pass:
-        print(f"\n{colors.red}Wrong password{colors.reset}")
-        continue
-
-    # If checks pass, exit loop
-    print(f"\n{colors.green}Login Successful!{colors.reset}")
-    LOGGED_IN = True
-
-while True:
-    # Present the menu to the user and request selection
-    menu = input('''\nTASK MANAGER MENU
-r - Register a user
-a - Add a task
-va - View all tasks
-vm - View my tasks
-gr - Generate reports
-ds - Display statistics
-e - Exit
-\nWhat would you like to do?: ''').lower().strip()
 
-    if menu == "r":
-        reg_user()
+def write_bulk_file(file_name, fields, records):
+    """
+    This function writes dictionaries of the given fields to a CSV file
+    (with a header row) or a JSONL file, one record at a time, and returns
+    the number of records written.
+    """
+    count = 0
+    with open(file_name, "w", newline="", encoding="utf-8") as bulk_file:
+        if file_name.endswith(".jsonl"):
+            for record in records:
+                bulk_file.write(json.dumps(record) + "\n")
+                count += 1
+
+        else:
+            writer = csv.DictWriter(bulk_file, fields)
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+                count += 1
+    return count
+
+
+def check_text_field(record, field):
+    """
+    This function returns an error message if a text field of a record is
+    missing, or contains a character the task and user files cannot hold.
+    """
+    value = record[field]
+    if value is None or value == "":
+        return f"missing {field}"
+    if not isinstance(value, str):
+        return f"{field} must be text"
+    if ";" in value or "\n" in value or "\r" in value:
+        return f"{field} cannot contain semicolons or line breaks"
+    return None
+
+
+def validate_task_batch(batch, username_password):
+    """
+    This function checks a batch of imported task records, as read by
+    `read_bulk_file`. It returns the task dictionaries of the valid records
+    and a list of error messages for the rest.
+    """
+    new_tasks = []
+    errors = []
+    unknown_users = {record["username"] for _, record, _ in batch
+                     if record and isinstance(record["username"], str)} - \
+        username_password.keys()
+    today = date.today()
+
+    for line_number, record, error in batch:
+        if error is not None:
+            errors.append(f"line {line_number}: {error}")
+            continue
+
+        for field in ("username", "title", "description"):
+            error = error or check_text_field(record, field)
+        if error is None and record["username"] in unknown_users:
+            error = f"user {record['username']} does not exist"
+
+        # Dates must be in DATETIME_STRING_FORMAT; tasks without an assigned
+        # date are assigned today
+        if error is None:
+            try:
+                due_date = parse_date(str(record["due_date"]))
+                assigned_date = today if record["assigned_date"] in (None, "") \
+                    else parse_date(str(record["assigned_date"]))
+            except ValueError:
+                error = "dates must be in the format YYYY-MM-DD"
+
+        completed = record["completed"]
+        if isinstance(completed, str):
+            completed = completed.lower()
+        if completed in (None, "", "no", "false", False):
+            completed = False
+        elif completed in ("yes", "true", True):
+            completed = True
+        elif error is None:
+            error = "completed must be Yes or No"
+
+        if error is not None:
+            errors.append(f"line {line_number}: {error}")
+            continue
+
+        new_tasks.append({
+            "Username": record["username"],
+            "Task title": record["title"],
+            "Task description": record["description"],
+            "Due date": due_date,
+            "Assigned date": assigned_date,
+            "completed": completed
+        })
+
+    return new_tasks, errors
+
+
+def validate_user_batch(batch, username_password, new_users):
+    """
+    This function checks a batch of imported user records, as read by
+    `read_bulk_file`, adding the valid ones to `new_users`.
+    It returns a list of error messages for the rest.
+    """
+    errors = []
+    for line_number, record, error in batch:
+        error = error or check_text_field(record, "username") or \
+            check_text_field(record, "password")
+        if error is None and (record["username"] in username_password or
+                              record["username"] in new_users):
+            error = f"user {record['username']} already exists"
+
+        if error is not None:
+            errors.append(f"line {line_number}: {error}")
+        else:
+            new_users[record["username"]] = record["password"]
+    return errors
+
+
+def run_import(file_name, fields, validate_batch):
+    """
+    This function reads an import file in batches of IMPORT_BATCH_SIZE
+    records and passes each batch to `validate_batch`, which returns a list
+    of error messages. If any record is invalid, the errors are printed and
+    the program exits without anything having been saved.
+    """
+    errors = []
+    try:
+        records = read_bulk_file(file_name, fields)
+        while batch := list(islice(records, IMPORT_BATCH_SIZE)):
+            errors += validate_batch(batch)
+    except (OSError, UnicodeDecodeError, csv.Error) as read_error:
+        errors.append(str(read_error))
+
+    if errors:
+        print(f"\n{colors.red}Nothing was imported from {file_name}:")
+        for error in errors[:IMPORT_ERRORS_SHOWN]:
+            print(f"  {error}")
+        if len(errors) > IMPORT_ERRORS_SHOWN:
+            print(f"  ... and {len(errors) - IMPORT_ERRORS_SHOWN} more errors")
+        print(colors.reset)
+        raise SystemExit(1)
+
+
+def import_tasks(file_name):
+    """
+    This function adds the tasks in a CSV or JSONL file, checking every
+    task before saving them all in one write.
+    """
+    new_tasks = []
 
-    elif menu == "a":
-        add_task()
+    def validate_batch(batch):
+        batch_tasks, errors = validate_task_batch(batch, users.username_password)
+        new_tasks.extend(batch_tasks)
+        return errors
 
-    elif menu == "va":
-        view_all()
+    run_import(file_name, TASK_FIELDS, validate_batch)
+    tasks.add_many(new_tasks)
+    print(f"\n{colors.green}Imported {len(new_tasks)} tasks from "
+          f"{file_name}.{colors.reset}")
 
-    elif menu == "vm":
-        view_mine()
 
-    elif menu == "gr":
-        gen_task_overview()
-        gen_user_overview()
-        print(f"\n{colors.green}Reports generated in local directory.")
+def import_users(file_name):
+    """
+    This function adds the users in a CSV or JSONL file, checking every
+    user before saving them all in one write.
+    """
+    new_users = {}
+    run_import(file_name, USER_FIELDS,
+               lambda batch: validate_user_batch(batch, users.username_password,
+                                                 new_users))
+    try:
+        users.add_users(new_users)
+    except ValueError as error:
+        print(f"\n{colors.red}Nothing was imported from {file_name}:")
+        print(f"  {error}")
         print(colors.reset)
+        raise SystemExit(1)
+    print(f"\n{colors.green}Imported {len(new_users)} users from "
+          f"{file_name}.{colors.reset}")
+
+
+def export_tasks(file_name):
+    """
+    This function writes every task to a CSV or JSONL file.
+    Completion is written as Yes/No in CSV files and true/false in JSONL.
+    """
+    as_json = file_name.endswith(".jsonl")
+    records = ({
+        "username": task["Username"],
+        "title": task["Task title"],
+        "description": task["Task description"],
+        "due_date": format_date(task["Due date"]),
+        "assigned_date": format_date(task["Assigned date"]),
+        "completed": task["completed"] if as_json else
+        "Yes" if task["completed"] else "No"
+    } for task in tasks.task_list)
+    count = write_bulk_file(file_name, TASK_FIELDS, records)
+    print(f"\n{colors.green}Exported {count} tasks to {file_name}.{colors.reset}")
+
+
+def export_users(file_name):
+    """
+    This function writes every username and password to a CSV or JSONL file.
+    """
+    records = ({"username": username, "password": password}
+               for username, password in users.username_password.items())
+    count = write_bulk_file(file_name, USER_FIELDS, records)
+    print(f"\n{colors.green}Exported {count} users to {file_name}.{colors.reset}")
+
+
+def main():
+    """
+    This function runs the interactive task manager. A user logs in and can
+    then choose actions from the menu until they exit. Tasks are only loaded
+    once an action needs them.
+    Run with the argument "migrate" to copy the text files into the SQLite
+    database instead, with "report" to generate the reports without
+    logging in, or with one of the BULK_COMMANDS and a file name to import
+    or export tasks or users.
+    """
+    # Leave out color codes when the output is not shown on a terminal
+    if not sys.stdout.isatty():
+        colors.disable()
+
+    if sys.argv[1:] == ["migrate"]:
+        migrate_to_sqlite()
+        return
+
+    if sys.argv[1:] == ["report"]:
+        stream_reports()
+        return
+
+    if sys.argv[1:2] and sys.argv[1] in BULK_COMMANDS:
+        if len(sys.argv) != 3 or not sys.argv[2].endswith((".csv", ".jsonl")):
+            print(f"\n{colors.red}Usage: python task_manager.py "
+                  f"{sys.argv[1]} FILE.csv|FILE.jsonl{colors.reset}")
+            raise SystemExit(2)
+        BULK_COMMANDS[sys.argv[1]](sys.argv[2])
+        return
+
+    # Make sure queued task changes, statistics and profiles are saved if
+    # the program is interrupted
+    if WRITE_BEHIND or STATS_MODE or PROFILE_MODE:
+        signal.signal(signal.SIGINT, handle_exit_signal)
+        signal.signal(signal.SIGTERM, handle_exit_signal)
+
+    if PROFILE_MODE:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        atexit.register(save_profile, profiler)
+
+    # =====Login Section=====
+    curr_user = login()
+
+    while True:
+        # Present the menu to the user and request selection
+        menu = input(MAIN_MENU).lower().strip()
+        action_start = time.perf_counter()
+
+        if menu == "r":
+            reg_user()
+
+        elif menu == "a":
+            add_task()
+
+        elif menu == "va":
+            view_all()
+
+        elif menu == "vm":
+            view_mine(curr_user)
+
+        elif menu == "vo":
+            view_overdue()
+
+        elif menu == "vd":
+            view_due_soon()
+
+        elif menu == "s":
+            search_tasks()
+
+        elif menu in ("gr", "gf"):
+            if generate_reports(force=menu == "gf"):
+                print(f"\n{colors.green}Reports generated in local directory.")
+            else:
+                print(f"\n{colors.green}Reports are already up to date "
+                      "(enter gf to regenerate them anyway).")
+            print(colors.reset)
 
-    elif menu == "ds":
-        if curr_user == "admin":
-            display_stats()
+        elif menu == "ds":
+            if curr_user == "admin":
+                display_stats()
+
+            else:
+                print(f"\n{colors.red}You must be an administrator to access statistics.")
+                print(colors.reset)
+
+        elif menu == "cj":
+            if curr_user == "admin":
+                # The storage compacts the tasks it has loaded, so they are
+                # loaded first if nothing has used them yet
+                tasks.load()
+                storage.compact()
+                print(f"\n{colors.green}Task storage compacted.")
+                print(colors.reset)
+
+            else:
+                print(f"\n{colors.red}You must be an administrator to compact storage.")
+                print(colors.reset)
+
+        elif menu == "e":
+            if WRITE_BEHIND:
+                storage.flush()
+                storage.print_flush_report()
+            print(f"\n{colors.cyan}Goodbye!\n{colors.reset}")
+            break
 
         else:
-            print(f"\n{colors.red}You must be an administrator to access statistics.")
+            print(f"{colors.red}\nInvalid input - please try again.")
             print(colors.reset)
 
-    elif menu == "e":
-        print(f"\n{colors.cyan}Goodbye!\n{colors.reset}")
-        break
+        if menu in TIMED_ACTIONS:
+            instruments.record_time(f"menu {menu}", time.perf_counter() - action_start)
 
-    else:
-        print(f"{colors.red}\nInvalid input - please try again.")
-        print(colors.reset)
+
+def __getattr__(name):
+    """
+    This function lets `task_list` and `username_password` be imported from
+    this module as before; they are loaded when first imported.
+    """
+    if name == "task_list":
+        return tasks.task_list
+    if name == "username_password":
+        return users.username_password
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+DATETIME_STRING_FORMAT = "%Y-%m-%d"
+
+# Date settings. Date strings are decoded and formatted through small
+# caches, as the same dates repeat across many tasks. Set
+# TASK_MANAGER_FAST_DATES=0 to use plain strptime/strftime instead.
+FAST_DATES = os.environ.get("TASK_MANAGER_FAST_DATES", "1") != "0"
+
+# Journal settings. Set TASK_MANAGER_JOURNAL=1 to append each task change
+# to the journal file instead of rewriting tasks.txt. The journal is folded
+# back into tasks.txt once it reaches JOURNAL_COMPACT_SIZE bytes.
+JOURNAL_MODE = os.environ.get("TASK_MANAGER_JOURNAL", "0") == "1"
+JOURNAL_FILE = "tasks_journal.txt"
+JOURNAL_COMPACT_SIZE = 1024 * 1024
+
+# Task store settings. Set TASK_MANAGER_STORE=columnar to keep tasks in
+# NumPy arrays (see columnar_store.py) instead of a list of dictionaries.
+TASK_STORE = os.environ.get("TASK_MANAGER_STORE", "list")
+
+# Snapshot settings. Set TASK_MANAGER_SNAPSHOT=1 to keep a binary snapshot
+# of tasks.txt, which is loaded at start-up instead of parsing the text file
+# for as long as tasks.txt has not changed.
+SNAPSHOT_MODE = os.environ.get("TASK_MANAGER_SNAPSHOT", "0") == "1"
+SNAPSHOT_FILE = "tasks.snapshot"
+SNAPSHOT_MAGIC = b"TASKSNAP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<8sHQqQ32s")
+SNAPSHOT_TASK = struct.Struct("<IiiB")
+SNAPSHOT_LENGTH = struct.Struct("<I")
+
+# Lock file held by sessions while they read or write the task files
+LOCK_FILE = "tasks.txt.lock"
+
+# Write-behind settings. Set TASK_MANAGER_WRITE_BEHIND=1 to save task
+# changes from a background thread, which waits for WRITE_BEHIND_DELAY
+# seconds without changes and then saves them all at once. Changes that
+# cannot be saved are tried again every WRITE_BEHIND_RETRY_DELAY seconds.
+WRITE_BEHIND = os.environ.get("TASK_MANAGER_WRITE_BEHIND", "0") == "1"
+WRITE_BEHIND_DELAY = 0.5
+WRITE_BEHIND_RETRY_DELAY = 5
+
+# Bulk import and export. "python task_manager.py import-tasks tasks.csv"
+# adds every task in a CSV or JSONL file with one write; the files have the
+# fields below, and a CSV file starts with a header row naming them.
+# Tasks without an assigned date are assigned today, and tasks without a
+# completed field are not completed.
+TASK_FIELDS = ("username", "title", "description", "due_date",
+               "assigned_date", "completed")
+USER_FIELDS = ("username", "password")
+BULK_COMMANDS = {
+    "import-tasks": import_tasks,
+    "import-users": import_users,
+    "export-tasks": export_tasks,
+    "export-users": export_users
+}
+IMPORT_BATCH_SIZE = 10000
+IMPORT_ERRORS_SHOWN = 20
+
+# Uncompleted tasks are indexed by due keys, which hold the due date
+# ordinal above the lower DUE_KEY_TASK_BITS bits and the task ID below them.
+# "View tasks due soon" looks DUE_SOON_DAYS days ahead by default.
+DUE_KEY_TASK_BITS = 32
+DUE_KEY_TASK_MASK = (1 << DUE_KEY_TASK_BITS) - 1
+DUE_SOON_DAYS = 7
+
+# The main menu, which task_client.py shows as well
+MAIN_MENU = '''\nTASK MANAGER MENU
+r - Register a user
+a - Add a task
+va - View all tasks
+vm - View my tasks
+vo - View overdue tasks
+vd - View tasks due soon
+s - Search tasks
+gr - Generate reports
+gf - Regenerate reports, even if up to date
+ds - Display statistics
+cj - Compact task storage
+e - Exit
+\nWhat would you like to do?: '''
+
+# Long lists of tasks are shown PAGE_SIZE tasks at a time. Set
+# TASK_MANAGER_PAGE_SIZE to change the number of tasks on each page.
+PAGE_SIZE = max(1, int(os.environ.get("TASK_MANAGER_PAGE_SIZE", "20")))
+PAGE_HELP = ("Enter 'n' or 'p' for the next or previous page, "
+             "or 'g' and a page number to go to that page.\n")
+
+# Search settings. Task titles and descriptions are searched by word.
+# Set TASK_MANAGER_SEARCH_INDEX=1 to keep the search index in
+# SEARCH_INDEX_FILE between sessions, rather than building it again the
+# first time each session searches (text storage only).
+SEARCH_WORD = re.compile(r"\w+")
+SEARCH_INDEX_MODE = os.environ.get("TASK_MANAGER_SEARCH_INDEX", "0") == "1"
+SEARCH_INDEX_FILE = "tasks.search"
+SEARCH_INDEX_MAGIC = b"TASKSRCH"
+SEARCH_INDEX_VERSION = 2
+SEARCH_INDEX_HEADER = struct.Struct("<8sH4qQQ")
+# The byte length of each word and its number of task IDs
+SEARCH_INDEX_ENTRY = struct.Struct("<II")
+
+# Generated reports. REPORT_CACHE_FILE records what the reports were last
+# generated from, so they are only regenerated when something has changed.
+REPORT_FILES = ("task_overview.txt", "user_overview.txt")
+REPORT_CACHE_FILE = "report_cache.json"
+
+# Set TASK_MANAGER_REPORT_WORKERS to a number above 1 to generate reports
+# from tasks.txt with that many worker processes when the tasks have not
+# been loaded (text storage outside journal mode only). tasks.txt is split
+# into REPORT_CHUNKS_PER_WORKER chunks per worker, each at least
+# REPORT_MIN_CHUNK_SIZE bytes, which are read REPORT_BLOCK_SIZE bytes at a
+# time.
+REPORT_WORKERS = int(os.environ.get("TASK_MANAGER_REPORT_WORKERS", "0"))
+REPORT_CHUNKS_PER_WORKER = 4
+REPORT_MIN_CHUNK_SIZE = 1024 * 1024
+REPORT_BLOCK_SIZE = 1024 * 1024
+
+# Statistics settings. Uncompleted tasks are counted by age within each
+# number of days in OPEN_TASK_AGE_DAYS. Set TASK_MANAGER_VERIFY_STATS=1 to
+# check the numbers of users and tasks against the files when statistics
+# are displayed.
+OPEN_TASK_AGE_DAYS = (7, 30, 90, 365)
+VERIFY_STATS_MODE = os.environ.get("TASK_MANAGER_VERIFY_STATS", "0") == "1"
+LINE_COUNT_BLOCK_SIZE = 1024 * 1024
+
+# Instrumentation settings. Set TASK_MANAGER_STATS=1 to record how long each
+# menu action, task load and task file write takes, and the bytes read from
+# and written to each file. A JSON summary is appended to STATS_FILE when the
+# program exits. Set TASK_MANAGER_PROFILE=1 to profile the whole session
+# with cProfile, saving the statistics to PROFILE_FILE.
+STATS_MODE = os.environ.get("TASK_MANAGER_STATS", "0") == "1"
+STATS_FILE = "task_manager_stats.jsonl"
+STATS_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+TIMED_ACTIONS = ("r", "a", "va", "vm", "vo", "vd", "s", "gr", "gf", "ds", "cj")
+PROFILE_MODE = os.environ.get("TASK_MANAGER_PROFILE", "0") == "1"
+PROFILE_FILE = "task_manager.prof"
+
+# Storage settings. Set TASK_MANAGER_STORAGE=sqlite to keep tasks and
+# users in an SQLite database (see sqlite_storage.py) instead of tasks.txt
+# and user.txt. Run "python task_manager.py migrate" to copy the existing
+# text files into the database.
+STORAGE_BACKEND = os.environ.get("TASK_MANAGER_STORAGE", "text")
+SQLITE_FILE = "task_manager.db"
+USE_SQLITE_STORAGE = STORAGE_BACKEND == "sqlite"
+
+# Sharded storage. Set TASK_MANAGER_STORAGE=sharded to keep tasks in
+# SHARD_FOLDER (see sharded_storage.py), split between shard files by a
+# hash of the username, so that a user's tasks can be read and saved
+# without everyone else's.
+# tasks.txt is split into TASK_MANAGER_SHARDS shards the first time; after
+# that the number of shards is read from SHARD_MANIFEST.
+USE_SHARDED_STORAGE = STORAGE_BACKEND == "sharded"
+SHARD_FOLDER = "task_shards"
+SHARD_MANIFEST = os.path.join(SHARD_FOLDER, "manifest.json")
+SHARD_COUNT = max(1, int(os.environ.get("TASK_MANAGER_SHARDS", "16")))
+
+# Use the columnar store if requested and NumPy is installed
+USE_COLUMNAR_STORE = False
+if TASK_STORE == "columnar" and STORAGE_BACKEND == "text":
+    try:
+        from columnar_store import ColumnarTaskList
+        USE_COLUMNAR_STORE = True
+    except ImportError:
+        print(f"\n{colors.red}NumPy is not installed - "
+              f"using the default task store.{colors.reset}")
+
+# Lock held while the task list is changed or saved
+task_list_lock = threading.RLock()
+
+# Statistics and the search index are saved on exit after any queued task
+# changes, so that the final save is included
+instruments = Instrumentation(STATS_MODE)
+atexit.register(instruments.dump)
+if SEARCH_INDEX_MODE:
+    atexit.register(save_search_index)
+
+# The database is only opened once the tasks or users are first used
+if USE_SQLITE_STORAGE:
+    from sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage(SQLITE_FILE)
+elif USE_SHARDED_STORAGE:
+    # sharded_storage.py imports this module by name, which must not load
+    # it a second time when it is run as a script
+    sys.modules.setdefault("task_manager", sys.modules[__name__])
+    from sharded_storage import ShardedStorage
+    storage = ShardedStorage()
+else:
+    storage = TextStorage()
+
+# Save task changes in the background if asked to, making sure any queued
+# changes are saved when the program exits
+if WRITE_BEHIND:
+    storage = WriteBehindStorage(storage)
+    atexit.register(storage.flush)
+
+# The main task and user stores. Nothing is read from storage until the
+# tasks or users are first used.
+tasks = TaskStore(storage)
+users = UserStore(storage)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+"""
+This module runs the task manager as a server, so that many users share one
+copy of the tasks and users in memory instead of each session loading and
+parsing the task files itself. Clients (see task_client.py) connect over a
+local TCP port or Unix socket and send one JSON request per line, receiving
+one JSON reply per line.
+
+Requests that only read are answered straight from the shared stores.
+Changes are queued and made by a single writer, which makes every change
+queued so far and then saves them all in one write, so sessions never
+overwrite each other's changes. Saving can reload the tasks if another
+session has changed the task files, so reads wait while a save runs.
+
+Usage: python task_server.py [--host HOST] [--port PORT] [--unix PATH]
+"""
+
+# =====Importing Libraries=====
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+
+from task_manager import (TASK_FIELDS, add_record, check_text_field, colors,
+                          format_date, generate_reports, instruments,
+                          parse_date, parse_task, tasks, users)
+
+
+class TaskServer:
+    """
+    This class serves the task and user stores of the task manager to
+    clients. Each client connection has a session, which records the user
+    logged in on it.
+    """
+
+    def __init__(self):
+        # Queued changes, each with the request, its session and the future
+        # its reply is set on
+        self.changes = asyncio.Queue()
+        # Held by the writer while it changes and saves the stores, and by
+        # requests that only read while they are answered
+        self.store_lock = asyncio.Lock()
+
+    async def handle_client(self, reader, writer):
+        """
+        This method answers the requests of one client until it
+        disconnects.
+        """
+        session = {"username": None}
+        try:
+            while line := await reader.readline():
+                start = time.perf_counter()
+                try:
+                    request = json.loads(line)
+                    action = request["action"]
+                    reply = await self.handle_request(action, request, session)
+                except Exception as error:
+                    action = None
+                    reply = error_reply(error)
+
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+                if action in SERVER_ACTIONS:
+                    instruments.record_time(f"server {action}", time.perf_counter() - start)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, action, request, session):
+        """
+        This method returns the reply to a request. Changes are passed to
+        the writer, and the reply is sent once they have been saved.
+        """
+        if action == "login":
+            return login(request, session)
+
+        if action not in SERVER_ACTIONS:
+            raise ValueError(f"unknown action {action!r}")
+        if session["username"] is None:
+            raise ValueError("You must log in first.")
+        if action in ADMIN_ACTIONS and session["username"] != "admin":
+            raise ValueError("You must be an administrator to do this.")
+
+        if action in READ_ACTIONS:
+            async with self.store_lock:
+                # Searches and reports can take a while, so are answered in
+                # a worker thread to keep serving other clients meanwhile
+                if action in THREADED_ACTIONS:
+                    reply = await asyncio.to_thread(READ_ACTIONS[action], request, session)
+                else:
+                    reply = READ_ACTIONS[action](request, session)
+                return dict(reply, ok=True)
+
+        reply = asyncio.get_running_loop().create_future()
+        await self.changes.put((action, request, session, reply))
+        return await reply
+
+    async def write_changes(self):
+        """
+        This method is the single writer. It waits for changes, makes every
+        change queued so far to the stores, and then saves them all in one
+        write in a worker thread. Requests that only read wait until the
+        save has finished, as it may reload the tasks. Each client is
+        replied to once its change has been saved, and a change that fails
+        only fails the requests it was saved with.
+        """
+        while True:
+            batch = [await self.changes.get()]
+            while not self.changes.empty():
+                batch.append(self.changes.get_nowait())
+
+            async with self.store_lock:
+                await self.write_batch(batch)
+
+    async def write_batch(self, batch):
+        """
+        This method makes and saves a batch of changes for `write_changes`,
+        setting the reply to each one.
+        """
+        storage = tasks.storage
+
+        # Make the changes, in the order they arrived
+        task_records = []
+        new_users = []
+        compact = False
+        replies = []
+        for action, request, session, reply in batch:
+            try:
+                records, added_users = CHANGE_ACTIONS[action](request, session)
+            except Exception as error:
+                reply.set_result(error_reply(error))
+                continue
+
+            task_records += records
+            compact = compact or action == "compact"
+            if added_users:
+                new_users.append((added_users, reply))
+            else:
+                replies.append(reply)
+
+        # Save them, adding users first. Each new user is saved on its own,
+        # as another session or an earlier request in the batch may have
+        # registered the same username, and is only added to the users in
+        # memory once saved
+        try:
+            for added_users, reply in new_users:
+                try:
+                    await asyncio.to_thread(users.add_users, added_users)
+                except ValueError as error:
+                    reply.set_result(error_reply(error))
+            if task_records:
+                await asyncio.to_thread(storage.save_task_changes, task_records)
+            if compact:
+                await asyncio.to_thread(storage.compact)
+            result = {"ok": True}
+        except OSError as error:
+            result = {"ok": False, "error": f"Changes could not be saved ({error})."}
+        except (Exception, SystemExit) as error:
+            # Such as another session having left a task file that cannot
+            # be reloaded. The writer carries on with the next changes.
+            print(f"{colors.red}Changes could not be saved ({error!r}).{colors.reset}")
+            result = {"ok": False, "error": f"Changes could not be saved ({error!r})."}
+
+        # Task changes that could not be saved have already been made in
+        # memory, so the tasks are loaded again to match the task files
+        if not result["ok"] and task_records:
+            try:
+                await asyncio.to_thread(tasks.reload)
+            except (Exception, SystemExit) as error:
+                print(f"{colors.red}Tasks could not be reloaded ({error!r}).{colors.reset}")
+
+        for reply in replies:
+            reply.set_result(result)
+        for added_users, reply in new_users:
+            if not reply.done():
+                reply.set_result(result)
+
+
+def error_reply(error):
+    """
+    This function returns the reply to a request that failed. A ValueError
+    explains what was wrong, while other errors mean the request itself was
+    malformed.
+    """
+    if isinstance(error, ValueError):
+        return {"ok": False, "error": str(error)}
+    return {"ok": False, "error": f"Invalid request ({error!r})."}
+
+
+def login(request, session):
+    """
+    This function logs a session in if the username and password in the
+    request match a registered user.
+    """
+    username = get_field(request, "username", str)
+    username_password = users.username_password
+    if username not in username_password:
+        return {"ok": False, "error": "User does not exist."}
+    if username_password[username] != get_field(request, "password", str):
+        return {"ok": False, "error": "Wrong password"}
+
+    session["username"] = username
+    return {"ok": True}
+
+
+def get_field(request, field, field_type, optional=False):
+    """
+    This function returns a field of a request, raising a ValueError if it
+    is not of the type expected. Optional fields may also be null.
+    """
+    value = request[field]
+    if value is None and optional:
+        return value
+    # JSON true and false are also ints in Python
+    if not isinstance(value, field_type) or \
+            (field_type is int and isinstance(value, bool)):
+        raise ValueError(f"{field} must be {FIELD_TYPE_NAMES[field_type]}")
+    return value
+
+
+def get_task_id(request):
+    """
+    This function returns the task ID in a request, raising a ValueError if
+    there is no such task.
+    """
+    task_id = get_field(request, "task_id", int)
+    if not 0 <= task_id < len(tasks.task_list):
+        raise ValueError(f"There is no task with ID {task_id}.")
+    return task_id
+
+
+def get_own_task_id(request, session, editing=False):
+    """
+    This function returns the task ID in a request if the task is assigned
+    to the session's user, as only their own tasks can be changed. Tasks
+    being edited must not be completed.
+    """
+    task_id = get_task_id(request)
+    task = tasks.task_list[task_id]
+    if task["Username"] != session["username"]:
+        raise ValueError(f"Task {task_id} is not assigned to you.")
+    if editing and task["completed"]:
+        raise ValueError("Task completed - unavailable for editing.")
+    return task_id
+
+
+def get_existing_user(request):
+    """
+    This function returns the username in a request, raising a ValueError
+    if the user does not exist.
+    """
+    username = get_field(request, "username", str)
+    if username not in users.username_password:
+        raise ValueError(f"{username} does not exist!")
+    return username
+
+
+def read_user_exists(request, session):
+    """
+    This function replies whether a user exists.
+    """
+    return {"exists": get_field(request, "username", str) in users.username_password}
+
+
+def read_task_count(request, session):
+    """
+    This function replies with the number of tasks.
+    """
+    return {"count": len(tasks.task_list)}
+
+
+def read_tasks(request, session):
+    """
+    This function replies with the tasks with the given IDs, each as its
+    list of fields in the task file.
+    """
+    task_ids = [get_task_id({"task_id": task_id})
+                for task_id in get_field(request, "task_ids", list)]
+    return {"tasks": [add_record(task)[1:] for task in tasks.get_tasks(task_ids)]}
+
+
+def read_user_tasks(request, session):
+    """
+    This function replies with the IDs of the tasks assigned to a user.
+    """
+    return {"task_ids": list(tasks.get_user_task_ids(get_field(request, "username", str)))}
+
+
+def read_due_tasks(request, session):
+    """
+    This function replies with the IDs of the uncompleted tasks due
+    between two dates, for one user or for everyone.
+    """
+    first_date = get_field(request, "first_date", str, optional=True)
+    if first_date is not None:
+        first_date = parse_date(first_date)
+    last_date = parse_date(get_field(request, "last_date", str))
+    return {"task_ids": list(tasks.get_due_task_ids(
+        first_date, last_date, get_field(request, "username", str, optional=True)))}
+
+
+def read_search(request, session):
+    """
+    This function replies with the IDs of the tasks matching a search.
+    """
+    return {"task_ids": list(tasks.search(
+        get_field(request, "query", str),
+        get_field(request, "username", str, optional=True),
+        get_field(request, "completed", bool, optional=True)))}
+
+
+def read_reports(request, session):
+    """
+    This function generates the reports in the server's folder, unless
+    they are up to date and the request does not force them, and replies
+    whether they were generated.
+    """
+    return {"generated": generate_reports(force=get_field(request, "force", bool))}
+
+
+def read_stats(request, session):
+    """
+    This function replies with the number of users and tasks, along with
+    the statistics on the tasks from `TaskStore.get_stats`.
+    """
+    return {"users": len(users.username_password), "tasks": len(tasks.task_list),
+            "task_stats": tasks.get_stats(datetime.today())}
+
+
+def change_register(request, session):
+    """
+    This function checks a new user, returning the user to be saved.
+    The user is added to the users in memory once saved.
+    """
+    for field in ("username", "password"):
+        error = check_text_field(request, field)
+        if error is not None:
+            raise ValueError(error)
+    if request["username"] in users.username_password:
+        raise ValueError(f"{request['username']} is already in use!")
+
+    return [], {request["username"]: request["password"]}
+
+
+def change_add(request, session):
+    """
+    This function adds a task, given as its list of fields in the task
+    file, returning the change to be saved.
+    """
+    task_fields = get_field(request, "task", list)
+    if len(task_fields) != len(TASK_FIELDS) or \
+            not all(isinstance(field, str) for field in task_fields):
+        raise ValueError(f"a task must have {len(TASK_FIELDS)} text fields")
+    for field in ("username", "title", "description"):
+        error = check_text_field(dict(zip(TASK_FIELDS, task_fields)), field)
+        if error is not None:
+            raise ValueError(error)
+
+    new_task = parse_task(task_fields)
+    get_existing_user({"username": new_task["Username"]})
+    tasks.add(new_task, persist=False)
+    return [add_record(new_task)], {}
+
+
+def change_complete(request, session):
+    """
+    This function marks one of the session user's tasks as complete,
+    returning the change to be saved.
+    """
+    task_id = get_own_task_id(request, session)
+    tasks.complete(task_id, persist=False)
+    return [["complete", str(task_id)]], {}
+
+
+def change_reassign(request, session):
+    """
+    This function reassigns one of the session user's tasks to another
+    user, returning the change to be saved.
+    """
+    task_id = get_own_task_id(request, session, editing=True)
+    new_user = get_existing_user(request)
+    tasks.reassign(task_id, new_user, persist=False)
+    return [["reassign", str(task_id), new_user]], {}
+
+
+def change_due_date(request, session):
+    """
+    This function changes the due date of one of the session user's tasks,
+    returning the change to be saved.
+    """
+    task_id = get_own_task_id(request, session, editing=True)
+    new_due_date = parse_date(get_field(request, "due_date", str))
+    tasks.change_due_date(task_id, new_due_date, persist=False)
+    return [["due", str(task_id), format_date(new_due_date)]], {}
+
+
+def change_compact(request, session):
+    """
+    This function asks for the task storage to be compacted, which the
+    writer does after saving any other changes.
+    """
+    return [], {}
+
+
+async def serve(host, port, unix_path):
+    """
+    This function loads the tasks and users, then serves them on a TCP port,
+    or on a Unix socket if `unix_path` is given, until interrupted.
+    """
+    tasks.load()
+    task_server = TaskServer()
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(task_server.handle_client, unix_path)
+        address = unix_path
+    else:
+        server = await asyncio.start_server(task_server.handle_client, host, port)
+        address = f"{host}:{port}"
+
+    print(f"{colors.green}Serving {len(tasks.task_list)} tasks and "
+          f"{len(users.username_password)} users on {address}.{colors.reset}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), task_server.write_changes())
+
+
+def main():
+    """
+    This function runs the server with the address given on the command
+    line.
+    """
+    parser = argparse.ArgumentParser(description="Serve the task manager to clients.")
+    add_address_arguments(parser)
+    args = parser.parse_args()
+
+    # Leave out color codes when the output is not shown on a terminal
+    if not sys.stdout.isatty():
+        colors.disable()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print(f"\n{colors.cyan}Server stopped.{colors.reset}")
+
+
+def add_address_arguments(parser):
+    """
+    This function adds the options choosing the server's address to an
+    argument parser. The client uses the same options.
+    """
+    parser.add_argument("--host", default=SERVER_HOST,
+                        help=f"TCP host to listen on or connect to (default {SERVER_HOST})")
+    parser.add_argument("--port", type=int, default=SERVER_PORT,
+                        help=f"TCP port (default {SERVER_PORT})")
+    parser.add_argument("--unix", metavar="PATH",
+                        help="use a Unix socket at PATH instead of TCP")
+
+
+# Requests that only read, mapped to the functions answering them
+READ_ACTIONS = {
+    "user-exists": read_user_exists,
+    "task-count": read_task_count,
+    "tasks": read_tasks,
+    "user-tasks": read_user_tasks,
+    "due-tasks": read_due_tasks,
+    "search": read_search,
+    "reports": read_reports,
+    "stats": read_stats
+}
+
+# Requests that change the tasks or users, mapped to the functions making
+# the change and returning the task records and users to be saved
+CHANGE_ACTIONS = {
+    "register": change_register,
+    "add": change_add,
+    "complete": change_complete,
+    "reassign": change_reassign,
+    "due-date": change_due_date,
+    "compact": change_compact
+}
+
+SERVER_ACTIONS = READ_ACTIONS.keys() | CHANGE_ACTIONS.keys()
+ADMIN_ACTIONS = ("stats", "compact")
+
+# Requests that only read but may take a while, answered in a worker thread
+THREADED_ACTIONS = ("search", "reports")
+
+# How the types of request fields are described in error replies
+FIELD_TYPE_NAMES = {str: "text", int: "a whole number", bool: "true or false",
+                    list: "a list"}
+
+# The server listens on this local address by default
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+
+if __name__ == "__main__":
+    main()
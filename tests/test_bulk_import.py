@@ -0,0 +1,199 @@
+"""
+These tests check that bulk imports report every invalid record and save
+nothing unless all of them are valid, and that exported files can be
+imported again.
+
+Run from the repository folder with: python -m unittest discover tests
+"""
+
+# =====Importing Libraries=====
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import task_manager
+from task_manager import (TaskStore, TextStorage, UserStore, export_tasks,
+                          import_tasks, import_users)
+
+TASK_LINES = "admin;Task 0;First;2030-01-01;2026-01-01;No"
+CSV_HEADER = "username,title,description,due_date,assigned_date,completed\n"
+
+
+class BulkImportTest(unittest.TestCase):
+    """
+    This class imports and exports files in a temporary folder, which
+    starts with the users admin and bob and one task.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_folder = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, self.old_folder)
+
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write(TASK_LINES)
+        with open("user.txt", "w", encoding="utf-8") as user_file:
+            user_file.write("admin;password\nbob;secret")
+
+        # Import into stores of their own, reading the files in the
+        # temporary folder
+        storage = TextStorage()
+        for name, store in (("tasks", TaskStore(storage)), ("users", UserStore(storage))):
+            store_patch = mock.patch.object(task_manager, name, store)
+            store_patch.start()
+            self.addCleanup(store_patch.stop)
+
+    def write_file(self, file_name, text):
+        """
+        This method writes an import file.
+        """
+        with open(file_name, "w", encoding="utf-8") as import_file:
+            import_file.write(text)
+
+    def read_file(self, file_name):
+        """
+        This method returns the contents of a file.
+        """
+        with open(file_name, "r", encoding="utf-8") as saved_file:
+            return saved_file.read()
+
+    def run_command(self, command, file_name):
+        """
+        This method runs an import or export, returning what it printed.
+        """
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            command(file_name)
+        return output.getvalue()
+
+    def failed_import(self, command, file_name):
+        """
+        This method runs an import that is expected to fail, returning the
+        lines of error messages it printed.
+        """
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertRaises(SystemExit):
+            command(file_name)
+        return [line.strip() for line in output.getvalue().splitlines()
+                if line.strip().startswith("line")]
+
+    def test_task_errors_are_reported(self):
+        """
+        Every invalid task record is reported with its line number, and
+        nothing is saved.
+        """
+        self.write_file("tasks.csv", CSV_HEADER +
+                        "bob,Good,Task,2030-01-01,,No\n"
+                        "bob,,Task,2030-01-01,,No\n"
+                        "bob,Bad;title,Task,2030-01-01,,No\n"
+                        "carol,Title,Task,2030-01-01,,No\n"
+                        "bob,Title,Task,01/01/2030,,No\n"
+                        "bob,Title,Task,2030-01-01,,Maybe\n")
+        errors = self.failed_import(import_tasks, "tasks.csv")
+
+        self.assertEqual(errors, [
+            "line 3: missing title",
+            "line 4: title cannot contain semicolons or line breaks",
+            "line 5: user carol does not exist",
+            "line 6: dates must be in the format YYYY-MM-DD",
+            "line 7: completed must be Yes or No"])
+        self.assertEqual(self.read_file("tasks.txt"), TASK_LINES)
+
+    def test_jsonl_errors_are_reported(self):
+        """
+        Lines of a JSONL file that are not JSON objects are reported.
+        """
+        self.write_file("tasks.jsonl",
+                        '{"username": "bob", "title": "Good", "description": "Task", '
+                        '"due_date": "2030-01-01"}\n'
+                        "not json\n"
+                        "[1, 2]\n")
+        errors = self.failed_import(import_tasks, "tasks.jsonl")
+
+        self.assertEqual(errors, ["line 2: invalid JSON (Expecting value)",
+                                  "line 3: expected a JSON object"])
+        self.assertEqual(self.read_file("tasks.txt"), TASK_LINES)
+
+    def test_tasks_are_imported_and_exported(self):
+        """
+        Valid tasks are all saved, and an exported file imports the same
+        tasks again.
+        """
+        self.write_file("tasks.csv", CSV_HEADER +
+                        "bob,Task 1,Second,2030-01-01,2026-01-01,Yes\n"
+                        "admin,Task 2,Third,2030-02-01,2026-01-01,\n")
+        self.run_command(import_tasks, "tasks.csv")
+        self.assertEqual(self.read_file("tasks.txt").splitlines(), [
+            TASK_LINES,
+            "bob;Task 1;Second;2030-01-01;2026-01-01;Yes",
+            "admin;Task 2;Third;2030-02-01;2026-01-01;No"])
+
+        self.run_command(export_tasks, "tasks.jsonl")
+        exported = [json.loads(line) for line in self.read_file("tasks.jsonl").splitlines()]
+        self.assertEqual(exported[1], {
+            "username": "bob", "title": "Task 1", "description": "Second",
+            "due_date": "2030-01-01", "assigned_date": "2026-01-01", "completed": True})
+
+        self.run_command(import_tasks, "tasks.jsonl")
+        self.assertEqual(self.read_file("tasks.txt").splitlines()[3:], [
+            TASK_LINES,
+            "bob;Task 1;Second;2030-01-01;2026-01-01;Yes",
+            "admin;Task 2;Third;2030-02-01;2026-01-01;No"])
+
+    def test_tasks_are_saved_in_one_write(self):
+        """
+        Imported tasks are saved in one write, so if it fails none of them
+        are saved.
+        """
+        self.write_file("tasks.csv", CSV_HEADER +
+                        "bob,Task 1,Second,2030-01-01,,No\n"
+                        "bob,Task 2,Third,2030-01-01,,No\n")
+        with mock.patch.object(task_manager.os, "replace",
+                               side_effect=OSError("No space left on device")), \
+                self.assertRaises(OSError):
+            self.run_command(import_tasks, "tasks.csv")
+        self.assertEqual(self.read_file("tasks.txt"), TASK_LINES)
+
+    def test_user_errors_are_reported(self):
+        """
+        Users that already exist, are repeated in the file or have invalid
+        fields are reported, and none are saved.
+        """
+        self.write_file("users.csv", "username,password\n"
+                        "carol,x\n"
+                        "bob,y\n"
+                        "carol,z\n"
+                        "dave,\n")
+        errors = self.failed_import(import_users, "users.csv")
+
+        self.assertEqual(errors, ["line 3: user bob already exists",
+                                  "line 4: user carol already exists",
+                                  "line 5: missing password"])
+        self.assertEqual(self.read_file("user.txt"), "admin;password\nbob;secret")
+
+    def test_users_registered_meanwhile_are_not_imported(self):
+        """
+        If another session has registered one of the users since this one
+        read them, none of the users are saved.
+        """
+        self.write_file("users.csv", "username,password\ncarol,x\ndave,y\n")
+        self.assertNotIn("carol", task_manager.users.username_password)
+        TextStorage().add_users({"carol": "other"})
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertRaises(SystemExit):
+            import_users("users.csv")
+
+        self.assertIn("carol is already in use!", output.getvalue())
+        self.assertEqual(self.read_file("user.txt"),
+                         "admin;password\nbob;secret\ncarol;other")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+These tests check that task changes saved to the journal are replayed when
+the tasks are loaded, folded back into tasks.txt when compacted, not
+applied twice after an interrupted compaction, and never applied to a
+tasks.txt they do not belong to.
+
+Run from the repository folder with: python -m unittest discover tests
+"""
+
+# =====Importing Libraries=====
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import task_manager
+from task_manager import (JOURNAL_FILE, TaskStore, TextStorage, mark_journal_folded,
+                          parse_task, update_task_file)
+
+TASK_LINES = ("admin;Task 0;First;2030-01-01;2026-01-01;No\n"
+              "admin;Task 1;Second;2030-01-01;2026-01-01;No")
+
+
+class JournalTest(unittest.TestCase):
+    """
+    This class runs sessions in journal mode in a temporary folder, which
+    starts with two tasks assigned to admin.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_folder = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, self.old_folder)
+
+        self.set_journal_mode(True)
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write(TASK_LINES)
+
+    def set_journal_mode(self, journal_mode):
+        """
+        This method turns journal mode on or off for the rest of the test.
+        """
+        journal_patch = mock.patch.object(task_manager, "JOURNAL_MODE", journal_mode)
+        journal_patch.start()
+        self.addCleanup(journal_patch.stop)
+
+    def make_changes(self):
+        """
+        This method saves a change to a task and a new task in one session,
+        and returns that session.
+        """
+        session = TaskStore(TextStorage())
+        session.complete(0)
+        session.add(parse_task(["bob", "Task 2", "Third", "2030-01-01",
+                                "2026-01-01", "No"]))
+        return session
+
+    def saved_tasks(self):
+        """
+        This method returns the title, user and completion of each task, as
+        a new session loads them.
+        """
+        return [(task["Task title"], task["Username"], task["completed"])
+                for task in TaskStore(TextStorage()).task_list]
+
+    def read_task_file(self):
+        """
+        This method returns the contents of tasks.txt.
+        """
+        with open("tasks.txt", "r", encoding="utf-8") as task_file:
+            return task_file.read()
+
+    def test_changes_are_replayed(self):
+        """
+        Changes are appended to the journal, leaving tasks.txt as it was,
+        and applied when a new session loads the tasks.
+        """
+        self.make_changes()
+        self.assertEqual(self.read_task_file(), TASK_LINES)
+        self.assertTrue(os.path.exists(JOURNAL_FILE))
+
+        self.assertEqual(self.saved_tasks(), [("Task 0", "admin", True),
+                                              ("Task 1", "admin", False),
+                                              ("Task 2", "bob", False)])
+
+    def test_cut_short_record_is_skipped(self):
+        """
+        A record left without a line ending by an interrupted write is
+        skipped when the journal is replayed.
+        """
+        self.make_changes()
+        with open(JOURNAL_FILE, "a", encoding="utf-8") as journal:
+            journal.write("complete;1")
+
+        self.assertEqual(self.saved_tasks(), [("Task 0", "admin", True),
+                                              ("Task 1", "admin", False),
+                                              ("Task 2", "bob", False)])
+
+    def test_compaction_folds_the_journal_into_tasks_txt(self):
+        """
+        Compacting writes the changes into tasks.txt and removes the journal.
+        """
+        session = self.make_changes()
+        session.storage.compact()
+
+        self.assertFalse(os.path.exists(JOURNAL_FILE))
+        self.assertEqual(self.read_task_file().splitlines()[-1],
+                         "bob;Task 2;Third;2030-01-01;2026-01-01;No")
+        self.assertEqual(self.saved_tasks(), [("Task 0", "admin", True),
+                                              ("Task 1", "admin", False),
+                                              ("Task 2", "bob", False)])
+
+    def test_folded_journal_is_not_applied_again(self):
+        """
+        After a compaction interrupted once tasks.txt has been replaced, the
+        journal left behind is not applied again, and is replaced by the
+        next change saved.
+        """
+        session = self.make_changes()
+        update_task_file(session.task_list, before_replace=mark_journal_folded)
+        self.assertTrue(os.path.exists(JOURNAL_FILE))
+
+        expected = [("Task 0", "admin", True), ("Task 1", "admin", False),
+                    ("Task 2", "bob", False)]
+        self.assertEqual(self.saved_tasks(), expected)
+
+        TaskStore(TextStorage()).complete(1)
+        expected[1] = ("Task 1", "admin", True)
+        self.assertEqual(self.saved_tasks(), expected)
+
+    def test_folded_journal_is_removed_outside_journal_mode(self):
+        """
+        Outside journal mode, a journal left behind by an interrupted
+        compaction is removed when the tasks are loaded.
+        """
+        session = self.make_changes()
+        update_task_file(session.task_list, before_replace=mark_journal_folded)
+
+        self.set_journal_mode(False)
+        self.assertEqual(self.saved_tasks(), [("Task 0", "admin", True),
+                                              ("Task 1", "admin", False),
+                                              ("Task 2", "bob", False)])
+        self.assertFalse(os.path.exists(JOURNAL_FILE))
+
+    def test_journal_of_another_task_file_is_refused(self):
+        """
+        A journal that belongs to neither the current tasks.txt nor the one
+        it was folded into stops the tasks being loaded, and is kept.
+        """
+        self.make_changes()
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write("admin;Other;Task;2030-01-01;2026-01-01;No")
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertRaises(SystemExit):
+            TaskStore(TextStorage()).load()
+        self.assertIn("does not belong to the current tasks.txt", output.getvalue())
+        self.assertTrue(os.path.exists(JOURNAL_FILE))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+These tests check that report counts worked out by worker processes, from
+chunks of tasks.txt or from the shards, and those streamed from the task
+files match the counts kept by the task store.
+
+Run from the repository folder with: python -m unittest discover tests
+"""
+
+# =====Importing Libraries=====
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import sharded_storage
+import task_manager
+from sharded_storage import ShardedStorage
+from task_manager import (TaskStore, TextStorage, count_task_file,
+                          find_task_file_chunks, stream_report_counts)
+
+# Reports are counted as of this date, so some tasks are overdue
+REPORT_DATE = datetime(2026, 6, 1)
+
+
+def write_task_file(num_tasks, seed=1):
+    """
+    This function writes a tasks.txt of random tasks shared between a few
+    users, some completed and some overdue.
+    """
+    generator = random.Random(seed)
+    lines = []
+    for task_number in range(num_tasks):
+        lines.append(";".join([
+            f"user{generator.randrange(7)}", f"Task {task_number}", "Description",
+            f"2026-{generator.randint(1, 12):02}-{generator.randint(1, 28):02}",
+            f"2025-{generator.randint(1, 12):02}-01",
+            generator.choice(["Yes", "No"])]))
+    with open("tasks.txt", "w", encoding="utf-8") as task_file:
+        task_file.write("\n".join(lines))
+
+
+class ParallelReportTest(unittest.TestCase):
+    """
+    This class counts the reports of a task file in a temporary folder,
+    split into chunks and blocks small enough that even a few hundred tasks
+    are counted by several workers.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_folder = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, self.old_folder)
+
+        for name, value in (("REPORT_MIN_CHUNK_SIZE", 512), ("REPORT_BLOCK_SIZE", 256)):
+            setting_patch = mock.patch.object(task_manager, name, value)
+            setting_patch.start()
+            self.addCleanup(setting_patch.stop)
+
+        write_task_file(500)
+
+    def serial_counts(self):
+        """
+        This method returns the report counts and number of tasks kept by a
+        task store that has loaded the tasks.
+        """
+        session = TaskStore(TextStorage())
+        return session.get_report_counts(REPORT_DATE), len(session.task_list)
+
+    def test_chunks_cover_the_file(self):
+        """
+        The chunks start on line boundaries and cover the whole file.
+        """
+        chunks = find_task_file_chunks("tasks.txt", 8)
+        self.assertEqual(len(chunks), 8)
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], os.path.getsize("tasks.txt"))
+        with open("tasks.txt", "rb") as task_file:
+            contents = task_file.read()
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(contents[start - 1:start], b"\n")
+
+    def test_parallel_counts_match(self):
+        """
+        Counting the file in chunks, in one process or several, gives the
+        same counts as the task store.
+        """
+        expected = self.serial_counts()
+        for workers in (1, 3):
+            self.assertEqual(count_task_file("tasks.txt", REPORT_DATE, workers), expected)
+
+    def test_malformed_line_is_reported_with_its_line_number(self):
+        """
+        A malformed line in a later chunk is reported with its line number
+        in the whole file, as when the tasks are loaded.
+        """
+        with open("tasks.txt", "r", encoding="utf-8") as task_file:
+            lines = task_file.read().split("\n")
+        lines[400] = "user1;Broken"
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write("\n".join(lines))
+
+        with self.assertRaisesRegex(ValueError, "^tasks.txt line 401: "):
+            count_task_file("tasks.txt", REPORT_DATE, 3)
+
+    def test_streamed_counts_match(self):
+        """
+        Streaming the counts gives the same counts as the task store, from
+        chunks of tasks.txt while there is no journal, and applying the
+        journal's changes to each task once there is one.
+        """
+        with mock.patch.object(task_manager, "REPORT_WORKERS", 3):
+            with TextStorage().locked(shared=True):
+                self.assertEqual(stream_report_counts(REPORT_DATE), self.serial_counts())
+
+            with mock.patch.object(task_manager, "JOURNAL_MODE", True):
+                session = TaskStore(TextStorage())
+                session.complete(3)
+                session.reassign(4, "user9")
+                session.add(task_manager.parse_task(["user9", "New", "Task", "2026-01-01",
+                                                     "2025-01-01", "No"]))
+                self.assertTrue(os.path.exists(task_manager.JOURNAL_FILE))
+
+                with TextStorage().locked(shared=True):
+                    self.assertEqual(stream_report_counts(REPORT_DATE),
+                                     self.serial_counts())
+
+    def test_sharded_counts_match(self):
+        """
+        Counting the shards, in one process or several, and with some shards
+        already read, gives the same counts as the task store.
+        """
+        expected, num_tasks = self.serial_counts()
+        for workers in (1, 3):
+            with mock.patch.object(sharded_storage, "REPORT_WORKERS", workers):
+                session = TaskStore(ShardedStorage())
+                self.assertEqual(len(session.task_list), num_tasks)
+                self.assertEqual(session.get_report_counts(REPORT_DATE), expected)
+
+                session.get_user_task_ids("user0")
+                self.assertEqual(session.get_report_counts(REPORT_DATE), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
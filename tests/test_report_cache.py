@@ -0,0 +1,158 @@
+"""
+These tests check that reports are only generated again when the tasks,
+the users, the date or the report files have changed since they were last
+generated.
+
+Run from the repository folder with: python -m unittest discover tests
+"""
+
+# =====Importing Libraries=====
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import task_manager
+from task_manager import (REPORT_CACHE_FILE, REPORT_FILES, TaskStore, TextStorage,
+                          UserStore, generate_reports, parse_task)
+
+TASK_LINES = ("admin;Task 0;First;2030-01-01;2026-01-01;No\n"
+              "bob;Task 1;Second;2020-01-01;2019-01-01;Yes")
+
+
+class ReportCacheTest(unittest.TestCase):
+    """
+    This class generates reports in a temporary folder, which starts with
+    the users admin and bob and two tasks.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_folder = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, self.old_folder)
+
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write(TASK_LINES)
+        with open("user.txt", "w", encoding="utf-8") as user_file:
+            user_file.write("admin;password\nbob;secret")
+        self.new_session()
+
+    def new_session(self):
+        """
+        This method gives the reports stores of their own for the rest of
+        the test, as a new session would start with.
+        """
+        storage = TextStorage()
+        for name, store in (("tasks", TaskStore(storage)), ("users", UserStore(storage))):
+            store_patch = mock.patch.object(task_manager, name, store)
+            store_patch.start()
+            self.addCleanup(store_patch.stop)
+
+    def total_tasks(self):
+        """
+        This method returns the total number of tasks in the task overview.
+        """
+        with open("task_overview.txt", "r", encoding="utf-8") as report_file:
+            for line in report_file:
+                if line.startswith("Total number of tasks = "):
+                    return int(line.split("=")[1])
+        raise AssertionError("no total in the task overview")
+
+    def test_second_generation_is_skipped(self):
+        """
+        Reports are generated the first time, and not again while nothing
+        has changed, in the same session or a new one.
+        """
+        self.assertTrue(generate_reports())
+        for file_name in REPORT_FILES:
+            self.assertTrue(os.path.exists(file_name))
+        self.assertTrue(os.path.exists(REPORT_CACHE_FILE))
+
+        self.assertFalse(generate_reports())
+        self.new_session()
+        self.assertFalse(generate_reports())
+
+    def test_forced_generation(self):
+        """
+        Reports are generated regardless when forced.
+        """
+        self.assertTrue(generate_reports())
+        self.assertTrue(generate_reports(force=True))
+
+    def test_task_change_regenerates(self):
+        """
+        Reports are generated again after this session or another one
+        changes the tasks.
+        """
+        self.assertTrue(generate_reports())
+        task_manager.tasks.add(parse_task(["bob", "Task 2", "Third", "2030-01-01",
+                                           "2026-01-01", "No"]))
+        self.assertTrue(generate_reports())
+        self.assertEqual(self.total_tasks(), 3)
+
+        TaskStore(TextStorage()).complete(0)
+        self.new_session()
+        self.assertTrue(generate_reports())
+        self.assertFalse(generate_reports())
+
+    def test_user_change_regenerates(self):
+        """
+        Reports are generated again after a user is registered.
+        """
+        self.assertTrue(generate_reports())
+        TextStorage().add_users({"carol": "other"})
+        self.new_session()
+        self.assertTrue(generate_reports())
+        with open("user_overview.txt", "r", encoding="utf-8") as report_file:
+            self.assertIn("carol", report_file.read())
+
+    def test_deleted_or_edited_report_regenerates(self):
+        """
+        Reports are generated again if a report file has been deleted or
+        changed since.
+        """
+        self.assertTrue(generate_reports())
+        os.remove(REPORT_FILES[0])
+        self.assertTrue(generate_reports())
+        self.assertTrue(os.path.exists(REPORT_FILES[0]))
+
+        with open(REPORT_FILES[1], "a", encoding="utf-8") as report_file:
+            report_file.write("\nEdited")
+        self.assertTrue(generate_reports())
+        self.assertFalse(generate_reports())
+
+    def test_new_day_regenerates(self):
+        """
+        Reports are generated again on a later day, as more tasks may be
+        overdue.
+        """
+        self.assertTrue(generate_reports())
+        with open(REPORT_CACHE_FILE, "r", encoding="utf-8") as cache_file:
+            report_cache = json.load(cache_file)
+        report_cache["date"] = "2000-01-01"
+        with open(REPORT_CACHE_FILE, "w", encoding="utf-8") as cache_file:
+            json.dump(report_cache, cache_file)
+        self.assertTrue(generate_reports())
+
+    def test_parallel_reports_are_cached(self):
+        """
+        Reports counted from tasks.txt by worker processes are skipped in
+        the same way, and match those counted from the task store.
+        """
+        with mock.patch.object(task_manager, "REPORT_WORKERS", 3):
+            self.assertTrue(generate_reports())
+            self.assertFalse(task_manager.tasks.loaded)
+            self.assertFalse(generate_reports())
+            with open("task_overview.txt", "r", encoding="utf-8") as report_file:
+                parallel_report = report_file.read().splitlines()[2:]
+
+        self.assertTrue(generate_reports(force=True))
+        with open("task_overview.txt", "r", encoding="utf-8") as report_file:
+            self.assertEqual(report_file.read().splitlines()[2:], parallel_report)
+
+
+if __name__ == "__main__":
+    unittest.main()
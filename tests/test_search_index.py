@@ -0,0 +1,128 @@
+"""
+These tests check that task searches find the tasks containing every word
+searched for, and that a saved search index is loaded by later sessions
+only while it matches the task files.
+
+Run from the repository folder with: python -m unittest discover tests
+"""
+
+# =====Importing Libraries=====
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import task_manager
+from task_manager import SEARCH_INDEX_FILE, SearchIndex, TaskStore, TextStorage, parse_task
+
+TASK_LINES = ("admin;Fix login bug;The login page fails;2030-01-01;2026-01-01;No\n"
+              "bob;Write report;Monthly sales report;2030-01-01;2026-01-01;Yes\n"
+              "bob;Fix report bug;Totals are wrong;2030-01-01;2026-01-01;No")
+
+
+class SearchIndexTest(unittest.TestCase):
+    """
+    This class searches the tasks in a temporary folder, which starts with
+    three tasks, keeping the search index in SEARCH_INDEX_FILE.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_folder = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, self.old_folder)
+
+        index_patch = mock.patch.object(task_manager, "SEARCH_INDEX_MODE", True)
+        index_patch.start()
+        self.addCleanup(index_patch.stop)
+
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write(TASK_LINES)
+
+    def saved_session(self):
+        """
+        This method searches the tasks in a new session, so its search index
+        is built, and saves the index.
+        """
+        session = TaskStore(TextStorage())
+        session.search("bug")
+        session.save_search_index()
+        self.assertTrue(os.path.exists(SEARCH_INDEX_FILE))
+        return session
+
+    def test_search_results(self):
+        """
+        Only tasks containing every word are found, in any case, and can be
+        limited to one user's tasks or to completed or uncompleted tasks.
+        Tasks added later are found too.
+        """
+        session = TaskStore(TextStorage())
+        self.assertEqual(session.search("bug"), [0, 2])
+        self.assertEqual(session.search("FIX Bug"), [0, 2])
+        self.assertEqual(session.search("report bug"), [2])
+        self.assertEqual(session.search("report missing"), [])
+        self.assertEqual(session.search(""), [])
+        self.assertEqual(session.search("report", user="bob"), [1, 2])
+        self.assertEqual(session.search("bug", user="bob"), [2])
+        self.assertEqual(session.search("report", completed=True), [1])
+        self.assertEqual(session.search("report", user="bob", completed=False), [2])
+
+        session.add(parse_task(["admin", "Another bug", "Found in testing",
+                                "2030-01-01", "2026-01-01", "No"]))
+        self.assertEqual(session.search("bug"), [0, 2, 3])
+
+    def test_saved_index_is_loaded(self):
+        """
+        A later session loads the saved index rather than building it again,
+        and finds the same tasks.
+        """
+        self.saved_session()
+
+        session = TaskStore(TextStorage())
+        with mock.patch.object(SearchIndex, "build",
+                               side_effect=AssertionError("index was built")):
+            self.assertEqual(session.search("bug"), [0, 2])
+            self.assertEqual(session.search("monthly sales"), [1])
+        self.assertFalse(session.search_index.changed)
+
+    def test_index_is_rebuilt_after_the_task_files_change(self):
+        """
+        After another session changes tasks.txt, the saved index no longer
+        matches and is built again, including the new task.
+        """
+        self.saved_session()
+        with open("tasks.txt", "a", encoding="utf-8") as task_file:
+            task_file.write("\nadmin;Another bug;Found in testing;2030-01-01;2026-01-01;No")
+
+        session = TaskStore(TextStorage())
+        with mock.patch.object(SearchIndex, "build", wraps=SearchIndex.build) as build:
+            self.assertEqual(session.search("bug"), [0, 2, 3])
+        build.assert_called_once()
+
+    def test_damaged_index_is_rebuilt(self):
+        """
+        A saved index that has been cut short is built again.
+        """
+        self.saved_session()
+        with open(SEARCH_INDEX_FILE, "r+b") as index_file:
+            index_file.truncate(os.path.getsize(SEARCH_INDEX_FILE) - 3)
+
+        self.assertEqual(TaskStore(TextStorage()).search("bug"), [0, 2])
+
+    def test_long_words_are_saved(self):
+        """
+        Words too long for a two byte length are saved and loaded again.
+        """
+        long_word = "x" * 70000
+        with open("tasks.txt", "a", encoding="utf-8") as task_file:
+            task_file.write(f"\nadmin;Long;{long_word};2030-01-01;2026-01-01;No")
+        self.saved_session()
+
+        session = TaskStore(TextStorage())
+        self.assertEqual(session.search(long_word), [3])
+        self.assertFalse(session.search_index.changed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+These tests check that sessions using the sharded storage see the tasks
+from one save at a time, even when another session saves in between the
+shards they read.
+
+Run from the repository folder with: python -m unittest discover tests
+"""
+
+# =====Importing Libraries=====
+import os
+import tempfile
+import unittest
+
+import task_manager
+from sharded_storage import ShardedStorage, get_shard_number
+from task_manager import TaskStore, add_record, parse_task
+
+
+def find_usernames():
+    """
+    This function returns two usernames whose tasks are kept in different
+    shards.
+    """
+    first_user = "user0"
+    first_shard = get_shard_number(first_user, task_manager.SHARD_COUNT)
+    for number in range(1, 1000):
+        username = f"user{number}"
+        if get_shard_number(username, task_manager.SHARD_COUNT) != first_shard:
+            return first_user, username
+    raise AssertionError("all usernames are in the same shard")
+
+
+class ShardedSessionTest(unittest.TestCase):
+    """
+    This class runs two sessions on the same shards in a temporary folder.
+    Task 0 is assigned to the first user and task 1 to the second, each in
+    its own shard.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_folder = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, self.old_folder)
+
+        self.first_user, self.second_user = find_usernames()
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write(f"{self.first_user};Task 0;First;2030-01-01;2026-01-01;No\n"
+                            f"{self.second_user};Task 1;Second;2030-01-01;2026-01-01;No")
+
+    def test_view_all_after_another_session_moves_a_task(self):
+        """
+        A session that has read one shard still finds every task after
+        another session moves a task from an unread shard into it.
+        """
+        session = TaskStore(ShardedStorage())
+        self.assertEqual(session.get_user_task_ids(self.first_user), [0])
+
+        other_session = TaskStore(ShardedStorage())
+        other_session.reassign(1, self.first_user)
+
+        all_tasks = session.get_tasks(range(len(session.task_list)))
+        self.assertEqual([task["Username"] for task in all_tasks],
+                         [self.first_user, self.first_user])
+        self.assertEqual(session.get_user_task_ids(self.first_user), [0, 1])
+
+    def test_user_tasks_after_another_session_adds_one(self):
+        """
+        The IDs of a user's tasks are all in range after another session
+        adds a task to them.
+        """
+        session = TaskStore(ShardedStorage())
+        self.assertEqual(len(session.task_list), 2)
+
+        other_session = TaskStore(ShardedStorage())
+        other_session.add(parse_task([self.second_user, "Task 2", "Third",
+                                      "2030-01-01", "2026-01-01", "No"]))
+
+        task_ids = session.get_user_task_ids(self.second_user)
+        self.assertEqual(task_ids, [1, 2])
+        self.assertEqual(len(session.task_list), 3)
+        self.assertEqual([task["Task title"] for task in session.get_tasks(task_ids)],
+                         ["Task 1", "Task 2"])
+
+    def test_add_after_another_session_adds_one(self):
+        """
+        A task added after another session has added one gets the next ID,
+        rather than the ID already taken on disk.
+        """
+        session = TaskStore(ShardedStorage())
+        self.assertEqual(len(session.task_list), 2)
+
+        other_session = TaskStore(ShardedStorage())
+        other_session.add(parse_task([self.second_user, "Task 2", "Third",
+                                      "2030-01-01", "2026-01-01", "No"]))
+        session.add(parse_task([self.second_user, "Task 3", "Fourth",
+                                "2030-01-01", "2026-01-01", "No"]))
+
+        fresh_session = TaskStore(ShardedStorage())
+        self.assertEqual([task["Task title"] for task in fresh_session.task_list],
+                         ["Task 0", "Task 1", "Task 2", "Task 3"])
+
+    def test_changes_from_both_sessions_are_saved(self):
+        """
+        A session saving a change after another session has saved keeps
+        both changes.
+        """
+        session = TaskStore(ShardedStorage())
+        session.get_user_task_ids(self.first_user)
+
+        other_session = TaskStore(ShardedStorage())
+        other_session.reassign(1, self.first_user)
+        session.complete(0)
+
+        fresh_session = TaskStore(ShardedStorage())
+        self.assertEqual([(task["Username"], task["completed"])
+                          for task in fresh_session.task_list],
+                         [(self.first_user, True), (self.first_user, False)])
+
+    def test_cross_shard_reassign_after_another_session_saves(self):
+        """
+        A batch that adds a task and reassigns it to a user in another shard
+        moves that task, rather than the one another session has added
+        before the batch is saved.
+        """
+        session = TaskStore(ShardedStorage())
+        self.assertEqual(len(session.task_list), 2)
+
+        new_task = parse_task([self.first_user, "Task 2", "Third",
+                               "2030-01-01", "2026-01-01", "No"])
+        session.add(new_task, persist=False)
+        session.reassign(2, self.second_user, persist=False)
+
+        other_session = TaskStore(ShardedStorage())
+        other_session.add(parse_task([self.first_user, "Other", "Fourth",
+                                      "2030-01-01", "2026-01-01", "No"]))
+        session.storage.save_task_changes([add_record(new_task),
+                                           ["reassign", "2", self.second_user]])
+
+        fresh_session = TaskStore(ShardedStorage())
+        self.assertEqual([(task["Task title"], task["Username"])
+                          for task in fresh_session.task_list],
+                         [("Task 0", self.first_user), ("Task 1", self.second_user),
+                          ("Other", self.first_user), ("Task 2", self.second_user)])
+        self.assertEqual(fresh_session.get_user_task_ids(self.second_user), [1, 3])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+"""
+These tests run the task server on a local port and check that requests
+are only allowed for the right users, and that changes from several
+clients are saved together without mixing up task IDs.
+
+Run from the repository folder with: python -m unittest discover tests
+"""
+
+# =====Importing Libraries=====
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import task_server
+from task_manager import TaskStore, TextStorage, UserStore, parse_task
+
+
+class TaskServerTest(unittest.IsolatedAsyncioTestCase):
+    """
+    This class serves the tasks and users in a temporary folder. Task 0 is
+    assigned to admin and task 1 to bob.
+    """
+
+    async def asyncSetUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_folder = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, self.old_folder)
+
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write("admin;Task 0;First;2030-01-01;2026-01-01;No\n"
+                            "bob;Task 1;Second;2030-01-01;2026-01-01;No")
+        with open("user.txt", "w", encoding="utf-8") as user_file:
+            user_file.write("admin;password\nbob;secret")
+
+        # Serve stores of their own, reading the files in the temporary folder
+        self.storage = TextStorage()
+        self.tasks = TaskStore(self.storage)
+        self.users = UserStore(self.storage)
+        for name, store in (("tasks", self.tasks), ("users", self.users)):
+            store_patch = mock.patch.object(task_server, name, store)
+            store_patch.start()
+            self.addCleanup(store_patch.stop)
+        self.tasks.load()
+
+        self.task_server = task_server.TaskServer()
+        self.server = await asyncio.start_server(self.task_server.handle_client,
+                                                 "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.writer_task = None
+
+    async def asyncTearDown(self):
+        if self.writer_task is not None:
+            self.writer_task.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def start_writer(self):
+        """
+        This method starts the server's writer, which saves queued changes.
+        """
+        self.writer_task = asyncio.create_task(self.task_server.write_changes())
+
+    async def connect(self, username=None, password=None):
+        """
+        This method opens a connection to the server, logging in if a
+        username and password are given.
+        """
+        connection = await asyncio.open_connection("127.0.0.1", self.port)
+        self.addCleanup(connection[1].close)
+        if username is not None:
+            reply = await self.request(connection, "login", username=username,
+                                       password=password)
+            self.assertTrue(reply["ok"], reply)
+        return connection
+
+    async def send(self, connection, action, **args):
+        """
+        This method sends a request without waiting for the reply.
+        """
+        connection[1].write(json.dumps(dict(args, action=action)).encode("utf-8") + b"\n")
+        await connection[1].drain()
+
+    async def receive(self, connection):
+        """
+        This method waits for the reply to a request.
+        """
+        return json.loads(await asyncio.wait_for(connection[0].readline(), 10))
+
+    async def request(self, connection, action, **args):
+        """
+        This method sends a request and returns the reply.
+        """
+        await self.send(connection, action, **args)
+        return await self.receive(connection)
+
+    def saved_tasks(self):
+        """
+        This method returns the title, user and completion of each task, as
+        a new session loads them.
+        """
+        return [(task["Task title"], task["Username"], task["completed"])
+                for task in TaskStore(TextStorage()).task_list]
+
+    async def test_requests_need_a_login(self):
+        """
+        Requests are refused before logging in and after a failed login.
+        """
+        connection = await self.connect()
+        reply = await self.request(connection, "task-count")
+        self.assertEqual(reply, {"ok": False, "error": "You must log in first."})
+
+        reply = await self.request(connection, "login", username="bob", password="wrong")
+        self.assertEqual(reply, {"ok": False, "error": "Wrong password"})
+        reply = await self.request(connection, "login", username="carol", password="x")
+        self.assertEqual(reply, {"ok": False, "error": "User does not exist."})
+
+        reply = await self.request(connection, "login", username="bob", password="secret")
+        self.assertTrue(reply["ok"])
+        reply = await self.request(connection, "task-count")
+        self.assertEqual(reply, {"ok": True, "count": 2})
+
+    async def test_only_own_tasks_can_be_changed(self):
+        """
+        A user cannot complete, reassign or change the due date of a task
+        assigned to someone else.
+        """
+        self.start_writer()
+        connection = await self.connect("bob", "secret")
+        for action, args in (("complete", {}), ("reassign", {"username": "bob"}),
+                             ("due-date", {"due_date": "2031-01-01"})):
+            reply = await self.request(connection, action, task_id=0, **args)
+            self.assertEqual(reply, {"ok": False, "error": "Task 0 is not assigned to you."})
+
+        reply = await self.request(connection, "complete", task_id=1)
+        self.assertEqual(reply, {"ok": True})
+        self.assertEqual(self.saved_tasks(), [("Task 0", "admin", False),
+                                              ("Task 1", "bob", True)])
+
+    async def test_admin_actions(self):
+        """
+        Only admin can view the statistics or compact the task storage.
+        """
+        self.start_writer()
+        connection = await self.connect("bob", "secret")
+        for action in ("stats", "compact"):
+            reply = await self.request(connection, action)
+            self.assertEqual(reply, {"ok": False,
+                                     "error": "You must be an administrator to do this."})
+
+        connection = await self.connect("admin", "password")
+        reply = await self.request(connection, "stats")
+        self.assertEqual((reply["ok"], reply["users"], reply["tasks"]), (True, 2, 2))
+        reply = await self.request(connection, "compact")
+        self.assertEqual(reply, {"ok": True})
+
+    async def test_changes_saved_together_after_another_session_saves(self):
+        """
+        Changes from several clients are saved in one batch, and a change to
+        a task added earlier in the batch still reaches that task after
+        another session has added one in the meantime.
+        """
+        bob = await self.connect("bob", "secret")
+        admin = await self.connect("admin", "password")
+
+        # Queue the changes before the writer starts, so they are one batch
+        await self.send(admin, "add", task=["bob", "Task 2", "Third", "2030-01-01",
+                                            "2026-01-01", "No"])
+        while self.task_server.changes.qsize() < 1:
+            await asyncio.sleep(0.01)
+        await self.send(bob, "complete", task_id=2)
+        while self.task_server.changes.qsize() < 2:
+            await asyncio.sleep(0.01)
+
+        TaskStore(TextStorage()).add(parse_task(["admin", "Other", "Fourth", "2030-01-01",
+                                                 "2026-01-01", "No"]))
+        self.start_writer()
+        self.assertEqual(await self.receive(admin), {"ok": True})
+        self.assertEqual(await self.receive(bob), {"ok": True})
+
+        expected = [("Task 0", "admin", False), ("Task 1", "bob", False),
+                    ("Other", "admin", False), ("Task 2", "bob", True)]
+        self.assertEqual(self.saved_tasks(), expected)
+        self.assertEqual([(task["Task title"], task["Username"], task["completed"])
+                          for task in self.tasks.task_list], expected)
+
+    async def test_failed_save_reloads_the_tasks(self):
+        """
+        Changes that cannot be saved are undone in memory as well.
+        """
+        self.start_writer()
+        connection = await self.connect("bob", "secret")
+        with mock.patch.object(self.storage, "save_task_changes",
+                               side_effect=OSError("No space left on device")):
+            reply = await self.request(connection, "add", task=[
+                "bob", "Task 2", "Third", "2030-01-01", "2026-01-01", "No"])
+        self.assertFalse(reply["ok"])
+        self.assertIn("No space left on device", reply["error"])
+
+        reply = await self.request(connection, "task-count")
+        self.assertEqual(reply, {"ok": True, "count": 2})
+        reply = await self.request(connection, "complete", task_id=1)
+        self.assertEqual(reply, {"ok": True})
+        self.assertEqual(self.saved_tasks(), [("Task 0", "admin", False),
+                                              ("Task 1", "bob", True)])
+
+    async def test_user_added_once_saved(self):
+        """
+        A registered user is only added in memory once saved, and the same
+        username registered twice in one batch is refused the second time.
+        """
+        connection = await self.connect("admin", "password")
+        with mock.patch.object(self.storage, "add_users",
+                               side_effect=OSError("No space left on device")):
+            self.start_writer()
+            reply = await self.request(connection, "register", username="carol",
+                                       password="x")
+        self.assertFalse(reply["ok"])
+        self.assertNotIn("carol", self.users.username_password)
+
+        self.writer_task.cancel()
+        other = await self.connect("bob", "secret")
+        await self.send(connection, "register", username="carol", password="x")
+        await self.send(other, "register", username="carol", password="y")
+        while self.task_server.changes.qsize() < 2:
+            await asyncio.sleep(0.01)
+        self.start_writer()
+        self.assertEqual(await self.receive(connection), {"ok": True})
+        self.assertEqual(await self.receive(other),
+                         {"ok": False, "error": "carol is already in use!"})
+        self.assertEqual(self.users.username_password["carol"], "x")
+
+
+if __name__ == "__main__":
+    unittest.main()
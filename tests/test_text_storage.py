@@ -0,0 +1,134 @@
+"""
+These tests check that sessions sharing tasks.txt keep each other's
+changes, in both the default and journal modes.
+
+Run from the repository folder with: python -m unittest discover tests
+"""
+
+# =====Importing Libraries=====
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import task_manager
+from task_manager import TaskStore, TextStorage, add_record, parse_task
+
+
+def make_task(username, title):
+    """
+    This function returns a new uncompleted task dictionary.
+    """
+    return parse_task([username, title, "Description", "2030-01-01", "2026-01-01", "No"])
+
+
+class TextSessionTest(unittest.TestCase):
+    """
+    This class runs sessions on the same tasks.txt in a temporary folder,
+    which starts with two tasks assigned to admin.
+    """
+
+    journal_mode = False
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_folder = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, self.old_folder)
+
+        journal_patch = mock.patch.object(task_manager, "JOURNAL_MODE", self.journal_mode)
+        journal_patch.start()
+        self.addCleanup(journal_patch.stop)
+
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write("admin;Task 0;First;2030-01-01;2026-01-01;No\n"
+                            "admin;Task 1;Second;2030-01-01;2026-01-01;No")
+
+    def saved_tasks(self):
+        """
+        This method returns the title, user and completion of each task, as
+        a new session loads them.
+        """
+        return [(task["Task title"], task["Username"], task["completed"])
+                for task in TaskStore(TextStorage()).task_list]
+
+    def test_batch_changes_its_own_task_after_another_session_adds_one(self):
+        """
+        A batch that adds a task and then changes it still changes that
+        task after another session has added one in the meantime.
+        """
+        session = TaskStore(TextStorage())
+        self.assertEqual(len(session.task_list), 2)
+
+        other_session = TaskStore(TextStorage())
+        other_session.add(make_task("admin", "Task 2"))
+
+        new_task = make_task("admin", "Task 3")
+        session.add(new_task, persist=False)
+        session.complete(2, persist=False)
+        session.reassign(2, "bob", persist=False)
+        session.storage.save_task_changes([add_record(new_task), ["complete", "2"],
+                                           ["reassign", "2", "bob"]])
+
+        expected = [("Task 0", "admin", False), ("Task 1", "admin", False),
+                    ("Task 2", "admin", False), ("Task 3", "bob", True)]
+        self.assertEqual(self.saved_tasks(), expected)
+        self.assertEqual([(task["Task title"], task["Username"], task["completed"])
+                          for task in session.task_list], expected)
+
+    def test_changes_to_existing_tasks_keep_their_ids(self):
+        """
+        Changes to tasks that were saved before the batch keep their IDs
+        when the batch is applied again.
+        """
+        session = TaskStore(TextStorage())
+        self.assertEqual(len(session.task_list), 2)
+
+        other_session = TaskStore(TextStorage())
+        other_session.add(make_task("admin", "Task 2"))
+
+        new_task = make_task("admin", "Task 3")
+        session.add(new_task, persist=False)
+        session.complete(1, persist=False)
+        session.storage.save_task_changes([add_record(new_task), ["complete", "1"]])
+
+        self.assertEqual(self.saved_tasks(),
+                         [("Task 0", "admin", False), ("Task 1", "admin", True),
+                          ("Task 2", "admin", False), ("Task 3", "admin", False)])
+
+    def test_save_waits_for_the_lock(self):
+        """
+        A session saving while another holds the lock waits for it, and then
+        keeps the change the other session saved.
+        """
+        session = TaskStore(TextStorage())
+        self.assertEqual(len(session.task_list), 2)
+
+        with TextStorage().locked():
+            save_thread = threading.Thread(target=session.complete, args=(0,))
+            save_thread.start()
+            save_thread.join(0.2)
+            self.assertTrue(save_thread.is_alive())
+
+            # Add a task as another session would, while the lock is held
+            with open("tasks.txt", "a", encoding="utf-8") as task_file:
+                task_file.write("\nadmin;Task 2;Third;2030-01-01;2026-01-01;No")
+
+        save_thread.join()
+        self.assertEqual(self.saved_tasks(),
+                         [("Task 0", "admin", True), ("Task 1", "admin", False),
+                          ("Task 2", "admin", False)])
+
+
+class JournalSessionTest(TextSessionTest):
+    """
+    This class runs the same tests with task changes saved to the journal.
+    """
+
+    journal_mode = True
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+"""
+These tests check that write-behind storage saves queued task changes
+together, keeps them if they cannot be saved, and saves them when the
+program exits or is stopped.
+
+Run from the repository folder with: python -m unittest discover tests
+"""
+
+# =====Importing Libraries=====
+import contextlib
+import io
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import task_manager
+from task_manager import TaskStore, TextStorage, WriteBehindStorage, parse_task
+
+REPOSITORY_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the task manager with a long write-behind delay, so that changes are
+# only saved when it exits
+SESSION_SCRIPT = """
+import task_manager
+task_manager.WRITE_BEHIND_DELAY = 60
+task_manager.main()
+"""
+
+
+def wait_for(condition, timeout=5):
+    """
+    This function waits for `condition` to return True, failing the test
+    if it has not after `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the background thread")
+        time.sleep(0.01)
+
+
+def make_task(title):
+    """
+    This function returns a new uncompleted task for admin.
+    """
+    return parse_task(["admin", title, "Description", "2030-01-01", "2026-01-01", "No"])
+
+
+class WriteBehindTest(unittest.TestCase):
+    """
+    This class runs sessions with write-behind storage in a temporary
+    folder, which starts with one task assigned to admin.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_folder = os.getcwd()
+        os.chdir(self.folder.name)
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, self.old_folder)
+
+        for name, value in (("WRITE_BEHIND_DELAY", 0.05), ("WRITE_BEHIND_RETRY_DELAY", 0.05)):
+            setting_patch = mock.patch.object(task_manager, name, value)
+            setting_patch.start()
+            self.addCleanup(setting_patch.stop)
+
+        with open("tasks.txt", "w", encoding="utf-8") as task_file:
+            task_file.write("admin;Task 0;First;2030-01-01;2026-01-01;No")
+        with open("user.txt", "w", encoding="utf-8") as user_file:
+            user_file.write("admin;password\nbob;secret")
+
+    def saved_tasks(self):
+        """
+        This method returns the title, user and completion of each task, as
+        a new session loads them.
+        """
+        return [(task["Task title"], task["Username"], task["completed"])
+                for task in TaskStore(TextStorage()).task_list]
+
+    def test_changes_are_saved_together(self):
+        """
+        Changes made in quick succession are saved in one flush, including
+        changes to a task added in the same flush after another session has
+        added one.
+        """
+        storage = WriteBehindStorage(TextStorage())
+        session = TaskStore(storage)
+        self.assertEqual(len(session.task_list), 1)
+
+        TaskStore(TextStorage()).add(make_task("Task 1"))
+
+        session.add(make_task("Task 2"))
+        session.complete(1)
+        session.reassign(1, "bob")
+        wait_for(lambda: storage.changes_saved == 3)
+
+        self.assertEqual(len(storage.flush_times), 1)
+        self.assertEqual(self.saved_tasks(),
+                         [("Task 0", "admin", False), ("Task 1", "admin", False),
+                          ("Task 2", "bob", True)])
+
+    def test_failed_flush_is_tried_again(self):
+        """
+        Changes that cannot be saved stay queued and are saved by the next
+        attempt, and the background thread carries on afterwards.
+        """
+        backend = TextStorage()
+        storage = WriteBehindStorage(backend)
+        session = TaskStore(storage)
+        self.assertEqual(len(session.task_list), 1)
+
+        save_task_changes = backend.save_task_changes
+        attempts = []
+
+        def fail_once(records):
+            attempts.append(list(records))
+            if len(attempts) == 1:
+                raise OSError("No space left on device")
+            save_task_changes(records)
+
+        output = io.StringIO()
+        with mock.patch.object(backend, "save_task_changes", fail_once), \
+                contextlib.redirect_stdout(output):
+            session.add(make_task("Task 1"))
+            wait_for(lambda: storage.changes_saved == 1)
+
+            self.assertEqual(len(attempts), 2)
+            self.assertEqual(attempts[0], attempts[1])
+            self.assertIn("No space left on device", output.getvalue())
+            self.assertEqual(storage.pending, [])
+
+            session.complete(1)
+            wait_for(lambda: storage.changes_saved == 2)
+
+        self.assertEqual(self.saved_tasks(),
+                         [("Task 0", "admin", False), ("Task 1", "admin", True)])
+
+    def run_session(self, stop):
+        """
+        This method runs the task manager with write-behind storage, adds a
+        task and then calls `stop` with the process, returning its output.
+        """
+        environment = dict(os.environ, TASK_MANAGER_WRITE_BEHIND="1",
+                           PYTHONPATH=REPOSITORY_FOLDER)
+        session = subprocess.Popen(
+            [sys.executable, "-u", "-c", SESSION_SCRIPT], env=environment,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.addCleanup(session.kill)
+        session.stdin.write(b"admin\npassword\na\nbob\nTask 1\nSecond\n2030-02-01\n")
+        session.stdin.flush()
+
+        # Wait for the task to be queued
+        output = b""
+        while b"Task successfully added" not in output:
+            data = os.read(session.stdout.fileno(), 4096)
+            self.assertTrue(data, "the task manager stopped: " + output.decode())
+            output += data
+
+        stop(session)
+        output += session.stdout.read()
+        session.stdout.close()
+        session.stdin.close()
+        session.wait(10)
+        return output.decode()
+
+    def test_changes_are_saved_on_sigterm(self):
+        """
+        Queued changes are saved when the program is stopped with SIGTERM.
+        """
+        self.run_session(lambda session: session.send_signal(signal.SIGTERM))
+        self.assertEqual(self.saved_tasks(),
+                         [("Task 0", "admin", False), ("Task 1", "bob", False)])
+
+    def test_changes_are_saved_at_the_end_of_input(self):
+        """
+        Queued changes are saved when the program exits without the exit
+        menu option, here at the end of its input.
+        """
+        self.run_session(lambda session: session.stdin.close())
+        self.assertEqual(self.saved_tasks(),
+                         [("Task 0", "admin", False), ("Task 1", "bob", False)])
+
+
+if __name__ == "__main__":
+    unittest.main()